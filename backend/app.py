@@ -1,7 +1,12 @@
 from flask import Flask
 from flask_cors import CORS
-from backend.routes.network_routes import network_bp
+from backend.routes.network_routes import network_bp, start_stats_source
 from backend.routes.auth_routes import auth_bp
+from backend.routes.task_routes import tasks_bp
+from backend.routes.log_routes import logs_bp
+from backend.routes.metrics_routes import init_metrics
+from backend.routes.system_routes import system_bp
+from backend.routes.fleet_routes import fleet_bp
 from backend.config import Config
 import logging
 
@@ -21,6 +26,18 @@ def create_app(config_class=Config):
     # Enregistrement des blueprints
     app.register_blueprint(network_bp, url_prefix='/api/network')
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(logs_bp, url_prefix='/api/logs')
+    # Configuration système modifiable à chaud
+    app.register_blueprint(system_bp, url_prefix='/api/system')
+    # Collecteur de la flotte : trames poussées par les agents (python -m backend.network_manager.agent)
+    app.register_blueprint(fleet_bp, url_prefix='/api/fleet')
+    # Opérations longues déléguées aux workers Celery
+    app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
+    # Instrumentation des requêtes et export Prometheus (/metrics)
+    init_metrics(app)
+    
+    # Échantillonnage réseau (sauf en mode reader, où un processus dédié publie les statistiques)
+    start_stats_source()
     
     # Route de test de base
     @app.route('/api/health')
@@ -1,11 +1,226 @@
 import jwt
 import datetime
 import hashlib
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 from backend.config import Config
 
+# Révocations partagées par tous les workers (sinon propres au processus : un seul worker)
+REVOCATION_REDIS_URL = os.environ.get('NBM_AUTH_REDIS_URL', os.environ.get('REDIS_URL'))
+# Durée (s) pendant laquelle l'état de révocation lu dans Redis est servi localement
+REVOCATION_CACHE_TTL = float(os.environ.get('NBM_AUTH_REVOCATION_TTL', 5))
+
+logger = logging.getLogger(__name__)
+
+class RevocationStoreError(Exception):
+    """Révocation impossible à enregistrer (stockage partagé injoignable)"""
+
+class TokenCache:
+    """Cache LRU borné des tokens déjà vérifiés.
+
+    Clé : empreinte SHA-256 du token brut (le token lui-même n'est pas
+    conservé). Une entrée n'est servie que jusqu'à l'expiration (`exp`) du
+    token. Les révocations ne sont pas conservées ici : elles sont
+    consultées dans le RevocationStore à chaque lecture.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Lectures servies / manquées (métriques)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key, now=None):
+        """Claims d'un token en cache, ou None s'il est absent ou expiré"""
+        now = time.time() if now is None else now
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                self.misses += 1
+                return None
+            if claims['exp'] <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, key, claims):
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key=None, user_id=None):
+        """Retirer un token, ou tous ceux d'un utilisateur"""
+        with self._lock:
+            self._entries.pop(key, None)
+            if user_id is not None:
+                for stale in [k for k, claims in self._entries.items() if claims.get('user_id') == user_id]:
+                    del self._entries[stale]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class MemoryRevocationStore:
+    """Révocations propres au processus : perdues au redémarrage, non partagées entre workers.
+
+    Chaque utilisateur a une version de token, incrémentée à chaque
+    invalidation (changement de mot de passe) ; un token porte la version
+    courante à son émission. Les déconnexions révoquent l'identifiant (jti)
+    du token jusqu'à son expiration.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # jti -> expiration du token
+        self._revoked = {}
+        self._versions = {}
+
+    def version(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def is_revoked(self, token_id, user_id, version):
+        return version < self._versions.get(user_id, 0) or token_id in self._revoked
+
+    def revoke(self, token_id, expires_at):
+        now = time.time()
+        with self._lock:
+            # Les révocations de tokens déjà expirés n'ont plus d'utilité
+            self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now}
+            self._revoked[token_id] = expires_at
+
+    def bump(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            return self._versions[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._versions.clear()
+
+class RedisRevocationStore:
+    """Révocations dans Redis, partagées par tous les workers et conservées au redémarrage.
+
+    L'état lu dans Redis (jti révoqué, version de l'utilisateur) est servi
+    localement pendant `cache_ttl` secondes : une vérification se réduit à
+    des lectures de dictionnaire, avec au plus un MGET par token et par
+    période. Une révocation faite par un autre worker est donc prise en
+    compte en `cache_ttl` secondes au plus ; celles de ce worker,
+    immédiatement. Une révocation ou une version dépassée est définitive
+    et n'est jamais relue.
+
+    Redis injoignable : la vérification utilise le dernier état connu, même
+    périmé, et refuse les tokens dont l'état n'a jamais été lu (échec fermé) ;
+    les révocations lèvent RevocationStoreError.
+    """
+
+    def __init__(self, client, prefix='nbm', cache_ttl=REVOCATION_CACHE_TTL, max_entries=4096,
+                 errors=(Exception,), clock=time.monotonic):
+        self.client = client
+        self.prefix = prefix
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.errors = errors
+        self.clock = clock
+        self._lock = threading.Lock()
+        # jti -> (date de lecture, révoqué) ; utilisateur -> (date de lecture, version)
+        self._tokens = OrderedDict()
+        self._versions = OrderedDict()
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url), errors=(redis.RedisError,))
+
+    def _revoked_key(self, token_id):
+        return f'{self.prefix}:auth:revoked:{token_id}'
+
+    def _version_key(self, user_id):
+        return f'{self.prefix}:auth:version:{user_id}'
+
+    def _remember(self, entries, key, value, now):
+        with self._lock:
+            entries[key] = (now, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def version(self, user_id):
+        now = self.clock()
+        cached = self._versions.get(user_id)
+        if cached is not None and now - cached[0] < self.cache_ttl:
+            return cached[1]
+        try:
+            current = int(self.client.get(self._version_key(user_id)) or 0)
+        except self.errors:
+            # Version sous-estimée au pire : le token émis sera refusé, jamais accepté à tort
+            logger.warning("Redis injoignable : version de token de %s inconnue", user_id, exc_info=True)
+            return cached[1] if cached is not None else 0
+        self._remember(self._versions, user_id, current, now)
+        return current
+
+    def is_revoked(self, token_id, user_id, version):
+        now = self.clock()
+        token = self._tokens.get(token_id)
+        current = self._versions.get(user_id)
+        if token is not None and token[1] or current is not None and version < current[1]:
+            return True
+        if token is not None and current is not None \
+                and now - token[0] < self.cache_ttl and now - current[0] < self.cache_ttl:
+            return False
+        try:
+            revoked, latest = self.client.mget([self._revoked_key(token_id), self._version_key(user_id)])
+        except self.errors:
+            logger.warning("Redis injoignable : dernier état de révocation connu utilisé", exc_info=True)
+            return token is None or current is None
+        self._remember(self._tokens, token_id, revoked is not None, now)
+        self._remember(self._versions, user_id, int(latest or 0), now)
+        return revoked is not None or version < int(latest or 0)
+
+    def revoke(self, token_id, expires_at):
+        self._remember(self._tokens, token_id, True, self.clock())
+        # Conservée jusqu'à l'expiration du token, au-delà de laquelle il est refusé de toute façon
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        try:
+            self.client.set(self._revoked_key(token_id), 1, ex=ttl)
+        except self.errors as e:
+            raise RevocationStoreError('Révocation non partagée : Redis injoignable') from e
+
+    def bump(self, user_id):
+        try:
+            version = self.client.incr(self._version_key(user_id))
+        except self.errors as e:
+            raise RevocationStoreError('Invalidation non partagée : Redis injoignable') from e
+        self._remember(self._versions, user_id, version, self.clock())
+        return version
+
+def create_revocation_store(url=REVOCATION_REDIS_URL):
+    return RedisRevocationStore.from_url(url) if url else MemoryRevocationStore()
+
 class AuthManager:
+    # Tokens vérifiés, partagés par toutes les requêtes du processus
+    token_cache = TokenCache()
+    # Déconnexions et invalidations, partagées entre workers si Redis est configuré
+    revocations = create_revocation_store()
+
     @staticmethod
     def generate_password_hash(password):
         """Générer un hash sécurisé du mot de passe"""
@@ -18,34 +233,82 @@ class AuthManager:
         payload = {
             'user_id': user_id,
             'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1),
-            'iat': datetime.datetime.utcnow()
+            'iat': datetime.datetime.utcnow(),
+            # Identifiant révocable à la déconnexion, version invalidée au changement de mot de passe
+            'jti': uuid.uuid4().hex,
+            'ver': AuthManager.revocations.version(user_id)
         }
         return jwt.encode(payload, Config.SECRET_KEY, algorithm='HS256')
 
+    @staticmethod
+    def verify_claims(token):
+        """Vérifier un token et renvoyer ses claims (None si invalide, expiré ou révoqué).
+
+        Un token déjà vérifié est servi par le cache, sans nouveau décodage.
+        """
+        cache = AuthManager.token_cache
+        key = cache.key(token)
+        claims = cache.get(key)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
+            except jwt.ExpiredSignatureError:
+                return None
+            except jwt.InvalidTokenError:
+                return None
+            if 'user_id' not in claims or 'exp' not in claims:
+                return None
+            cache.put(key, claims)
+        if AuthManager.revocations.is_revoked(AuthManager.token_id(key, claims), claims['user_id'],
+                                              claims.get('ver', 0)):
+            return None
+        return claims
+
+    @staticmethod
+    def token_id(key, claims):
+        """Identifiant de révocation : jti, ou empreinte pour les tokens émis sans jti"""
+        return claims.get('jti') or key.hex()
+
     @staticmethod
     def verify_token(token):
         """Vérifier la validité du token"""
-        try:
-            payload = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
-            return payload['user_id']
-        except jwt.ExpiredSignatureError:
-            return None
-        except jwt.InvalidTokenError:
-            return None
+        claims = AuthManager.verify_claims(token)
+        return claims['user_id'] if claims else None
+
+    @staticmethod
+    def revoke_token(token):
+        """Révoquer un token (déconnexion) ; sans effet s'il est déjà invalide"""
+        claims = AuthManager.verify_claims(token)
+        if claims:
+            key = AuthManager.token_cache.key(token)
+            AuthManager.revocations.revoke(AuthManager.token_id(key, claims), claims['exp'])
+            AuthManager.token_cache.discard(key)
+
+    @staticmethod
+    def invalidate_user_tokens(user_id):
+        """Invalider tous les tokens déjà émis pour un utilisateur (y compris dans la même seconde)"""
+        AuthManager.revocations.bump(user_id)
+        AuthManager.token_cache.discard(user_id=user_id)
 
     @staticmethod
     def login_required(f):
-        """Décorateur pour sécuriser les routes"""
+        """Décorateur pour sécuriser les routes.
+
+        L'identité vérifiée est placée dans `g.user_id` (et les claims dans
+        `g.token_claims`) pour que les handlers ne décodent pas le token à nouveau.
+        """
         @wraps(f)
         def decorated_function(*args, **kwargs):
             token = request.headers.get('Authorization')
             if not token:
                 return jsonify({'message': 'Token manquant'}), 401
             
-            user_id = AuthManager.verify_token(token)
-            if not user_id:
+            claims = AuthManager.verify_claims(token)
+            if not claims:
                 return jsonify({'message': 'Token invalide'}), 401
             
+            g.user_id = claims['user_id']
+            g.token_claims = claims
             return f(*args, **kwargs)
         return decorated_function
 
@@ -0,0 +1,74 @@
+from typing import Dict, Optional, Tuple
+
+
+class AdaptiveSampling:
+    """Intervalle d'échantillonnage propre à chaque interface.
+
+    - variation brusque des débits ou anomalie en cours : `fast_interval`
+      (début d'une rafale visible au dixième de seconde) ;
+    - interface plate et quasi inactive : l'intervalle double à chaque
+      échantillon, jusqu'à `max_interval` ;
+    - sinon l'intervalle revient (en doublant depuis l'intervalle rapide) à
+      l'intervalle de base configuré.
+
+    Les débits restent exacts quel que soit l'espacement : le monitor divise
+    les deltas des compteurs par la durée réellement écoulée.
+    """
+
+    def __init__(self, base_interval: float = 1.0, fast_interval: float = 0.25, max_interval: float = 30.0,
+                 change_ratio: float = 0.5, idle_rate: float = 1024.0):
+        self.fast_interval = fast_interval
+        self.change_ratio = change_ratio
+        # Sous ce débit (octets/s, dans chaque sens), une variation n'est pas significative
+        self.idle_rate = idle_rate
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.configure(base_interval, max_interval)
+        # Interface -> (intervalle courant, débits du dernier échantillon)
+        self._state: Dict[str, Tuple[float, Tuple[float, float]]] = {}
+
+    def configure(self, base_interval: Optional[float] = None, max_interval: Optional[float] = None,
+                  fast_interval: Optional[float] = None):
+        """Modifier les bornes à chaud ; pris en compte dès le prochain échantillon de chaque interface.
+
+        Les bornes fournies sont vérifiées ensemble avant toute modification.
+        """
+        fast = self.fast_interval if fast_interval is None else fast_interval
+        base = self.base_interval if base_interval is None else base_interval
+        if base < fast:
+            raise ValueError(f"L'intervalle de base doit être d'au moins {fast} s")
+        self.fast_interval = fast
+        self.base_interval = base
+        if max_interval is not None:
+            self.max_interval = max_interval
+        self.max_interval = max(self.max_interval, self.base_interval)
+
+    def interval(self, interface: str) -> float:
+        state = self._state.get(interface)
+        return self.base_interval if state is None else state[0]
+
+    def _changed(self, previous: float, current: float) -> bool:
+        if max(previous, current) < self.idle_rate:
+            return False
+        return abs(current - previous) > self.change_ratio * max(previous, self.idle_rate)
+
+    def update(self, interface: str, upload: float, download: float, anomaly: bool = False) -> float:
+        """Intervalle jusqu'au prochain échantillon de l'interface, d'après celui qui vient d'être pris"""
+        state = self._state.get(interface)
+        if state is None:
+            interval = self.base_interval
+        else:
+            interval, (last_upload, last_download) = state
+            if anomaly or self._changed(last_upload, upload) or self._changed(last_download, download):
+                interval = self.fast_interval
+            elif max(upload, download) < self.idle_rate:
+                interval = min(self.max_interval, max(interval * 2, self.base_interval))
+            elif interval < self.base_interval:
+                interval = min(self.base_interval, interval * 2)
+            else:
+                interval = self.base_interval
+        self._state[interface] = (interval, (upload, download))
+        return interval
+
+    def forget(self, interface: str):
+        self._state.pop(interface, None)
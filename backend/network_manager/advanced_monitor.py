@@ -1,9 +1,20 @@
-import psutil
 import time
-import threading
 import logging
+import threading
 from dataclasses import dataclass, asdict
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
+from backend.network_manager.adaptive import AdaptiveSampling
+from backend.network_manager.history import NetworkHistory
+from backend.network_manager.counter_sources import CounterSource, default_counter_source
+from backend.network_manager.scheduler import MIN_INTERVAL, SamplingScheduler
+from backend.network_manager.stats_logger import BatchedStatsLogger
+from backend.network_manager.stream import StatsBroadcaster
+from backend.network_manager.snapshot import StatsSnapshot
+from backend.network_manager.anomaly_detector import AnomalyEngine
+from backend.network_manager.rollups import RollupEngine
+
+# Valeur de débordement des compteurs 32 bits de certains pilotes
+COUNTER_32_WRAP = 2 ** 32
 
 @dataclass
 class NetworkStats:
@@ -16,41 +27,111 @@ class NetworkStats:
     speed_download: float
 
 class AdvancedNetworkMonitor:
-    def __init__(self, interval=1, log_path='/var/log/network-manager/network_stats.log'):
+    def __init__(self, interval=1, log_path='/var/log/network-manager/network_stats.log',
+                 history_size=3600, counter_source: Optional[CounterSource] = None,
+                 scheduler: Optional[SamplingScheduler] = None,
+                 anomaly_engine: Optional[AnomalyEngine] = None,
+                 log_retention_days=30, sinks: Optional[List] = None, snapshot_writer=None,
+                 segment_store=None, adaptive: Optional[AdaptiveSampling] = None):
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"L'intervalle minimal est de {MIN_INTERVAL} s")
         self.interval = interval
+        self.counter_source = counter_source or default_counter_source()
         self.is_monitoring = False
-        self.monitoring_thread = None
+        # Un même ordonnanceur peut piloter plusieurs monitors
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or SamplingScheduler()
+        self._job = None
         self.network_stats: Dict[str, NetworkStats] = {}
         self.previous_stats = {}
+        # Échantillonnage adaptatif par interface (None : toutes les interfaces à chaque tick)
+        self.adaptive = adaptive
+        # Pris par le tick et par les réglages à chaud (intervalle, échantillonnage adaptatif, interfaces) ;
+        # réentrant pour qu'une configuration complète s'applique d'un bloc entre deux ticks
+        self.config_lock = threading.RLock()
+        self._next_due: Dict[str, float] = {}
+        # Interfaces suivies (None : toutes celles de la source) et détection d'anomalies, modifiables à chaud
+        self.interface_filter: Optional[frozenset] = None
+        self.anomaly_detection_enabled = True
+        self.history = NetworkHistory(capacity=history_size)
+        # Agrégats multi-résolution, rétention du niveau horaire = log_retention_days
+        self.rollups = RollupEngine(retention_days=log_retention_days)
+        # Historique long terme sur disque (SegmentStore), conservé entre redémarrages, si configuré
+        self.segment_store = segment_store
+        self.broadcaster = StatsBroadcaster()
+        self.anomaly_engine = anomaly_engine or AnomalyEngine()
+        self._published: Dict[str, NetworkStats] = {}
+        self._published_dicts: Dict[str, Dict] = {}
+        # Instantané immuable servi aux routes, remplacé atomiquement à chaque tick
+        self.snapshot = StatsSnapshot.empty()
+        # Publication de l'instantané vers les workers (SharedSnapshotWriter), si configurée
+        self.snapshot_writer = snapshot_writer
         
-        # Configuration du logging
-        logging.basicConfig(
-            filename=log_path, 
-            level=logging.INFO, 
-            format='%(asctime)s - %(message)s'
-        )
+        # Journal des statistiques écrit en arrière-plan (désactivé si log_path est None)
+        self.stats_logger = BatchedStatsLogger(log_path) if log_path else None
+        # Consommateurs asynchrones des échantillons (ex. SampleWriter) : submit() ne doit pas bloquer
+        self.sinks = list(sinks or [])
         self.logger = logging.getLogger(__name__)
 
-    def _calculate_speed(self, current, previous, interval):
-        """Calculer la vitesse en octets par seconde"""
-        return (current - previous) / interval if interval > 0 else 0
+    @staticmethod
+    def _counter_delta(current, previous):
+        """Calculer l'écart entre deux lectures d'un compteur cumulé.
+
+        Un compteur qui recule a soit débordé (compteur 32 bits proche de sa
+        limite), soit été remis à zéro (redémarrage de l'interface) : dans ce
+        dernier cas seule la valeur courante est comptée.
+        """
+        if current >= previous:
+            return current - previous
+        if COUNTER_32_WRAP // 2 <= previous < COUNTER_32_WRAP:
+            return current + COUNTER_32_WRAP - previous
+        return current
 
     def _update_network_stats(self):
         """Mettre à jour les statistiques réseau"""
-        current_stats = psutil.net_io_counters(pernic=True)
+        # La source ne renvoie que les interfaces significatives
+        current_stats = self.counter_source.read()
+        with self.config_lock:
+            timestamp, tick_stats, removed = self._sample(current_stats)
+
+        self._publish(timestamp, tick_stats, removed)
+
+        # Journalisation : un seul enregistrement par tick, écrit hors du thread d'échantillonnage
+        if self.stats_logger is not None:
+            self.stats_logger.submit(timestamp, tick_stats)
+        for sink in self.sinks:
+            sink.submit(timestamp, tick_stats)
+
+    def _sample(self, current_stats):
+        """Calculer les débits du tick, sous config_lock ; renvoie l'horodatage, les échantillons et les disparues"""
+        # Lu une fois pour tout le tick
+        adaptive = self.adaptive
+        if self.interface_filter is not None:
+            current_stats = {name: stats for name, stats in current_stats.items() if name in self.interface_filter}
+        # Horodatage réel de la lecture : les vitesses utilisent l'écart mesuré
+        read_time = time.monotonic()
+        timestamp = time.time()
+        tick_stats = []
         
         for interface, stats in current_stats.items():
-            # Ignorer les interfaces non significatives
-            if interface.startswith(('lo', 'docker', 'veth', 'br')):
-                continue
-
             # Calculer les vitesses
-            if interface in self.previous_stats:
-                prev = self.previous_stats[interface]
-                upload_speed = self._calculate_speed(stats.bytes_sent, prev.bytes_sent, self.interval)
-                download_speed = self._calculate_speed(stats.bytes_recv, prev.bytes_recv, self.interval)
+            previous = self.previous_stats.get(interface)
+            if previous is not None and read_time < self._next_due.get(interface, 0.0):
+                # Pas encore dû : le prochain échantillon couvrira tout l'écart
+                continue
+            if previous is not None:
+                prev, prev_time = previous
+                elapsed = read_time - prev_time
+                deltas = [self._counter_delta(current, last) for current, last in zip(stats, prev)]
+                upload_speed, download_speed, packets_sent_rate, packets_recv_rate = (
+                    delta / elapsed if elapsed > 0 else 0 for delta in deltas
+                )
+                self.rollups.add(interface, timestamp, elapsed, deltas)
+                if self.segment_store is not None:
+                    self.segment_store.add(interface, timestamp, elapsed, deltas)
             else:
                 upload_speed = download_speed = 0
+                packets_sent_rate = packets_recv_rate = 0
 
             # Créer les statistiques réseau
             network_stat = NetworkStats(
@@ -65,48 +146,147 @@ class AdvancedNetworkMonitor:
 
             # Stocker les statistiques
             self.network_stats[interface] = network_stat
-            self.previous_stats[interface] = stats
+            self.previous_stats[interface] = (stats, read_time)
+            self.history.buffer(interface).append(
+                timestamp, upload_speed, download_speed, packets_sent_rate, packets_recv_rate
+            )
+            tick_stats.append(network_stat)
+            if previous is not None and self.anomaly_detection_enabled:
+                # Un échantillon espacé pèse selon la durée couverte
+                weight = elapsed / self.interval if adaptive is not None else 1.0
+                self.anomaly_engine.observe(interface, timestamp, upload_speed, download_speed, weight)
+            if adaptive is not None:
+                interval = adaptive.update(interface, upload_speed, download_speed,
+                                           self.anomaly_engine.has_open(interface))
+                # Marge d'un demi-intervalle rapide : une échéance atteinte à la gigue près est servie
+                self._next_due[interface] = read_time + interval - adaptive.fast_interval / 2
+
+        # Oublier les interfaces disparues
+        removed = [interface for interface in self.network_stats if interface not in current_stats]
+        for interface in removed:
+            del self.network_stats[interface]
+            self.previous_stats.pop(interface, None)
+            self._next_due.pop(interface, None)
+            self.history.forget(interface)
+            self.rollups.forget(interface)
+            if adaptive is not None:
+                adaptive.forget(interface)
+            self.anomaly_engine.forget(interface, timestamp)
+        if adaptive is not None and self._job is not None:
+            # Prochain tick à la première échéance d'interface
+            remaining = [due - read_time for due in self._next_due.values()]
+            next_tick = min(remaining, default=adaptive.base_interval) + adaptive.fast_interval / 2
+            self.scheduler.set_interval(self._job, max(MIN_INTERVAL, next_tick))
 
-            # Journalisation
-            self._log_network_stats(network_stat)
+        return timestamp, tick_stats, removed
 
-    def _log_network_stats(self, network_stat):
-        """Journaliser les statistiques réseau"""
-        log_message = (
-            f"Interface: {network_stat.interface}, "
-            f"Upload: {network_stat.speed_upload/1024:.2f} Ko/s, "
-            f"Download: {network_stat.speed_download/1024:.2f} Ko/s"
+    def _publish(self, timestamp, tick_stats, removed):
+        """Publier le tick : instantané pour les routes, deltas pour les abonnés"""
+        changed = []
+        for stats in tick_stats:
+            if self._published.get(stats.interface) != stats:
+                stats_dict = asdict(stats)
+                self._published[stats.interface] = stats
+                self._published_dicts[stats.interface] = stats_dict
+                changed.append(stats_dict)
+        for interface in removed:
+            self._published.pop(interface, None)
+            self._published_dicts.pop(interface, None)
+
+        anomalies = self.detect_anomalies()
+        self.snapshot = StatsSnapshot.build(
+            self.snapshot, timestamp, self._published_dicts.values(), anomalies,
+            changed=bool(changed or removed)
         )
-        self.logger.info(log_message)
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.write(self.snapshot)
+        self.broadcaster.publish(timestamp, changed, removed, anomalies)
+
+    def set_interval(self, interval: float):
+        """Changer l'intervalle d'échantillonnage (de base, en mode adaptatif) sans redémarrer"""
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"L'intervalle minimal est de {MIN_INTERVAL} s")
+        with self.config_lock:
+            if self.adaptive is not None:
+                self.adaptive.configure(base_interval=interval)
+            self.interval = interval
+            if self._job is not None and self.adaptive is None:
+                self.scheduler.set_interval(self._job, interval)
 
-    def _monitoring_loop(self):
-        """Boucle de monitoring principal"""
-        while self.is_monitoring:
-            self._update_network_stats()
-            time.sleep(self.interval)
+    def set_adaptive(self, adaptive: Optional[AdaptiveSampling]):
+        """Activer (ou désactiver avec None) l'échantillonnage adaptatif sans redémarrer"""
+        with self.config_lock:
+            if adaptive is not None:
+                # Vérifié avant tout changement : un intervalle rapide trop long laisse le monitor inchangé
+                adaptive.configure(base_interval=self.interval)
+            self.adaptive = adaptive
+            self._next_due.clear()
+            if self._job is not None:
+                self.scheduler.set_interval(self._job, self.interval)
+
+    def set_interfaces(self, interfaces: Optional[Iterable[str]]):
+        """Restreindre le suivi à ces interfaces (None ou vide : toutes)"""
+        with self.config_lock:
+            self.interface_filter = frozenset(interfaces) if interfaces else None
 
     def start_monitoring(self):
         """Démarrer le monitoring réseau"""
         if not self.is_monitoring:
             self.is_monitoring = True
-            self.monitoring_thread = threading.Thread(target=self._monitoring_loop)
-            self.monitoring_thread.start()
+            self._job = self.scheduler.add_job(self._update_network_stats, self.interval)
+            self.scheduler.start()
             print("Monitoring réseau démarré")
 
     def stop_monitoring(self):
         """Arrêter le monitoring réseau"""
         if self.is_monitoring:
             self.is_monitoring = False
-            if self.monitoring_thread:
-                self.monitoring_thread.join()
+            self.scheduler.remove_job(self._job)
+            self._job = None
+            # Un ordonnanceur partagé continue de piloter les autres monitors
+            if self._owns_scheduler:
+                self.scheduler.stop()
+            if self.stats_logger is not None:
+                self.stats_logger.stop()
+            for sink in self.sinks:
+                sink.stop()
+            if self.segment_store is not None:
+                self.segment_store.flush()
             print("Monitoring réseau arrêté")
 
     def get_current_stats(self) -> List[Dict]:
         """Récupérer les statistiques actuelles"""
-        return [asdict(stats) for stats in self.network_stats.values()]
+        return [dict(stats) for stats in self.snapshot.network_stats]
+
+    def get_history(self, interface: Optional[str] = None, since: Optional[float] = None,
+                    step: Optional[float] = None) -> List[Dict]:
+        """Récupérer l'historique des vitesses.
+
+        Sans pas (ou avec un pas inférieur à la seconde), les échantillons
+        bruts des tampons circulaires sont renvoyés ; sinon le niveau
+        d'agrégation le plus grossier compatible avec le pas est utilisé :
+        celui des segments sur disque s'ils sont configurés (les derniers
+        échantillons non encore écrits en sont absents), sinon celui des
+        agrégats en mémoire.
+        """
+        if not step or step < self.rollups.tiers[0][0]:
+            return self.history.query(interface, since, step)
+        if self.segment_store is not None:
+            return self.segment_store.query(interface, since, step=step)
+        return self.rollups.query(interface, since, step)
+
+    def detect_anomalies(self, threshold_upload=None, threshold_download=None):
+        """Détecter des anomalies de trafic.
+
+        Sans seuil, renvoie le journal d'événements du moteur statistique
+        (mis à jour à chaque échantillon). Avec des seuils explicites, compare
+        les vitesses courantes à ces seuils fixes.
+        """
+        if threshold_upload is None and threshold_download is None:
+            return self.anomaly_engine.events()
 
-    def detect_anomalies(self, threshold_upload=1024*1024, threshold_download=1024*1024):
-        """Détecter des anomalies de trafic"""
+        threshold_upload = threshold_upload if threshold_upload is not None else float('inf')
+        threshold_download = threshold_download if threshold_download is not None else float('inf')
         anomalies = []
         for interface, stats in self.network_stats.items():
             if stats.speed_upload > threshold_upload or stats.speed_download > threshold_download:
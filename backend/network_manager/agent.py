@@ -0,0 +1,56 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.fleet import FleetAgent, http_sender
+
+
+def main(argv=None):
+    """Agent sans interface : échantillonne l'hôte et pousse les deltas vers le collecteur.
+
+    `python -m backend.network_manager.agent --aggregator http://collecteur:5000/api/fleet/ingest`
+    Plusieurs agents peuvent tourner sur une même machine avec `--synthetic` et des `--node` distincts.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__.splitlines()[0])
+    parser.add_argument('--aggregator', default=os.environ.get('NBM_AGGREGATOR_URL'),
+                        help='URL de /api/fleet/ingest (NBM_AGGREGATOR_URL)')
+    parser.add_argument('--node', default=os.environ.get('NBM_NODE_NAME', socket.gethostname()),
+                        help="Nom du nœud (NBM_NODE_NAME, défaut : nom d'hôte)")
+    parser.add_argument('--interval', type=float, default=1.0, help="Intervalle d'échantillonnage (s)")
+    parser.add_argument('--flush-interval', type=float, default=5.0, help='Délai entre deux trames (s)')
+    parser.add_argument('--synthetic', type=int, default=0, metavar='N',
+                        help='Remplacer les interfaces réelles par N interfaces synthétiques')
+    args = parser.parse_args(argv)
+    if not args.aggregator:
+        parser.error('--aggregator ou NBM_AGGREGATOR_URL requis')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    agent = FleetAgent(args.node, http_sender(args.aggregator, os.environ.get('NBM_FLEET_TOKEN')),
+                       flush_interval=args.flush_interval)
+    # Ni journal local, ni historique long : le collecteur conserve les séries et détecte les anomalies
+    monitor = AdvancedNetworkMonitor(
+        interval=args.interval,
+        log_path=None,
+        history_size=60,
+        counter_source=SyntheticSource(args.synthetic, prefix='syn') if args.synthetic else None,
+        sinks=[agent]
+    )
+    monitor.anomaly_detection_enabled = False
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    monitor.start_monitoring()
+    stopped.wait()
+    monitor.stop_monitoring()
+    agent.stop()
+
+
+if __name__ == '__main__':
+    main()
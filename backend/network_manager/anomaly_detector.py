@@ -0,0 +1,192 @@
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+# Métriques suivies pour chaque interface
+METRICS = ('speed_upload', 'speed_download')
+
+
+class EwmaState:
+    """Moyenne et variance exponentielles d'une série (état O(1))"""
+    __slots__ = ('mean', 'variance', 'count')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value: float, alpha: float):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class AnomalyDetector:
+    """Interface des détecteurs : score d'un échantillon par rapport à une référence"""
+
+    def score(self, key: Tuple[str, str], value: float, timestamp: float,
+              weight: float = 1.0) -> Tuple[float, float]:
+        """Renvoyer (score, valeur de référence) puis mettre à jour l'état.
+
+        `weight` : durée couverte par l'échantillon, en intervalles de base
+        (échantillonnage adaptatif).
+        """
+        raise NotImplementedError
+
+    def forget(self, interface: str):
+        """Supprimer l'état d'une interface disparue"""
+
+
+class ThresholdDetector(AnomalyDetector):
+    """Seuil fixe en octets/s (comportement historique du monitor)"""
+
+    def __init__(self, threshold: float = 1024 * 1024):
+        self.threshold = threshold
+
+    def score(self, key, value, timestamp, weight=1.0):
+        return value / self.threshold, self.threshold
+
+
+class EwmaDetector(AnomalyDetector):
+    """Score z par rapport à une moyenne et une variance exponentielles.
+
+    `min_std` évite qu'un lien parfaitement plat rende chaque octet
+    anormal ; aucun score n'est produit pendant `warmup` échantillons.
+    """
+
+    def __init__(self, alpha: float = 0.05, warmup: int = 30, min_std: float = 1024.0):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.min_std = min_std
+        self._states: Dict[Tuple[str, str], EwmaState] = {}
+
+    def _state(self, key, timestamp) -> EwmaState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = EwmaState()
+        return state
+
+    def score(self, key, value, timestamp, weight=1.0):
+        state = self._state(key, timestamp)
+        if state.count < self.warmup:
+            z = 0.0
+        else:
+            std = max(math.sqrt(state.variance), self.min_std)
+            z = (value - state.mean) / std
+        baseline = state.mean
+        # Un échantillon couvrant k intervalles pèse comme k échantillons identiques
+        alpha = self.alpha if weight == 1.0 else 1 - (1 - self.alpha) ** weight
+        state.update(value, alpha)
+        return z, baseline
+
+    def forget(self, interface):
+        for key in [key for key in self._states if key[0] == interface]:
+            del self._states[key]
+
+
+class SeasonalEwmaDetector(EwmaDetector):
+    """EWMA séparée pour chaque heure de la journée (référence saisonnière)"""
+
+    def __init__(self, alpha: float = 0.05, warmup: int = 30, min_std: float = 1024.0, utc: bool = False):
+        super().__init__(alpha, warmup, min_std)
+        self.utc = utc
+
+    def _state(self, key, timestamp):
+        hour = (time.gmtime if self.utc else time.localtime)(timestamp).tm_hour
+        return super()._state((key[0], key[1], hour), timestamp)
+
+
+@dataclass
+class AnomalyEvent:
+    interface: str
+    metric: str
+    start: float
+    end: Optional[float]
+    score: float
+    value: float
+    baseline: float
+    upload_speed: float
+    download_speed: float
+
+
+class AnomalyEngine:
+    """Détection incrémentale d'anomalies alimentée par l'échantillonneur.
+
+    Un événement s'ouvre lorsque le score atteint `threshold` et se ferme
+    lorsqu'il redescend sous `threshold * close_ratio` (hystérésis). Les
+    événements clos sont conservés dans un journal borné.
+    """
+
+    def __init__(self, detector: Optional[AnomalyDetector] = None, threshold: float = 4.0,
+                 close_ratio: float = 0.5, event_log_size: int = 256, ceiling: Optional[float] = None):
+        self.detector = detector or EwmaDetector()
+        self.threshold = threshold
+        # Débit absolu (octets/s) au-delà duquel un événement s'ouvre quel que soit le score statistique
+        self.ceiling = ceiling
+        self.close_ratio = close_ratio
+        self._open: Dict[Tuple[str, str], AnomalyEvent] = {}
+        self._closed = deque(maxlen=event_log_size)
+        self._lock = threading.Lock()
+        self._events_cache: Optional[List[Dict]] = []
+
+    def observe(self, interface: str, timestamp: float, upload_speed: float, download_speed: float,
+                weight: float = 1.0):
+        """Mettre à jour l'état d'une interface avec un nouvel échantillon"""
+        for metric, value in (('speed_upload', upload_speed), ('speed_download', download_speed)):
+            key = (interface, metric)
+            score, baseline = self.detector.score(key, value, timestamp, weight)
+            if self.ceiling:
+                score = max(score, self.threshold * value / self.ceiling)
+            event = self._open.get(key)
+
+            if event is None:
+                if score >= self.threshold:
+                    with self._lock:
+                        self._open[key] = AnomalyEvent(
+                            interface, metric, timestamp, None, score, value, baseline,
+                            upload_speed, download_speed
+                        )
+                        self._events_cache = None
+            elif score < self.threshold * self.close_ratio:
+                with self._lock:
+                    event.end = timestamp
+                    self._closed.append(self._open.pop(key))
+                    self._events_cache = None
+            elif score > event.score:
+                # Conserver le pic de l'événement en cours
+                with self._lock:
+                    event.score, event.value = score, value
+                    event.upload_speed, event.download_speed = upload_speed, download_speed
+                    self._events_cache = None
+
+    def has_open(self, interface: str) -> bool:
+        """Vrai si un événement est en cours sur l'interface"""
+        return any((interface, metric) in self._open for metric in METRICS)
+
+    def forget(self, interface: str, timestamp: float):
+        """Clore les événements d'une interface disparue et oublier son état"""
+        for metric in METRICS:
+            event = self._open.get((interface, metric))
+            if event is not None:
+                with self._lock:
+                    event.end = timestamp
+                    self._closed.append(self._open.pop((interface, metric)))
+                    self._events_cache = None
+        self.detector.forget(interface)
+
+    def events(self) -> List[Dict]:
+        """Événements en cours puis événements clos, du plus récent au plus ancien"""
+        with self._lock:
+            if self._events_cache is None:
+                ordered = sorted(self._open.values(), key=lambda event: event.start, reverse=True)
+                ordered.extend(reversed(self._closed))
+                self._events_cache = [asdict(event) for event in ordered]
+            return self._events_cache
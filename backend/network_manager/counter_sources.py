@@ -0,0 +1,157 @@
+import os
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import psutil
+
+# Interfaces non significatives ignorées par défaut
+IGNORED_PREFIXES = ('lo', 'docker', 'veth', 'br')
+
+
+class InterfaceCounters(NamedTuple):
+    bytes_sent: int
+    bytes_recv: int
+    packets_sent: int
+    packets_recv: int
+
+
+class CounterSource:
+    """Source de compteurs réseau cumulés par interface"""
+
+    def __init__(self, ignored_prefixes: Iterable[str] = IGNORED_PREFIXES):
+        self.ignored_prefixes = tuple(ignored_prefixes)
+
+    def is_ignored(self, interface: str) -> bool:
+        return interface.startswith(self.ignored_prefixes)
+
+    def read(self) -> Dict[str, InterfaceCounters]:
+        """Lire les compteurs des interfaces retenues"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libérer les ressources de la source"""
+
+
+class ProcNetDevSource(CounterSource):
+    """Lecture directe de /proc/net/dev dans un tampon réutilisé.
+
+    Le fichier est lu sans copie intermédiaire, par appels successifs
+    jusqu'à la fin (procfs renvoie environ une page par lecture) ; seules
+    les interfaces qui passent le filtre voient leurs compteurs décodés.
+    """
+
+    # Colonnes de /proc/net/dev après le nom de l'interface
+    RX_BYTES, RX_PACKETS, TX_BYTES, TX_PACKETS = 0, 1, 8, 9
+
+    def __init__(self, path: str = '/proc/net/dev', ignored_prefixes: Iterable[str] = IGNORED_PREFIXES,
+                 buffer_size: int = 64 * 1024):
+        super().__init__(ignored_prefixes)
+        self.path = path
+        self._ignored = tuple(prefix.encode() for prefix in self.ignored_prefixes)
+        self._buffer = bytearray(buffer_size)
+        self._file = open(path, 'rb', buffering=0)
+
+    def _fill_buffer(self) -> int:
+        """Relire le fichier jusqu'à la fin, en agrandissant le tampon si nécessaire"""
+        self._file.seek(0)
+        size = 0
+        while True:
+            if size == len(self._buffer):
+                self._buffer.extend(bytes(len(self._buffer)))
+            with memoryview(self._buffer) as view:
+                count = self._file.readinto(view[size:])
+            if not count:
+                return size
+            size += count
+
+    def read(self) -> Dict[str, InterfaceCounters]:
+        size = self._fill_buffer()
+        data = self._buffer
+        ignored = self._ignored
+        result = {}
+
+        # Les deux premières lignes sont des en-têtes
+        position = data.find(b'\n', data.find(b'\n', 0, size) + 1, size) + 1
+        while 0 < position < size:
+            end = data.find(b'\n', position, size)
+            if end < 0:
+                end = size
+            colon = data.find(b':', position, end)
+            if colon > 0:
+                name = data[position:colon].strip()
+                if not name.startswith(ignored):
+                    fields = data[colon + 1:end].split()
+                    result[name.decode()] = InterfaceCounters(
+                        bytes_sent=int(fields[self.TX_BYTES]),
+                        bytes_recv=int(fields[self.RX_BYTES]),
+                        packets_sent=int(fields[self.TX_PACKETS]),
+                        packets_recv=int(fields[self.RX_PACKETS])
+                    )
+            position = end + 1
+        return result
+
+    def close(self):
+        self._file.close()
+
+
+class PsutilSource(CounterSource):
+    """Source portable basée sur psutil.net_io_counters"""
+
+    def read(self) -> Dict[str, InterfaceCounters]:
+        result = {}
+        for interface, stats in psutil.net_io_counters(pernic=True).items():
+            if self.is_ignored(interface):
+                continue
+            result[interface] = InterfaceCounters(
+                stats.bytes_sent, stats.bytes_recv, stats.packets_sent, stats.packets_recv
+            )
+        return result
+
+
+class SyntheticSource(CounterSource):
+    """Source synthétique déterministe pour les tests et les benchmarks.
+
+    Chaque lecture fait avancer les compteurs de chaque interface du débit
+    configuré (octets et paquets par lecture).
+    """
+
+    def __init__(self, interface_count: int = 4, prefix: str = 'syn',
+                 bytes_per_read: int = 1024, packets_per_read: int = 10,
+                 ignored_prefixes: Iterable[str] = IGNORED_PREFIXES):
+        super().__init__(ignored_prefixes)
+        names = (f'{prefix}{i}' for i in range(interface_count))
+        self.interfaces = [name for name in names if not self.is_ignored(name)]
+        self._rates = {
+            interface: [bytes_per_read, bytes_per_read, packets_per_read, packets_per_read]
+            for interface in self.interfaces
+        }
+        self._counters = {interface: [0, 0, 0, 0] for interface in self.interfaces}
+
+    def set_rate(self, interface: str, bytes_sent: int, bytes_recv: int,
+                 packets_sent: Optional[int] = None, packets_recv: Optional[int] = None):
+        """Modifier l'incrément par lecture d'une interface (ex. simuler un pic)"""
+        rates = self._rates[interface]
+        rates[0], rates[1] = bytes_sent, bytes_recv
+        if packets_sent is not None:
+            rates[2] = packets_sent
+        if packets_recv is not None:
+            rates[3] = packets_recv
+
+    def reset(self, interface: str):
+        """Remettre à zéro les compteurs d'une interface (ex. redémarrage du pilote)"""
+        self._counters[interface] = [0, 0, 0, 0]
+
+    def read(self) -> Dict[str, InterfaceCounters]:
+        result = {}
+        for interface, counters in self._counters.items():
+            rates = self._rates[interface]
+            for i in range(4):
+                counters[i] += rates[i]
+            result[interface] = InterfaceCounters(*counters)
+        return result
+
+
+def default_counter_source() -> CounterSource:
+    """Choisir la source la plus rapide disponible sur l'hôte"""
+    if os.path.exists('/proc/net/dev'):
+        return ProcNetDevSource()
+    return PsutilSource()
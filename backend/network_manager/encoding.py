@@ -0,0 +1,91 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+JSON = 'application/json'
+# Une liste de valeurs par champ plutôt qu'un objet par ligne : les clés ne sont plus répétées
+COLUMNAR = 'application/vnd.nbm.columnar+json'
+# Même disposition en colonnes, encodée en MessagePack (dépendance optionnelle `msgpack`)
+MSGPACK = 'application/msgpack'
+
+# En deçà, la compression coûte plus qu'elle ne rapporte (une réponse tient dans un paquet)
+MIN_COMPRESS_SIZE = 1400
+# Niveaux choisis pour la vitesse : les corps sont compressés à chaque tick ou à chaque page
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def formats() -> List[str]:
+    """Formats disponibles, JSON par lignes en premier (format par défaut)"""
+    available = [JSON, COLUMNAR]
+    if msgpack is not None:
+        available.append(MSGPACK)
+    return available
+
+
+def encodings() -> List[str]:
+    """Compressions disponibles, par ordre de préférence à qualité égale"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def columns(rows: Sequence[Dict]) -> Dict[str, List]:
+    """Convertir des lignes en colonnes ; un champ absent d'une ligne vaut None"""
+    names: Dict[str, None] = {}
+    for row in rows:
+        for name in row:
+            names.setdefault(name)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def encode(payload: Dict, mimetype: str) -> bytes:
+    if mimetype == MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compresser si le corps est assez grand ; renvoie le corps et la compression appliquée"""
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), encoding
+
+
+class VariantCache:
+    """Dernières représentations encodées, par version et par format.
+
+    Un instantané ne change qu'une fois par tick : chaque combinaison
+    format / compression est encodée une fois puis resservie telle quelle.
+    """
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        self._entries: 'OrderedDict[Hashable, Tuple[bytes, Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Tuple[bytes, Optional[str]]]) -> Tuple[bytes, Optional[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        # Encodage hors verrou : au pire, deux requêtes simultanées encodent la même version
+        entry = build()
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry
@@ -0,0 +1,173 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryScheduler:
+    """Échéancier unique des blocages temporaires.
+
+    Un tas binaire trié par échéance et un seul thread, quel que soit le
+    nombre de blocages actifs. Prolonger un blocage ajoute une nouvelle
+    entrée au tas ; l'ancienne est ignorée lorsqu'elle en sort (suppression
+    paresseuse). Les entrées échues dans le même tick sont expirées en un
+    seul appel du callback. Les échéances en attente (ou l'état fourni par
+    `snapshot`) peuvent être enregistrées dans un fichier JSON pour survivre
+    à un redémarrage, au plus une fois par tick.
+    """
+
+    def __init__(self, callback: Callable[[List[str]], None], tick: float = 0.5,
+                 state_path: Optional[str] = None, clock: Callable[[], float] = time.time,
+                 snapshot: Optional[Callable[[], Dict]] = None):
+        self.callback = callback
+        self.tick = tick
+        self.state_path = state_path
+        self.clock = clock
+        # État enregistré, lu hors du verrou de l'échéancier (défaut : échéances en attente)
+        self.snapshot = snapshot
+        self._pending: Dict[str, float] = {}
+        self._heap = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._dirty = False
+        self._last_persist = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def pending(self) -> Dict[str, float]:
+        with self._condition:
+            return dict(self._pending)
+
+    def load(self) -> Dict[str, float]:
+        """Relire les échéances enregistrées (à reprogrammer par l'appelant)"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding='utf-8') as state_file:
+                entries = {str(key): float(value) for key, value in json.load(state_file).items()}
+        except (OSError, ValueError, AttributeError):
+            logger.exception("Fichier d'échéances illisible : %s", self.state_path)
+            return {}
+        return entries
+
+    def schedule(self, key: str, expires_at: float):
+        """Programmer (ou reprogrammer) l'expiration d'une clé"""
+        self.schedule_many({key: expires_at})
+
+    def schedule_many(self, entries: Dict[str, float]):
+        """Programmer un lot d'expirations sous une seule prise du verrou"""
+        if not entries:
+            return
+        with self._condition:
+            self._pending.update(entries)
+            for key, expires_at in entries.items():
+                heapq.heappush(self._heap, (expires_at, key))
+            if len(self._heap) > 2 * len(self._pending) + 64:
+                # Compacter le tas : retirer les entrées annulées ou remplacées
+                self._heap = [(value, name) for name, value in self._pending.items()]
+                heapq.heapify(self._heap)
+            self._dirty = True
+            self._ensure_thread()
+            self._condition.notify()
+
+    def cancel(self, key: str):
+        """Annuler l'expiration d'une clé (blocage levé ou rendu permanent)"""
+        self.cancel_many([key])
+
+    def cancel_many(self, keys: Iterable[str]):
+        with self._condition:
+            cancelled = [key for key in keys if self._pending.pop(key, None) is not None]
+            if cancelled:
+                self._dirty = True
+                self._condition.notify()
+
+    def mark_dirty(self):
+        """Demander l'enregistrement de l'état au prochain tick"""
+        if not self.state_path:
+            return
+        with self._condition:
+            self._dirty = True
+            self._ensure_thread()
+            self._condition.notify()
+
+    def _ensure_thread(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='ip-expiry', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._persist()
+
+    def _due_keys(self) -> Optional[List[str]]:
+        """Attendre la prochaine échéance et renvoyer toutes les clés échues"""
+        with self._condition:
+            while self._running:
+                now = self.clock()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    expires_at, key = heapq.heappop(self._heap)
+                    if self._pending.get(key) == expires_at:
+                        del self._pending[key]
+                        due.append(key)
+                if due:
+                    self._dirty = True
+                    return due
+
+                timeout = self._heap[0][0] - now if self._heap else None
+                if self._dirty and self.state_path:
+                    # Au plus une écriture du fichier d'état par tick
+                    until_persist = self._last_persist + self.tick - time.monotonic()
+                    if until_persist <= 0:
+                        return []
+                    timeout = until_persist if timeout is None else min(timeout, until_persist)
+                self._condition.wait(timeout)
+        return None
+
+    def _run(self):
+        while True:
+            due = self._due_keys()
+            if due is None:
+                return
+            if due:
+                try:
+                    self.callback(due)
+                except Exception:
+                    logger.exception("Erreur lors de l'expiration de %d blocages", len(due))
+            self._persist()
+
+    def _persist(self):
+        if not self.state_path:
+            self._dirty = False
+            return
+        self._last_persist = time.monotonic()
+        with self._condition:
+            if not self._dirty:
+                return
+            snapshot = dict(self._pending) if self.snapshot is None else None
+            self._dirty = False
+        if snapshot is None:
+            snapshot = self.snapshot()
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            temporary = f'{self.state_path}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as state_file:
+                json.dump(snapshot, state_file)
+            os.replace(temporary, self.state_path)
+        except OSError:
+            logger.exception("Impossible d'enregistrer les échéances dans %s", self.state_path)
@@ -0,0 +1,196 @@
+import ipaddress
+import logging
+import os
+import shutil
+import subprocess
+from typing import Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class FirewallUnavailableError(RuntimeError):
+    """Aucun pare-feu noyau utilisable sur l'hôte"""
+
+
+def _family(address: str) -> int:
+    return ipaddress.ip_network(address, strict=False).version
+
+
+class FirewallBackend:
+    """Backend noyau de la liste de blocage.
+
+    Les adresses sont stockées dans des ensembles (tables de hachage) du
+    noyau, référencés par une seule règle de filtrage : la correspondance
+    d'un paquet ne dépend pas de la taille de la liste, et un ajout ne
+    réécrit aucune chaîne.
+    """
+
+    def setup(self):
+        """Créer les ensembles et la règle de correspondance (idempotent)"""
+
+    def add(self, address: str):
+        raise NotImplementedError
+
+    def remove(self, address: str):
+        raise NotImplementedError
+
+    def list(self) -> Set[str]:
+        raise NotImplementedError
+
+    def apply(self, additions: Iterable[str], removals: Iterable[str]):
+        """Appliquer des ajouts puis des retraits ; les backends noyau le font en une transaction"""
+        for address in additions:
+            self.add(address)
+        for address in removals:
+            self.remove(address)
+
+
+class MemoryBackend(FirewallBackend):
+    """Backend en mémoire, sans privilèges : tests et environnements de développement"""
+
+    def __init__(self):
+        self.entries: Set[str] = set()
+
+    def add(self, address):
+        self.entries.add(address)
+
+    def remove(self, address):
+        self.entries.discard(address)
+
+    def list(self):
+        return set(self.entries)
+
+    def apply(self, additions, removals):
+        self.entries.update(additions)
+        self.entries.difference_update(removals)
+
+
+class CommandBackend(FirewallBackend):
+    """Base des backends pilotés par des commandes système"""
+
+    def _run(self, args: List[str], check: bool = True, input_text: str = None) -> subprocess.CompletedProcess:
+        return subprocess.run(args, check=check, capture_output=True, text=True, input=input_text)
+
+
+class IpsetBackend(CommandBackend):
+    """Ensembles ipset hash:net (un par famille) et une règle iptables par famille"""
+
+    def __init__(self, set_name: str = 'nbm_blocklist', chain: str = 'INPUT'):
+        self.set_names = {4: f'{set_name}4', 6: f'{set_name}6'}
+        self.chain = chain
+
+    def setup(self):
+        for version, name in self.set_names.items():
+            family = 'inet' if version == 4 else 'inet6'
+            self._run(['ipset', 'create', name, 'hash:net', 'family', family, '-exist'])
+            iptables = 'iptables' if version == 4 else 'ip6tables'
+            rule = [self.chain, '-m', 'set', '--match-set', name, 'src', '-j', 'DROP']
+            if self._run([iptables, '-C'] + rule, check=False).returncode != 0:
+                self._run([iptables, '-I'] + rule)
+
+    def add(self, address):
+        self._run(['ipset', 'add', self.set_names[_family(address)], address, '-exist'])
+
+    def remove(self, address):
+        self._run(['ipset', 'del', self.set_names[_family(address)], address, '-exist'])
+
+    def apply(self, additions, removals):
+        """Un seul appel à `ipset restore` pour tout le lot"""
+        lines = [f'add {self.set_names[_family(address)]} {address}' for address in additions]
+        lines.extend(f'del {self.set_names[_family(address)]} {address}' for address in removals)
+        if lines:
+            self._run(['ipset', 'restore', '-exist'], input_text='\n'.join(lines) + '\n')
+
+    def list(self):
+        entries = set()
+        for name in self.set_names.values():
+            output = self._run(['ipset', 'save', name]).stdout
+            for line in output.splitlines():
+                parts = line.split()
+                if len(parts) >= 3 and parts[0] == 'add':
+                    entries.add(parts[2])
+        return entries
+
+
+class NftablesBackend(CommandBackend):
+    """Ensembles nftables nommés (flags interval) dans une table dédiée"""
+
+    def __init__(self, table: str = 'nbm'):
+        self.table = table
+        self.set_names = {4: 'blocklist4', 6: 'blocklist6'}
+
+    def setup(self):
+        self._run(['nft', '-f', '-'], input_text=f"""
+table inet {self.table} {{
+    set blocklist4 {{ type ipv4_addr; flags interval; }}
+    set blocklist6 {{ type ipv6_addr; flags interval; }}
+    chain input {{
+        type filter hook input priority 0; policy accept;
+        ip saddr @blocklist4 drop
+        ip6 saddr @blocklist6 drop
+    }}
+}}
+""")
+
+    def _element(self, command, address, check=True):
+        name = self.set_names[_family(address)]
+        self._run(['nft', command, 'element', 'inet', self.table, name, f'{{ {address} }}'], check=check)
+
+    def add(self, address):
+        self._element('add', address)
+
+    def remove(self, address):
+        # Supprimer un élément absent n'est pas une erreur
+        self._element('delete', address, check=False)
+
+    def apply(self, additions, removals):
+        """Un seul script `nft -f`, appliqué de façon atomique par le noyau"""
+        lines = []
+        for command, addresses in (('add', additions), ('delete', removals)):
+            by_set = {}
+            for address in addresses:
+                by_set.setdefault(self.set_names[_family(address)], []).append(address)
+            for name, elements in by_set.items():
+                lines.append(f"{command} element inet {self.table} {name} {{ {', '.join(elements)} }}")
+        if lines:
+            self._run(['nft', '-f', '-'], input_text='\n'.join(lines) + '\n')
+
+    def list(self):
+        entries = set()
+        for name in self.set_names.values():
+            output = self._run(['nft', 'list', 'set', 'inet', self.table, name]).stdout
+            if 'elements = {' in output:
+                body = output.split('elements = {', 1)[1].split('}', 1)[0]
+                entries.update(item.strip() for item in body.split(',') if item.strip())
+        return entries
+
+
+BACKENDS = {
+    'ipset': IpsetBackend,
+    'nftables': NftablesBackend,
+    'memory': MemoryBackend,
+}
+
+
+def create_backend(name: str = None) -> FirewallBackend:
+    """Instancier un backend par son nom, ou détecter le plus adapté à l'hôte.
+
+    La variable d'environnement NBM_FIREWALL_BACKEND force le choix. Le
+    backend en mémoire, sans effet sur le trafic, n'est jamais choisi par
+    détection : il doit être demandé explicitement (`memory`).
+    """
+    name = name or os.environ.get('NBM_FIREWALL_BACKEND', 'auto')
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f'Backend de pare-feu inconnu : {name}')
+        return BACKENDS[name]()
+
+    if os.geteuid() == 0:
+        if shutil.which('ipset') and shutil.which('iptables'):
+            return IpsetBackend()
+        if shutil.which('nft'):
+            return NftablesBackend()
+    raise FirewallUnavailableError(
+        'Aucun pare-feu utilisable (ipset ou nftables, root requis) ; '
+        'NBM_FIREWALL_BACKEND=memory pour une liste de blocage sans effet sur le noyau'
+    )
@@ -0,0 +1,441 @@
+import logging
+import struct
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.anomaly_detector import AnomalyEngine
+from backend.network_manager.rollups import DAY, RollupEngine
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NBMF'
+VERSION = 1
+
+# Trame d'un agent (little-endian) :
+#   en-tête (voir HEADER) : magic, version, longueur du nom du nœud, séquence, horodatage de base,
+#   nombre d'interfaces ; puis le nom du nœud (UTF-8)
+#   par interface : longueur du nom (1 octet), nom, 4 compteurs cumulés au dernier échantillon,
+#   nombre d'échantillons, puis par échantillon : écart (ms, zigzag) avec l'horodatage précédent,
+#   durée couverte (µs) et les 4 deltas de compteurs
+# Les entiers après l'en-tête sont des varints (LEB128) : un delta d'une seconde tient en 2 à 4 octets.
+HEADER = struct.Struct('<4sBHQdH')
+
+CONTENT_TYPE = 'application/vnd.nbm.frame'
+
+# Séries du collecteur : plus courtes que celles d'un hôte, pour des centaines de nœuds en mémoire
+FLEET_TIERS = [(1, 120), (60, 6 * 3600), (3600, 7 * DAY)]
+
+# Séparateur entre nœud et interface dans les clés des séries et des anomalies
+KEY_SEPARATOR = '/'
+
+# Bornes de l'état du collecteur : nombre de nœuds, interfaces par nœud, silence (s) avant oubli d'un nœud
+MAX_NODES = 2000
+MAX_INTERFACES = 64
+NODE_RETENTION = DAY
+# Délai minimal (s) entre deux recherches de nœuds à oublier
+EVICT_INTERVAL = 60.0
+
+
+class FrameError(ValueError):
+    """Trame illisible ou tronquée"""
+
+
+class FleetLimitError(Exception):
+    """Trame refusée : nombre maximal de nœuds ou d'interfaces atteint"""
+
+
+class FrameInterface(NamedTuple):
+    counters: Tuple[int, int, int, int]
+    # (horodatage, durée couverte, deltas des 4 compteurs)
+    samples: List[Tuple[float, float, Tuple[int, int, int, int]]]
+
+
+class Frame(NamedTuple):
+    node: str
+    sequence: int
+    interfaces: Dict[str, FrameInterface]
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+        if shift > 63:
+            raise FrameError('Varint trop long')
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def encode_frame(node: str, sequence: int, interfaces: Dict[str, FrameInterface]) -> bytes:
+    """Encoder les échantillons d'un nœud dans une trame binaire"""
+    base = min((samples[0][0] for _, samples in interfaces.values() if samples), default=time.time())
+    node_name = node.encode()
+    buffer = bytearray(HEADER.pack(MAGIC, VERSION, len(node_name), sequence, base, len(interfaces)))
+    buffer += node_name
+    for interface, (counters, samples) in interfaces.items():
+        name = interface.encode()
+        buffer.append(len(name))
+        buffer += name
+        for counter in counters:
+            _write_varint(buffer, int(counter))
+        _write_varint(buffer, len(samples))
+        previous = 0
+        for timestamp, elapsed, deltas in samples:
+            offset = round((timestamp - base) * 1000)
+            _write_varint(buffer, _zigzag(offset - previous))
+            previous = offset
+            _write_varint(buffer, max(0, round(elapsed * 1e6)))
+            for delta in deltas:
+                _write_varint(buffer, int(delta))
+    return bytes(buffer)
+
+
+def decode_frame(data: bytes) -> Frame:
+    """Décoder une trame ; lève FrameError si elle est invalide"""
+    try:
+        magic, version, node_length, sequence, base, interface_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise FrameError('Trame inconnue')
+        position = HEADER.size + node_length
+        node = data[HEADER.size:position].decode()
+        interfaces = {}
+        for _ in range(interface_count):
+            name_length = data[position]
+            position += 1
+            name = data[position:position + name_length].decode()
+            position += name_length
+            counters = []
+            for _ in range(4):
+                value, position = _read_varint(data, position)
+                counters.append(value)
+            sample_count, position = _read_varint(data, position)
+            samples = []
+            offset = 0
+            for _ in range(sample_count):
+                step, position = _read_varint(data, position)
+                offset += _unzigzag(step)
+                elapsed, position = _read_varint(data, position)
+                deltas = []
+                for _ in range(4):
+                    value, position = _read_varint(data, position)
+                    deltas.append(value)
+                samples.append((base + offset / 1000, elapsed / 1e6, tuple(deltas)))
+            interfaces[name] = FrameInterface(tuple(counters), samples)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise FrameError(f'Trame tronquée ou invalide : {e}') from e
+    if position != len(data):
+        raise FrameError('Octets inattendus en fin de trame')
+    return Frame(node, sequence, interfaces)
+
+
+def http_sender(url: str, token: Optional[str] = None, timeout: float = 5.0) -> Callable[[bytes], None]:
+    """Envoi des trames par POST HTTP vers le collecteur (/api/fleet/ingest)"""
+    headers = {'Content-Type': CONTENT_TYPE}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    def send(frame: bytes):
+        request = urllib.request.Request(url, data=frame, headers=headers, method='POST')
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+
+    return send
+
+
+class FleetAgent:
+    """Consommateur du monitor (voir `sinks`) qui pousse les échantillons vers le collecteur.
+
+    `submit` calcule les deltas de compteurs de chaque interface et les
+    dépose dans une file bornée sans bloquer ; un thread les regroupe toutes
+    les `flush_interval` secondes dans une trame binaire. Une trame en échec
+    est réessayée avec un délai croissant, puis abandonnée : le collecteur
+    repère la trame manquante grâce au numéro de séquence.
+    """
+
+    def __init__(self, node: str, send: Callable[[bytes], None], flush_interval: float = 5.0,
+                 queue_size: int = 100000, max_retries: int = 3, retry_delay: float = 0.5):
+        self.node = node
+        self._send = send
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sequence = 0
+        self.sent_frames = 0
+        self.dropped_samples = 0
+        # Interface -> (horodatage, compteurs) du dernier échantillon reçu
+        self._last: Dict[str, Tuple[float, Tuple[int, int, int, int]]] = {}
+        self._queue = deque(maxlen=queue_size)
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def submit(self, timestamp: float, stats: Iterable) -> None:
+        """Déposer les échantillons d'un tick (jamais bloquant)"""
+        if not self._running:
+            self.start()
+        rows = []
+        for stat in stats:
+            counters = (stat.bytes_sent, stat.bytes_recv, stat.packets_sent, stat.packets_recv)
+            previous = self._last.get(stat.interface)
+            self._last[stat.interface] = (timestamp, counters)
+            if previous is None:
+                rows.append((stat.interface, counters, None))
+                continue
+            deltas = tuple(AdvancedNetworkMonitor._counter_delta(current, last)
+                           for current, last in zip(counters, previous[1]))
+            rows.append((stat.interface, counters, (timestamp, timestamp - previous[0], deltas)))
+        with self._condition:
+            overflow = len(self._queue) + len(rows) - self._queue.maxlen
+            if overflow > 0:
+                self.dropped_samples += overflow
+            self._queue.extend(rows)
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='fleet-agent', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Envoyer les échantillons restants puis arrêter le thread"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._running:
+                    self._condition.wait(self.flush_interval)
+                running = self._running
+            self.flush()
+            if not running:
+                return
+
+    def flush(self) -> Optional[bytes]:
+        """Regrouper la file dans une trame et l'envoyer ; renvoie la trame (None si la file est vide)"""
+        with self._condition:
+            rows = list(self._queue)
+            self._queue.clear()
+        if not rows:
+            return None
+        interfaces: Dict[str, FrameInterface] = {}
+        for interface, counters, sample in rows:
+            entry = interfaces.get(interface)
+            samples = entry.samples if entry is not None else []
+            if sample is not None:
+                samples.append(sample)
+            interfaces[interface] = FrameInterface(counters, samples)
+        self.sequence += 1
+        frame = encode_frame(self.node, self.sequence, interfaces)
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._send(frame)
+                self.sent_frames += 1
+                return frame
+            except Exception:
+                logger.exception("Échec de l'envoi de la trame %d au collecteur (tentative %d)",
+                                 self.sequence, attempt + 1)
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay * (2 ** attempt))
+        self.dropped_samples += sum(len(entry.samples) for entry in interfaces.values())
+        return frame
+
+
+class NodeState:
+    __slots__ = ('last_seen', 'sequence', 'lost_frames', 'interfaces')
+
+    def __init__(self):
+        self.last_seen = 0.0
+        self.sequence = 0
+        self.lost_frames = 0
+        self.interfaces: Dict[str, Dict] = {}
+
+
+class FleetAggregator:
+    """Fusion des trames des agents en séries par nœud et par interface.
+
+    Les débits sont recalculés à partir des deltas et de la durée couverte
+    par chaque échantillon ; la détection d'anomalies tourne ici, une fois
+    pour toute la flotte, plutôt que sur chaque agent.
+
+    L'état est borné : au plus `max_nodes` nœuds de `max_interfaces`
+    interfaces, et un nœud muet depuis `retention` secondes est oublié avec
+    ses séries et son état de détection.
+    """
+
+    def __init__(self, anomaly_engine: Optional[AnomalyEngine] = None, stale_after: float = 30.0,
+                 tiers: Optional[List[Tuple[int, int]]] = None, nominal_interval: float = 1.0,
+                 max_nodes: int = MAX_NODES, max_interfaces: int = MAX_INTERFACES,
+                 retention: float = NODE_RETENTION):
+        self.anomaly_engine = anomaly_engine or AnomalyEngine()
+        self.rollups = RollupEngine(tiers=tiers or FLEET_TIERS)
+        # Nœud considéré comme muet sans trame depuis `stale_after` secondes
+        self.stale_after = stale_after
+        # Intervalle nominal des agents : poids d'un échantillon pour la détection d'anomalies
+        self.nominal_interval = nominal_interval
+        self.max_nodes = max_nodes
+        self.max_interfaces = max_interfaces
+        self.retention = retention
+        self._nodes: Dict[str, NodeState] = {}
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+
+    def _forget_node(self, name: str, state: NodeState, timestamp: float):
+        """Oublier un nœud, ses séries et son état de détection (verrou tenu)"""
+        del self._nodes[name]
+        for interface in state.interfaces:
+            key = f'{name}{KEY_SEPARATOR}{interface}'
+            self.rollups.forget(key)
+            self.anomaly_engine.forget(key, timestamp)
+
+    def evict(self, now: Optional[float] = None) -> List[str]:
+        """Oublier les nœuds muets depuis plus de `retention` secondes ; renvoie leurs noms"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._evict(now)
+
+    def _evict(self, now: float) -> List[str]:
+        self._last_evict = now
+        expired = [(name, state) for name, state in self._nodes.items() if now - state.last_seen > self.retention]
+        for name, state in expired:
+            self._forget_node(name, state, now)
+        if expired:
+            logger.info("%d nœud(s) muet(s) oublié(s)", len(expired))
+        return [name for name, _ in expired]
+
+    def ingest(self, data: bytes, received: Optional[float] = None) -> int:
+        """Fusionner une trame ; renvoie le nombre d'échantillons reçus.
+
+        Lève FrameError si la trame est illisible, FleetLimitError si elle
+        dépasse les bornes du collecteur (rien n'est alors modifié).
+        """
+        frame = decode_frame(data)
+        received = time.time() if received is None else received
+        count = 0
+        with self._lock:
+            if received - self._last_evict >= EVICT_INTERVAL:
+                self._evict(received)
+            node = self._nodes.get(frame.node)
+            interfaces = frame.interfaces.keys() if node is None else node.interfaces.keys() | frame.interfaces.keys()
+            if len(interfaces) > self.max_interfaces:
+                raise FleetLimitError(f"Plus de {self.max_interfaces} interfaces pour le nœud {frame.node}")
+            if node is None:
+                if len(self._nodes) >= self.max_nodes and not self._evict(received):
+                    raise FleetLimitError(f'Nombre maximal de nœuds atteint ({self.max_nodes})')
+                node = self._nodes[frame.node] = NodeState()
+            elif frame.sequence > node.sequence + 1:
+                node.lost_frames += frame.sequence - node.sequence - 1
+            # Une séquence qui recule signale un redémarrage de l'agent
+            node.sequence = frame.sequence
+            node.last_seen = received
+            for interface, (counters, samples) in frame.interfaces.items():
+                key = f'{frame.node}{KEY_SEPARATOR}{interface}'
+                stats = node.interfaces.get(interface)
+                if stats is None:
+                    stats = node.interfaces[interface] = {
+                        'node': frame.node, 'interface': interface, 'speed_upload': 0.0, 'speed_download': 0.0,
+                        'timestamp': None
+                    }
+                stats['bytes_sent'], stats['bytes_recv'], stats['packets_sent'], stats['packets_recv'] = counters
+                for timestamp, elapsed, deltas in samples:
+                    self.rollups.add(key, timestamp, elapsed, deltas)
+                    upload = deltas[0] / elapsed if elapsed > 0 else 0.0
+                    download = deltas[1] / elapsed if elapsed > 0 else 0.0
+                    self.anomaly_engine.observe(key, timestamp, upload, download, elapsed / self.nominal_interval)
+                    stats['speed_upload'], stats['speed_download'], stats['timestamp'] = upload, download, timestamp
+                count += len(samples)
+        return count
+
+    def _selected(self, node: Optional[str]) -> List[Tuple[str, NodeState]]:
+        if node is not None:
+            state = self._nodes.get(node)
+            return [(node, state)] if state is not None else []
+        return sorted(self._nodes.items())
+
+    def stats(self, node: Optional[str] = None) -> List[Dict]:
+        """Dernières statistiques de chaque interface (d'un nœud, ou de toute la flotte)"""
+        with self._lock:
+            return [dict(stats) for _, state in self._selected(node) for stats in state.interfaces.values()]
+
+    def nodes(self, now: Optional[float] = None) -> List[Dict]:
+        """Résumé par nœud : dernière trame, débits cumulés des interfaces, trames perdues"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [{
+                'node': name,
+                'last_seen': state.last_seen,
+                'stale': now - state.last_seen > self.stale_after,
+                'interfaces': len(state.interfaces),
+                'speed_upload': sum(stats['speed_upload'] for stats in state.interfaces.values()),
+                'speed_download': sum(stats['speed_download'] for stats in state.interfaces.values()),
+                'lost_frames': state.lost_frames,
+            } for name, state in self._selected(None)]
+
+    def summary(self, now: Optional[float] = None) -> Dict:
+        """Totaux de la flotte ; les nœuds muets sont exclus des débits"""
+        nodes = self.nodes(now)
+        active = [node for node in nodes if not node['stale']]
+        return {
+            'nodes': len(nodes),
+            'stale_nodes': len(nodes) - len(active),
+            'interfaces': sum(node['interfaces'] for node in nodes),
+            'speed_upload': sum(node['speed_upload'] for node in active),
+            'speed_download': sum(node['speed_download'] for node in active),
+        }
+
+    def anomalies(self, node: Optional[str] = None) -> List[Dict]:
+        """Anomalies de la flotte (ou d'un nœud), avec le nœud et l'interface séparés"""
+        events = []
+        for event in self.anomaly_engine.events():
+            name, _, interface = event['interface'].rpartition(KEY_SEPARATOR)
+            if node is None or name == node:
+                events.append(dict(event, node=name, interface=interface))
+        return events
+
+    def history(self, node: str, interface: Optional[str] = None, since: Optional[float] = None,
+                step: Optional[float] = None) -> List[Dict]:
+        """Historique agrégé des interfaces d'un nœud"""
+        with self._lock:
+            state = self._nodes.get(node)
+            interfaces = list(state.interfaces) if state is not None else []
+        if interface is not None:
+            interfaces = [interface] if interface in interfaces else []
+        result = []
+        for name in interfaces:
+            for entry in self.rollups.query(f'{node}{KEY_SEPARATOR}{name}', since, step):
+                entry.update(node=node, interface=name)
+                result.append(entry)
+        return result
@@ -0,0 +1,386 @@
+import heapq
+import ipaddress
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+from backend.network_manager.scheduler import SamplingScheduler
+
+logger = logging.getLogger(__name__)
+
+# Octets échangés depuis la lecture précédente : (interface ou None, source, destination, octets)
+FlowDelta = Tuple[Optional[str], str, str, int]
+
+
+class FlowSource:
+    """Source de volumes par couple d'adresses, en deltas depuis la lecture précédente"""
+
+    def read(self) -> Iterable[FlowDelta]:
+        raise NotImplementedError
+
+    def close(self):
+        """Libérer les ressources de la source"""
+
+
+class InterfaceResolver:
+    """Associer une adresse locale à l'interface dont elle fait partie du réseau"""
+
+    def __init__(self, networks: Optional[Dict[str, List[str]]] = None):
+        if networks is None:
+            networks = {}
+            for interface, addresses in psutil.net_if_addrs().items():
+                for address in addresses:
+                    if address.family in (socket.AF_INET, socket.AF_INET6) and address.netmask:
+                        # Masque IPv6 donné sous forme d'adresse : le convertir en longueur
+                        length = bin(int(ipaddress.ip_address(address.netmask.split('/')[0]))).count('1')
+                        networks.setdefault(interface, []).append(f"{address.address.split('%')[0]}/{length}")
+        self._networks = [
+            (ipaddress.ip_network(network, strict=False), interface)
+            for interface, entries in networks.items() for network in entries
+        ]
+        # Préfixes les plus précis d'abord
+        self._networks.sort(key=lambda item: -item[0].prefixlen)
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+
+    def _resolve(self, address: str) -> Optional[str]:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+        for network, interface in self._networks:
+            if ip.version == network.version and ip in network:
+                return interface
+        return None
+
+
+class ConntrackSource(FlowSource):
+    """Compteurs par connexion de /proc/net/nf_conntrack (nf_conntrack_acct=1 requis).
+
+    Le fichier donne des compteurs cumulés : seuls les compteurs de la lecture
+    précédente sont conservés pour en déduire les deltas, sous une clé
+    compacte (empreinte de la connexion) et pour au plus `max_connections`
+    connexions ; au-delà, les connexions supplémentaires sont ignorées. Après
+    une lecture tronquée, une connexion absente de la lecture précédente a pu
+    être ignorée sans être nouvelle : elle ne sert que de référence, au lieu
+    de compter tout son volume cumulé. Le fichier est lu ligne à ligne. La
+    première lecture sert de référence. Un
+    fichier de fixture au même format permet de tester sans privilèges.
+    """
+
+    def __init__(self, path: str = '/proc/net/nf_conntrack', resolver: Optional[InterfaceResolver] = None,
+                 max_connections: int = 262144):
+        self.path = path
+        self.resolver = resolver or InterfaceResolver()
+        self.max_connections = max_connections
+        # Vrai si la dernière lecture a dépassé `max_connections`
+        self.truncated = False
+        # Empreinte de la connexion -> (octets aller, octets retour) à la lecture précédente
+        self._previous: Optional[Dict[int, Tuple[int, int]]] = None
+
+    @staticmethod
+    def parse_line(line: str) -> Optional[Tuple[str, str, str, int, str, str, int]]:
+        """(clé, source, destination, octets aller, source retour, destination retour, octets retour)"""
+        fields = line.split()
+        directions = []
+        current = None
+        key_parts = fields[2:3]
+        for field in fields:
+            name, separator, value = field.partition('=')
+            if not separator:
+                continue
+            if name == 'src':
+                current = {'src': value}
+                directions.append(current)
+            elif current is not None:
+                current[name] = value
+            if len(directions) == 1 and name in ('src', 'dst', 'sport', 'dport', 'type', 'id'):
+                key_parts.append(value)
+        if len(directions) != 2 or 'bytes' not in directions[0] or 'bytes' not in directions[1]:
+            return None
+        original, reply = directions
+        return (' '.join(key_parts), original['src'], original['dst'], int(original['bytes']),
+                reply['src'], reply['dst'], int(reply['bytes']))
+
+    def read(self) -> List[FlowDelta]:
+        current: Dict[int, Tuple[int, int]] = {}
+        deltas: List[FlowDelta] = []
+        previous = self._previous
+        # Lecture précédente tronquée : une connexion inconnue n'est pas forcément nouvelle
+        unknown_is_new = not self.truncated
+        resolve = self.resolver.resolve
+        skipped = 0
+        try:
+            with open(self.path, encoding='ascii', errors='replace') as conntrack:
+                for line in conntrack:
+                    if len(current) >= self.max_connections:
+                        skipped += 1
+                        continue
+                    parsed = self.parse_line(line)
+                    if parsed is None:
+                        continue
+                    key, src, dst, sent, reply_src, reply_dst, received = parsed
+                    key = hash(key)
+                    current[key] = (sent, received)
+                    if previous is None:
+                        continue
+                    before = previous.get(key)
+                    if before is None:
+                        if not unknown_is_new:
+                            continue
+                        # Connexion nouvelle depuis la lecture précédente : tout son volume est récent
+                        before = (0, 0)
+                    before_sent, before_received = before
+                    sent_delta = sent - before_sent if sent >= before_sent else sent
+                    received_delta = received - before_received if received >= before_received else received
+                    if not (sent_delta or received_delta):
+                        continue
+                    interface = resolve(src) or resolve(dst) or resolve(reply_dst)
+                    if sent_delta:
+                        deltas.append((interface, src, dst, sent_delta))
+                    if received_delta:
+                        deltas.append((interface, reply_src, reply_dst, received_delta))
+        except OSError:
+            logger.exception("Lecture impossible de %s", self.path)
+            return []
+        if skipped and not self.truncated:
+            # Signalé une fois, tant que la table dépasse la limite
+            logger.warning("Table conntrack tronquée : %d ligne(s) au-delà de %d connexions", skipped,
+                           self.max_connections)
+        self.truncated = bool(skipped)
+        self._previous = current
+        return deltas
+
+
+class PacketSocketSource(FlowSource):
+    """Capture AF_PACKET d'une interface (root requis) : volumes par couple d'adresses.
+
+    Les en-têtes Ethernet / IPv4 / IPv6 sont décodés directement ; une
+    lecture vide la file de réception du socket, dans la limite de
+    `max_packets` paquets.
+    """
+
+    ETH_P_ALL = 0x0003
+
+    def __init__(self, interface: str, max_packets: int = 200000, snaplen: int = 128):
+        self.interface = interface
+        self.max_packets = max_packets
+        self._socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(self.ETH_P_ALL))
+        self._socket.bind((interface, 0))
+        self._socket.setblocking(False)
+        self._buffer = bytearray(snaplen)
+
+    def read(self) -> List[FlowDelta]:
+        volumes: Dict[Tuple[bytes, bytes], int] = {}
+        view = memoryview(self._buffer)
+        for _ in range(self.max_packets):
+            try:
+                captured, _ = self._socket.recvfrom_into(view, len(self._buffer), socket.MSG_TRUNC)
+            except BlockingIOError:
+                break
+            header = self._parse(view, min(captured, len(self._buffer)))
+            if header is not None:
+                pair, length = header
+                volumes[pair] = volumes.get(pair, 0) + length
+        return [
+            (self.interface, socket.inet_ntop(_family(src), src), socket.inet_ntop(_family(dst), dst), length)
+            for (src, dst), length in volumes.items()
+        ]
+
+    @staticmethod
+    def _parse(packet: memoryview, size: int) -> Optional[Tuple[Tuple[bytes, bytes], int]]:
+        offset = 12
+        if size < offset + 2:
+            return None
+        ethertype = int.from_bytes(packet[offset:offset + 2], 'big')
+        while ethertype in (0x8100, 0x88A8) and size >= offset + 6:
+            # Étiquettes VLAN
+            offset += 4
+            ethertype = int.from_bytes(packet[offset:offset + 2], 'big')
+        ip = offset + 2
+        if ethertype == 0x0800 and size >= ip + 20:
+            length = int.from_bytes(packet[ip + 2:ip + 4], 'big')
+            return (bytes(packet[ip + 12:ip + 16]), bytes(packet[ip + 16:ip + 20])), length
+        if ethertype == 0x86DD and size >= ip + 40:
+            length = int.from_bytes(packet[ip + 4:ip + 6], 'big') + 40
+            return (bytes(packet[ip + 8:ip + 24]), bytes(packet[ip + 24:ip + 40])), length
+        return None
+
+    def close(self):
+        self._socket.close()
+
+
+def _family(packed: bytes) -> int:
+    return socket.AF_INET if len(packed) == 4 else socket.AF_INET6
+
+
+def default_flow_source() -> Optional[FlowSource]:
+    """Conntrack si le fichier est lisible, sinon aucune comptabilité par IP"""
+    path = '/proc/net/nf_conntrack'
+    if os.access(path, os.R_OK):
+        try:
+            with open('/proc/sys/net/netfilter/nf_conntrack_acct') as acct:
+                if acct.read().strip() == '0':
+                    logger.warning("nf_conntrack_acct=0 : activer la comptabilité conntrack "
+                                   "(sysctl net.netfilter.nf_conntrack_acct=1)")
+        except OSError:
+            pass
+        return ConntrackSource(path)
+    logger.warning("%s illisible : comptabilité par IP désactivée", path)
+    return None
+
+
+class SpaceSaving:
+    """Sketch Space-Saving : les `capacity` clés les plus lourdes en mémoire bornée.
+
+    Une clé inconnue remplace la clé de plus petit compteur, dont elle hérite
+    le compteur comme erreur maximale : un compte n'est jamais sous-estimé, et
+    toute clé de poids supérieur à total / capacity est retenue.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.total = 0
+        # Clé -> [compteur, erreur]
+        self._counters: Dict[str, List[int]] = {}
+        # Tas (compteur, clé) à suppression paresseuse pour trouver le minimum
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self):
+        return len(self._counters)
+
+    def add(self, key: str, weight: int = 1):
+        self.total += weight
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self._counters) < self.capacity:
+            counter = self._counters[key] = [weight, 0]
+        else:
+            minimum, evicted = self._pop_minimum()
+            del self._counters[evicted]
+            counter = self._counters[key] = [minimum + weight, minimum]
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value[0], name) for name, value in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_minimum(self) -> Tuple[int, str]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+    def merge(self, other: 'SpaceSaving'):
+        for key, (count, error) in other._counters.items():
+            self.add(key, count)
+            self._counters[key][1] += error
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """Les k clés les plus lourdes : (clé, compteur, erreur maximale)"""
+        ranked = heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0])
+        return [(key, count, error) for key, (count, error) in ranked]
+
+
+class TopTalkers:
+    """Sources et destinations les plus actives, par interface et par fenêtre glissante.
+
+    Le temps est découpé en tranches de `slot` secondes ; chaque tranche a
+    son sketch par interface et par sens. Une requête fusionne les tranches
+    couvertes par la fenêtre : la mémoire ne dépend que de la capacité des
+    sketches et du nombre de tranches conservées, pas du nombre de flux.
+    """
+
+    ALL = '*'
+
+    def __init__(self, capacity: int = 256, slot: int = 10, max_window: int = 3600,
+                 clock=time.time):
+        self.capacity = capacity
+        self.slot = slot
+        self.max_window = max_window
+        self.clock = clock
+        self._slots: deque = deque(maxlen=max(1, math.ceil(max_window / slot)))
+        self._lock = threading.Lock()
+
+    def _current_slot(self, now: float) -> Dict[Tuple[str, str], SpaceSaving]:
+        start = now // self.slot * self.slot
+        if not self._slots or self._slots[-1][0] != start:
+            self._slots.append((start, {}))
+        return self._slots[-1][1]
+
+    def add(self, deltas: Iterable[FlowDelta]):
+        with self._lock:
+            sketches = self._current_slot(self.clock())
+            for interface, src, dst, length in deltas:
+                for scope in ((self.ALL, interface) if interface else (self.ALL,)):
+                    for direction, address in (('sources', src), ('destinations', dst)):
+                        sketch = sketches.get((scope, direction))
+                        if sketch is None:
+                            sketch = sketches[(scope, direction)] = SpaceSaving(self.capacity)
+                        sketch.add(address, length)
+
+    def interfaces(self) -> List[str]:
+        with self._lock:
+            return sorted({scope for _, sketches in self._slots for scope, _ in sketches} - {self.ALL})
+
+    def top(self, interface: Optional[str] = None, window: float = 60, k: int = 10) -> Dict:
+        """Top-k des sources et destinations (octets) sur les `window` dernières secondes"""
+        window = min(max(window, self.slot), self.max_window)
+        scope = interface or self.ALL
+        since = self.clock() - window
+        result = {'interface': interface, 'window': window}
+        with self._lock:
+            slots = [sketches for start, sketches in self._slots if start + self.slot > since]
+            for direction in ('sources', 'destinations'):
+                merged = SpaceSaving(self.capacity)
+                for sketches in slots:
+                    sketch = sketches.get((scope, direction))
+                    if sketch is not None:
+                        merged.merge(sketch)
+                result[direction] = [
+                    {'ip': address, 'bytes': count, 'error': error}
+                    for address, count, error in merged.top(k)
+                ]
+                result[f'{direction}_total'] = merged.total
+        return result
+
+
+class FlowMonitor:
+    """Comptabilité périodique des flux : lit la source et alimente les top-talkers"""
+
+    def __init__(self, source: Optional[FlowSource] = None, interval: float = 2.0,
+                 scheduler: Optional[SamplingScheduler] = None, top_talkers: Optional[TopTalkers] = None):
+        self.source = source
+        self.interval = interval
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or SamplingScheduler()
+        self.top_talkers = top_talkers or TopTalkers()
+        self._job = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.source is not None
+
+    def collect(self):
+        self.top_talkers.add(self.source.read())
+
+    def start(self):
+        if self.enabled and self._job is None:
+            self._job = self.scheduler.add_job(self.collect, self.interval)
+            self.scheduler.start()
+
+    def stop(self):
+        if self._job is not None:
+            self.scheduler.remove_job(self._job)
+            self._job = None
+            if self._owns_scheduler:
+                self.scheduler.stop()
+            self.source.close()
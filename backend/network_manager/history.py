@@ -0,0 +1,128 @@
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Champs stockés pour chaque échantillon, dans l'ordre des colonnes
+HISTORY_FIELDS = (
+    'timestamp',
+    'speed_upload',
+    'speed_download',
+    'packets_sent_rate',
+    'packets_recv_rate',
+)
+
+
+class InterfaceHistory:
+    """Tampon circulaire de taille fixe pour l'historique d'une interface.
+
+    Les colonnes sont des tableaux typés pré-alloués : l'ajout d'un
+    échantillon écrit en place et n'alloue aucun objet.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("La capacité de l'historique doit être positive")
+        self.capacity = capacity
+        self._columns = [array('d', bytes(8 * capacity)) for _ in HISTORY_FIELDS]
+        self._head = 0  # Prochain index d'écriture
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, speed_upload, speed_download, packets_sent_rate, packets_recv_rate):
+        """Ajouter un échantillon en écrasant le plus ancien si le tampon est plein"""
+        with self._lock:
+            i = self._head
+            ts, up, down, pkt_sent, pkt_recv = self._columns
+            ts[i] = timestamp
+            up[i] = speed_upload
+            down[i] = speed_download
+            pkt_sent[i] = packets_sent_rate
+            pkt_recv[i] = packets_recv_rate
+            self._head = (i + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def _ordered(self, column):
+        """Copier une colonne dans l'ordre chronologique"""
+        start = (self._head - self._count) % self.capacity
+        end = start + self._count
+        if end <= self.capacity:
+            return column[start:end]
+        return column[start:] + column[:end - self.capacity]
+
+    def window(self, since: Optional[float] = None, step: Optional[float] = None) -> Dict[str, List[float]]:
+        """Extraire une fenêtre de l'historique sous forme de colonnes.
+
+        `since` filtre les échantillons antérieurs à un horodatage, `step`
+        regroupe les échantillons par intervalles de `step` secondes (moyenne).
+        """
+        with self._lock:
+            columns = [self._ordered(column) for column in self._columns]
+
+        if since is not None:
+            first = bisect_left(columns[0], since)
+            columns = [column[first:] for column in columns]
+
+        if step:
+            columns = _downsample(columns, step)
+
+        return {field: column.tolist() for field, column in zip(HISTORY_FIELDS, columns)}
+
+
+def _downsample(columns, step):
+    """Moyenner les échantillons par intervalles de `step` secondes"""
+    timestamps = columns[0]
+    result = [array('d') for _ in columns]
+    bucket_start = 0
+    for i in range(1, len(timestamps) + 1):
+        if i < len(timestamps) and timestamps[i] // step == timestamps[bucket_start] // step:
+            continue
+        size = i - bucket_start
+        result[0].append((timestamps[bucket_start] // step) * step)
+        for source, target in zip(columns[1:], result[1:]):
+            target.append(sum(source[bucket_start:i]) / size)
+        bucket_start = i
+    return result
+
+
+class NetworkHistory:
+    """Historique borné de toutes les interfaces surveillées"""
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self._buffers: Dict[str, InterfaceHistory] = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, interface: str) -> InterfaceHistory:
+        """Récupérer (ou créer) le tampon d'une interface"""
+        history = self._buffers.get(interface)
+        if history is None:
+            with self._lock:
+                history = self._buffers.setdefault(interface, InterfaceHistory(self.capacity))
+        return history
+
+    def interfaces(self) -> List[str]:
+        return list(self._buffers)
+
+    def forget(self, interface: str):
+        """Libérer le tampon d'une interface disparue"""
+        with self._lock:
+            self._buffers.pop(interface, None)
+
+    def query(self, interface: Optional[str] = None, since: Optional[float] = None,
+              step: Optional[float] = None) -> List[Dict]:
+        """Extraire l'historique d'une interface ou de toutes les interfaces"""
+        names = [interface] if interface else self.interfaces()
+        result = []
+        for name in names:
+            history = self._buffers.get(name)
+            if history is None:
+                continue
+            entry = {'interface': name}
+            entry.update(history.window(since, step))
+            result.append(entry)
+        return result
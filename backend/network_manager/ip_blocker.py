@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.network_manager.expiry import ExpiryScheduler
+from backend.network_manager.firewall import FirewallBackend, create_backend
+from backend.network_manager.prefix_trie import PrefixTrie, format_prefix, parse_prefix
+
+logger = logging.getLogger(__name__)
+
+KERNEL_ERRORS = (OSError, subprocess.CalledProcessError)
+# Format du fichier d'état (entrées demandées et échéances)
+STATE_VERSION = 1
+# Entrées indexées par prise du verrou de lecture : un grand lot ne bloque pas les recherches
+UPDATE_CHUNK = 1024
+
+
+class BatchValidationError(ValueError):
+    """Lot rejeté avant toute modification : `errors` détaille les entrées invalides"""
+
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f'{len(errors)} entrée(s) invalide(s)')
+        self.errors = errors
+
+
+class IPBlocker:
+    """Blocage d'adresses IP et de plages CIDR via un ensemble noyau (ipset / nftables).
+
+    Les entrées demandées sont indexées dans un arbre radix ; un second arbre
+    en maintient l'union minimale (préfixes couverts absorbés, frères
+    fusionnés), seule répercutée dans le noyau.
+
+    Les entrées demandées et leurs échéances sont enregistrées dans
+    `state_path` : au redémarrage, elles sont reconstruites depuis ce
+    fichier et l'ensemble noyau est réaligné sur elles. Sans état
+    enregistré, les entrées du noyau sont reprises comme blocages permanents.
+
+    Les modifications sont sérialisées par un verrou d'écriture ; les index
+    sont modifiés par tranches sous le verrou de lecture, relâché entre deux
+    tranches et pendant la transaction noyau. Une recherche concurrente
+    d'un grand lot peut donc en voir une partie avant sa fin.
+    """
+
+    def __init__(self, backend: Optional[FirewallBackend] = None, state_path: Optional[str] = None,
+                 expiry_tick: float = 0.5):
+        self.backend = backend or create_backend()
+        self.backend.setup()
+        # Lecture : index cohérents entre deux tranches ; écriture : une seule modification à la fois
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Entrée demandée -> horodatage d'expiration (None : blocage permanent)
+        self._blocked: Dict[str, Optional[float]] = {}
+        self._requested = PrefixTrie()
+        self._effective = PrefixTrie(aggregate=True)
+        self._needs_resync = True
+        # Un seul échéancier (et un seul thread) pour tous les blocages temporaires ; il enregistre aussi l'état
+        self.expiry = ExpiryScheduler(self._expire, tick=expiry_tick, state_path=state_path, snapshot=self._state)
+        self._restore(state_path)
+
+    def _state(self) -> Dict:
+        with self._lock:
+            return {'version': STATE_VERSION, 'entries': dict(self._blocked)}
+
+    @staticmethod
+    def _load_state(path: Optional[str]) -> Tuple[Optional[Dict], Dict[str, float]]:
+        """(entrées enregistrées ou None, échéances d'un fichier d'une version précédente)"""
+        if not path or not os.path.exists(path):
+            return None, {}
+        try:
+            with open(path, encoding='utf-8') as state_file:
+                state = json.load(state_file)
+            if isinstance(state, dict) and 'version' in state:
+                return {str(entry): None if expires_at is None else float(expires_at)
+                        for entry, expires_at in state['entries'].items()}, {}
+            # Ancien format : échéances seules, blocages permanents uniquement dans le noyau
+            return None, {str(entry): float(expires_at) for entry, expires_at in state.items()}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            logger.exception("État de la liste de blocage illisible : %s", path)
+            return None, {}
+
+    def _restore(self, path: Optional[str]):
+        """Reconstruire l'index depuis l'état enregistré, puis aligner l'ensemble noyau sur lui"""
+        saved, legacy_expiries = self._load_state(path)
+        entries: Dict[str, Optional[float]] = {}
+        if saved is None:
+            for entry in self.backend.list():
+                entries[entry] = None
+            entries.update(legacy_expiries)
+        else:
+            entries = saved
+        valid = {}
+        for entry, expires_at in entries.items():
+            try:
+                valid[self.normalize(entry)] = expires_at
+            except ValueError:
+                logger.warning("Entrée ignorée : %s", entry)
+        with self._write_lock:
+            self._add_entries(valid)
+            # Entrées noyau absentes de l'état retirées, préfixes manquants rétablis
+            if not self._apply_changes():
+                logger.error("Échec de l'alignement de l'ensemble noyau sur %d entrée(s)", len(self._blocked))
+            # Les échéances déjà dépassées expirent au premier tick
+            self.expiry.schedule_many({
+                entry: expires_at for entry, expires_at in self._blocked.items() if expires_at is not None
+            })
+        if saved is None:
+            self.expiry.mark_dirty()
+
+    @staticmethod
+    def normalize(ip_address: str) -> str:
+        """Valider une adresse IP ou un CIDR ; lève ValueError s'il est invalide"""
+        return format_prefix(parse_prefix(ip_address))
+
+    # Index des préfixes
+
+    def _chunks(self, entries: Iterable):
+        """Tranches d'entrées à modifier, chacune sous le verrou de lecture"""
+        entries = list(entries)
+        for start in range(0, len(entries), UPDATE_CHUNK):
+            with self._lock:
+                yield entries[start:start + UPDATE_CHUNK]
+
+    def _add_entries(self, entries: Dict[str, Optional[float]]):
+        """Indexer des entrées (verrou d'écriture tenu) ; une entrée déjà bloquée ne change que d'échéance"""
+        new = sorted((parse_prefix(entry), entry) for entry in entries if entry not in self._blocked)
+        for chunk in self._chunks(entries.items()):
+            for entry, expires_at in chunk:
+                if entry in self._blocked:
+                    self._blocked[entry] = expires_at
+        # Préfixes triés : les frères se suivent et sont fusionnés aussitôt
+        for chunk in self._chunks(new):
+            for prefix, entry in chunk:
+                self._blocked[entry] = entries[entry]
+                self._requested.insert(prefix)
+                self._effective.insert(prefix)
+
+    def _remove_entries(self, entries: Iterable[str]):
+        """Retirer des entrées indexées (verrou d'écriture tenu)"""
+        for chunk in self._chunks(entries):
+            prefixes = []
+            for entry in chunk:
+                del self._blocked[entry]
+                prefix = parse_prefix(entry)
+                self._requested.remove(prefix)
+                self._effective.remove(prefix)
+                prefixes.append(prefix)
+            # Rétablir les autres demandes qui chevauchent l'espace libéré
+            for prefix in prefixes:
+                for other in chain(self._requested.supernets(prefix), self._requested.subnets(prefix)):
+                    self._effective.insert(other)
+
+    def _apply_changes(self) -> bool:
+        """Répercuter dans le noyau les changements de l'ensemble minimal (verrou d'écriture tenu)"""
+        added, removed = self._effective.take_changes()
+        try:
+            if self._needs_resync:
+                self._resync()
+            else:
+                # Une seule transaction noyau, ajouts avant retraits : une plage fusionnée
+                # n'est jamais découverte
+                self.backend.apply([format_prefix(p) for p in added], [format_prefix(p) for p in removed])
+        except KERNEL_ERRORS:
+            logger.exception("Échec de la mise à jour de l'ensemble noyau")
+            self._needs_resync = True
+            return False
+        return True
+
+    def _resync(self):
+        """Aligner l'ensemble noyau sur l'ensemble minimal complet"""
+        desired = {format_prefix(prefix) for prefix in self._effective.items()}
+        current = set()
+        for entry in self.backend.list():
+            try:
+                current.add(self.normalize(entry))
+            except ValueError:
+                current.add(entry)
+        self.backend.apply(sorted(desired - current), sorted(current - desired))
+        self._needs_resync = False
+
+    def _commit(self, undo: Callable[[], None]) -> bool:
+        """Appliquer les changements ; en cas d'échec, annuler la modification de l'index"""
+        if self._apply_changes():
+            return True
+        undo()
+        # L'ensemble noyau sera réaligné lors de la prochaine modification
+        self._effective.take_changes()
+        return False
+
+    def _parse_request(self, ip_address, duration) -> Tuple[str, Optional[float]]:
+        """Valider une demande de blocage ; lève ValueError si elle est invalide"""
+        entry = self.normalize(ip_address)
+        if duration is None:
+            return entry, None
+        if float(duration) <= 0:
+            raise ValueError('La durée de blocage doit être positive')
+        return entry, time.time() + float(duration)
+
+    def _apply_blocks(self, blocks: Dict[str, Optional[float]]) -> Optional[Dict[str, bool]]:
+        """Bloquer un lot d'entrées en une transaction ; renvoie les entrées déjà bloquées"""
+        with self._write_lock:
+            previous = {entry: (entry in self._blocked, self._blocked.get(entry)) for entry in blocks}
+            self._add_entries(blocks)
+
+            def undo():
+                self._remove_entries([entry for entry, (existed, _) in previous.items() if not existed])
+                for chunk in self._chunks(previous.items()):
+                    for entry, (existed, expires_at) in chunk:
+                        if existed:
+                            self._blocked[entry] = expires_at
+
+            if not self._commit(undo):
+                logger.error("Échec du blocage de %d entrée(s)", len(blocks))
+                return None
+            # Un nouveau blocage remplace l'échéance précédente (prolongation ou blocage permanent)
+            self.expiry.cancel_many(entry for entry, expires_at in blocks.items() if expires_at is None)
+            self.expiry.schedule_many({
+                entry: expires_at for entry, expires_at in blocks.items() if expires_at is not None
+            })
+        self.expiry.mark_dirty()
+        return {entry: existed for entry, (existed, _) in previous.items()}
+
+    def _apply_unblocks(self, entries: Iterable[str]) -> Optional[Dict[str, bool]]:
+        """Débloquer un lot d'entrées en une transaction ; renvoie celles qui étaient bloquées"""
+        with self._write_lock:
+            found = {entry: entry in self._blocked for entry in entries}
+            previous = {entry: self._blocked[entry] for entry, present in found.items() if present}
+            self._remove_entries(previous)
+
+            if previous and not self._commit(lambda: self._add_entries(previous)):
+                logger.error("Échec du déblocage de %d entrée(s)", len(previous))
+                return None
+            self.expiry.cancel_many(previous)
+        if previous:
+            self.expiry.mark_dirty()
+        return found
+
+    # API publique
+
+    def block_ip(self, ip_address, duration=None) -> bool:
+        """Bloquer une adresse IP ou une plage CIDR, éventuellement pour `duration` secondes"""
+        entry, expires_at = self._parse_request(ip_address, duration)
+        if self._apply_blocks({entry: expires_at}) is None:
+            return False
+        logger.info("IP bloquée : %s", entry)
+        return True
+
+    def unblock_ip(self, ip_address) -> bool:
+        """Débloquer une adresse IP ou une plage CIDR précédemment bloquée"""
+        entry = self.normalize(ip_address)
+        found = self._apply_unblocks([entry])
+        if not found or not found[entry]:
+            return False
+        logger.info("IP débloquée : %s", entry)
+        return True
+
+    def block_many(self, requests: Iterable[Tuple[str, Optional[float]]]) -> List[Dict]:
+        """Bloquer un lot de (adresse ou CIDR, durée) en une seule mise à jour noyau.
+
+        Toutes les entrées sont validées avant toute modification : une seule
+        entrée invalide fait rejeter le lot (BatchValidationError). Le résultat
+        donne, dans l'ordre des demandes, le statut de chaque entrée.
+        """
+        parsed, errors = [], []
+        for index, (ip_address, duration) in enumerate(requests):
+            try:
+                parsed.append((ip_address,) + self._parse_request(ip_address, duration))
+            except (TypeError, ValueError) as e:
+                errors.append({'index': index, 'ip': ip_address, 'message': str(e)})
+        if errors:
+            raise BatchValidationError(errors)
+
+        # Une entrée répétée garde sa dernière durée
+        previous = self._apply_blocks({entry: expires_at for _, entry, expires_at in parsed})
+        results = []
+        for ip_address, entry, expires_at in parsed:
+            if previous is None:
+                status = 'error'
+            else:
+                status = 'updated' if previous[entry] else 'blocked'
+            results.append({'ip': ip_address, 'entry': entry, 'status': status, 'expires_at': expires_at})
+        logger.info("Lot de blocage : %d entrée(s)", len(parsed))
+        return results
+
+    def unblock_many(self, ip_addresses: Iterable[str]) -> List[Dict]:
+        """Débloquer un lot d'adresses ou de CIDR en une seule mise à jour noyau"""
+        parsed, errors = [], []
+        for index, ip_address in enumerate(ip_addresses):
+            try:
+                parsed.append((ip_address, self.normalize(ip_address)))
+            except (TypeError, ValueError) as e:
+                errors.append({'index': index, 'ip': ip_address, 'message': str(e)})
+        if errors:
+            raise BatchValidationError(errors)
+
+        found = self._apply_unblocks(dict.fromkeys(entry for _, entry in parsed))
+        results = []
+        for ip_address, entry in parsed:
+            if found is None:
+                status = 'error'
+            else:
+                status = 'unblocked' if found[entry] else 'not_blocked'
+            results.append({'ip': ip_address, 'entry': entry, 'status': status})
+        logger.info("Lot de déblocage : %d entrée(s)", len(parsed))
+        return results
+
+    def is_blocked(self, ip_address) -> bool:
+        """Vrai si l'adresse (ou la plage) est couverte par un blocage, en O(longueur du préfixe)"""
+        prefix = parse_prefix(ip_address)
+        with self._lock:
+            return self._effective.contains(prefix)
+
+    def list_blocked_ips(self) -> List[str]:
+        """Lister les entrées bloquées (adresses et plages CIDR)"""
+        with self._lock:
+            return list(self._blocked)
+
+    def counts(self) -> Dict[str, int]:
+        """Entrées demandées et entrées effectivement présentes dans l'ensemble noyau"""
+        with self._lock:
+            return {'entries': len(self._blocked), 'kernel_entries': len(self._effective)}
+
+    def list_blocked(self, cursor: Optional[str] = None, limit: int = 500) -> Dict:
+        """Page d'entrées bloquées, triées par préfixe, reprise après `cursor`"""
+        after = parse_prefix(cursor) if cursor else None
+        with self._lock:
+            page = list(islice(self._requested.items(after), limit + 1))
+            entries = []
+            for prefix in page[:limit]:
+                entry = format_prefix(prefix)
+                entries.append({'ip': entry, 'expires_at': self._blocked.get(entry)})
+            return {
+                'entries': entries,
+                'next_cursor': entries[-1]['ip'] if len(page) > limit else None,
+                'total': len(self._blocked),
+                'kernel_entries': len(self._effective),
+            }
+
+    def _expire(self, entries: List[str]):
+        """Callback de l'échéancier : lever en un lot les blocages échus"""
+        now = time.time()
+        with self._write_lock:
+            due = [entry for entry in entries
+                   if self._blocked.get(entry) is not None and self._blocked[entry] <= now]
+            self._remove_entries(due)
+            expired = len(due)
+            if expired and not self._apply_changes():
+                logger.error("Échec du retrait de %d blocages expirés ; nouvel essai au prochain changement",
+                             expired)
+        if expired:
+            self.expiry.mark_dirty()
+        logger.info("%d blocage(s) temporaire(s) expiré(s)", expired)
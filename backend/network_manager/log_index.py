@@ -0,0 +1,340 @@
+import ast
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from backend.network_manager.reports import stats_log_files
+
+logger = logging.getLogger(__name__)
+
+# Taille visée d'un bloc indexé : une page ne lit jamais plus que quelques blocs
+BLOCK_BYTES = 64 * 1024
+READ_CHUNK = 1024 * 1024
+# Délai minimal entre deux rattrapages de l'index (requêtes rapprochées)
+REFRESH_INTERVAL = 1.0
+
+
+class LogRecord(NamedTuple):
+    offset: int
+    sub: int
+    timestamp: float
+    terms: FrozenSet[str]
+    fields: Dict
+
+
+class Block:
+    """Bloc de fichier commençant sur un enregistrement, avec son index clairsemé.
+
+    Seuls les bornes temporelles et l'ensemble des termes (type, niveau,
+    interface, utilisateur) présents dans le bloc sont conservés : une
+    recherche saute les blocs qui ne peuvent pas contenir de résultat.
+    """
+    __slots__ = ('offset', 'first', 'last', 'terms')
+
+    def __init__(self, offset: int, timestamp: float):
+        self.offset = offset
+        self.first = self.last = timestamp
+        self.terms = set()
+
+    def add(self, record: LogRecord):
+        self.first = min(self.first, record.timestamp)
+        self.last = max(self.last, record.timestamp)
+        self.terms.update(record.terms)
+
+
+# Formats des journaux
+
+class AppLogFormat:
+    """app.log : '%(asctime)s - %(name)s - %(levelname)s - %(message)s', messages multilignes"""
+
+    HEADER = re.compile(rb'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}) - (\S+) - ([A-Z]+) - ')
+    AUDIT_LOGGER = 'backend.auth.audit'
+    # Champs d'audit échappés (repr) : un nom d'utilisateur ne peut ni ouvrir une nouvelle ligne
+    # de journal ni ajouter de champ
+    AUDIT_MESSAGE = 'action=%r user=%r status=%r'
+    AUDIT_FIELD = re.compile(r"""(\w+)=('(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|\S*)""")
+    columns = ('timestamp', 'level', 'logger', 'message')
+
+    def __init__(self):
+        self._second = (None, 0.0)
+
+    def _epoch(self, text: bytes) -> float:
+        # Les enregistrements consécutifs partagent souvent la même seconde
+        cached = self._second
+        if cached[0] != text:
+            cached = self._second = (text, time.mktime(time.strptime(text.decode(), '%Y-%m-%d %H:%M:%S')))
+        return cached[1]
+
+    def records(self, data: bytes, base: int) -> Iterator[LogRecord]:
+        header, offset, lines = None, 0, []
+        position = 0
+        for line in data.splitlines(keepends=True):
+            match = self.HEADER.match(line)
+            if match:
+                if header is not None:
+                    yield self._record(base + offset, header, lines)
+                header, offset, lines = match, position, [line[match.end():]]
+            elif header is not None:
+                # Suite d'un message multiligne (trace d'exception)
+                lines.append(line)
+            position += len(line)
+        if header is not None:
+            yield self._record(base + offset, header, lines)
+
+    def _record(self, offset: int, header, lines: List[bytes]) -> LogRecord:
+        timestamp = self._epoch(header.group(1)) + int(header.group(2)) / 1000
+        logger, level = header.group(3).decode(), header.group(4).decode()
+        message = b''.join(lines).decode('utf-8', 'replace').rstrip('\n')
+        fields = {'timestamp': timestamp, 'level': level, 'logger': logger, 'message': message}
+        terms = {'type:system', f'level:{level}'}
+        if logger == self.AUDIT_LOGGER:
+            audit = {name: self._audit_value(value) for name, value in self.AUDIT_FIELD.findall(message)}
+            fields.update(user=audit.get('user'), action=audit.get('action'), status=audit.get('status'))
+            terms.update(('type:authentication', f"user:{audit.get('user')}"))
+        return LogRecord(offset, 0, timestamp, frozenset(terms), fields)
+
+    @staticmethod
+    def _audit_value(value: str):
+        if value[:1] not in ('"', "'"):
+            # Ancien format, non échappé
+            return value
+        try:
+            return str(ast.literal_eval(value))
+        except (ValueError, SyntaxError):
+            return value
+
+
+class StatsLogFormat:
+    """network_stats.log : une ligne JSON colonnaire par tick, un enregistrement par interface"""
+
+    columns = ('timestamp', 'interface', 'event', 'speed_upload', 'speed_download')
+
+    def records(self, data: bytes, base: int) -> Iterator[LogRecord]:
+        position = 0
+        for line in data.splitlines(keepends=True):
+            offset, position = base + position, position + len(line)
+            try:
+                record = json.loads(line)
+                timestamp = float(record['timestamp'])
+                rows = zip(record['interfaces'], record['speed_upload'], record['speed_download'])
+            except (ValueError, KeyError, TypeError):
+                # Ligne tronquée par une rotation ou un arrêt brutal
+                continue
+            for sub, (interface, upload, download) in enumerate(rows):
+                yield LogRecord(offset, sub, timestamp, frozenset(('type:network', f'interface:{interface}')), {
+                    'timestamp': timestamp,
+                    'interface': interface,
+                    'event': 'stats',
+                    'speed_upload': upload,
+                    'speed_download': download,
+                    'details': f'montant {upload} o/s, descendant {download} o/s',
+                })
+
+
+# Index
+
+class FileIndex:
+    """Index clairsemé d'un fichier de journal, rattrapé incrémentalement à chaque ajout.
+
+    Une ligne plus longue que READ_CHUNK n'est pas indexée : elle est sautée
+    jusqu'à sa fin, éventuellement sur plusieurs rattrapages, pour que
+    l'index continue d'avancer.
+    """
+
+    def __init__(self, inode: int):
+        self.inode = inode
+        self.indexed = 0
+        self.blocks: List[Block] = []
+        self.offsets: List[int] = []
+        # Vrai si `indexed` est au milieu d'une ligne trop longue
+        self.skipping = False
+
+    def update(self, path: str, log_format):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return
+        if size < self.indexed:
+            # Fichier tronqué : réindexer depuis le début
+            self.indexed, self.blocks, self.offsets, self.skipping = 0, [], [], False
+        if size == self.indexed:
+            return
+        blocks, offsets = list(self.blocks), list(self.offsets)
+        indexed, skipping = self.indexed, self.skipping
+        with open(path, 'rb') as log_file:
+            log_file.seek(indexed)
+            while True:
+                chunk = log_file.read(READ_CHUNK)
+                if skipping:
+                    # Suite d'une ligne trop longue : sautée jusqu'au prochain saut de ligne
+                    newline = chunk.find(b'\n')
+                    indexed += len(chunk) if newline < 0 else newline + 1
+                    skipping = newline < 0
+                    if not chunk:
+                        break
+                    log_file.seek(indexed)
+                    continue
+                # Seules les lignes complètes sont indexées
+                complete = chunk[:chunk.rfind(b'\n') + 1]
+                if not complete:
+                    if len(chunk) < READ_CHUNK:
+                        break
+                    logger.warning("Ligne de plus de %d octets ignorée dans %s (position %d)", READ_CHUNK, path,
+                                   indexed)
+                    indexed += len(chunk)
+                    skipping = True
+                    continue
+                for record in log_format.records(complete, indexed):
+                    # Un bloc commence sur un enregistrement, jamais au milieu d'une ligne
+                    if not blocks or record.sub == 0 and record.offset - blocks[-1].offset >= BLOCK_BYTES:
+                        blocks.append(Block(record.offset, record.timestamp))
+                        offsets.append(record.offset)
+                    blocks[-1].add(record)
+                indexed += len(complete)
+                log_file.seek(indexed)
+        # Publication atomique pour les lecteurs concurrents
+        self.blocks, self.offsets, self.indexed, self.skipping = blocks, offsets, indexed, skipping
+
+    def scan(self, path: str, log_format, before: Optional[Tuple[int, int]], since: Optional[float],
+             until: Optional[float], terms: FrozenSet[str]) -> Iterator[LogRecord]:
+        """Enregistrements du plus récent au plus ancien, strictement avant `before`"""
+        blocks, offsets, indexed = self.blocks, self.offsets, self.indexed
+        start = len(blocks) - 1 if before is None else bisect_right(offsets, before[0]) - 1
+        with open(path, 'rb') as log_file:
+            for index in range(start, -1, -1):
+                block = blocks[index]
+                if since is not None and block.last < since:
+                    # Journal chronologique : les blocs précédents sont plus anciens
+                    return
+                if not terms <= block.terms or until is not None and block.first >= until:
+                    continue
+                end = offsets[index + 1] if index + 1 < len(offsets) else indexed
+                log_file.seek(block.offset)
+                records = list(log_format.records(log_file.read(end - block.offset), block.offset))
+                for record in reversed(records):
+                    if before is not None and (record.offset, record.sub) >= before:
+                        continue
+                    if not terms <= record.terms or since is not None and record.timestamp < since \
+                            or until is not None and record.timestamp >= until:
+                        continue
+                    yield record
+
+
+class LogSource:
+    """Journal et ses fichiers tournés (path.N ... path.1, path), chacun indexé par inode"""
+
+    def __init__(self, path: str, log_format):
+        self.path = path
+        self.format = log_format
+        self._indexes: Dict[int, FileIndex] = {}
+        self._files: List[Tuple[FileIndex, str]] = []
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Rattraper l'index ; une rotation renomme les fichiers sans changer leur inode"""
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed < REFRESH_INTERVAL:
+                return
+            files = []
+            for path in reversed(stats_log_files(self.path)):
+                try:
+                    inode = os.stat(path).st_ino
+                except OSError:
+                    continue
+                index = self._indexes.get(inode) or FileIndex(inode)
+                index.update(path, self.format)
+                files.append((index, path))
+            self._indexes = {index.inode: index for index, _ in files}
+            self._files = files
+            self._refreshed = time.monotonic()
+
+    def scan(self, cursor: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+             terms: Iterable[str] = ()) -> Iterator[Tuple[str, LogRecord]]:
+        """(identifiant, enregistrement) du plus récent au plus ancien, après le curseur"""
+        self.refresh()
+        terms = frozenset(terms)
+        files = self._files
+        before = None
+        if cursor:
+            inode, offset, sub = parse_cursor(cursor)
+            position = next((i for i, (index, _) in enumerate(files) if index.inode == inode), None)
+            if position is None:
+                # Fichier sorti de la rotation
+                return
+            files, before = files[position:], (offset, sub)
+        for index, path in files:
+            try:
+                for record in index.scan(path, self.format, before, since, until, terms):
+                    yield f'{index.inode}:{record.offset}:{record.sub}', record
+            except FileNotFoundError:
+                # Supprimé par une rotation pendant la lecture
+                continue
+            before = None
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int, int]:
+    """Curseur 'inode:offset:sub' ; lève ValueError s'il est invalide"""
+    parts = cursor.split(':')
+    if len(parts) != 3:
+        raise ValueError(f'Curseur invalide : {cursor}')
+    inode, offset, sub = (int(part) for part in parts)
+    return inode, offset, sub
+
+
+class LogStore:
+    """Requêtes sur les journaux de l'application : pagination par curseur (keyset), filtres indexés"""
+
+    TYPES = {
+        'system': ('app', 'type:system'),
+        'authentication': ('app', 'type:authentication'),
+        'network': ('stats', 'type:network'),
+    }
+    COLUMNS = {
+        'system': AppLogFormat.columns,
+        'authentication': ('timestamp', 'user', 'action', 'status'),
+        'network': StatsLogFormat.columns,
+    }
+
+    def __init__(self, app_log_path: str, stats_log_path: str):
+        self.sources = {
+            'app': LogSource(app_log_path, AppLogFormat()),
+            'stats': LogSource(stats_log_path, StatsLogFormat()),
+        }
+
+    def _scan(self, log_type: str, cursor=None, since=None, until=None, level=None, interface=None, user=None):
+        if log_type not in self.TYPES:
+            raise ValueError(f'Type de journal inconnu : {log_type}')
+        source, term = self.TYPES[log_type]
+        terms = [term]
+        for name, value in (('level', level), ('interface', interface), ('user', user)):
+            if value:
+                terms.append(f'{name}:{value.upper() if name == "level" else value}')
+        return self.sources[source].scan(cursor, since, until, terms)
+
+    def query(self, log_type: str, cursor: Optional[str] = None, limit: int = 50, **filters) -> Dict:
+        """Page de `limit` enregistrements, du plus récent au plus ancien"""
+        logs, next_cursor = [], None
+        for record_id, record in self._scan(log_type, cursor, **filters):
+            if len(logs) == limit:
+                next_cursor = logs[-1]['id']
+                break
+            logs.append(self._describe(record_id, record))
+        return {'logs': logs, 'next_cursor': next_cursor}
+
+    def export(self, log_type: str, **filters) -> Iterator[Dict]:
+        """Tous les enregistrements correspondants, lus bloc par bloc"""
+        for record_id, record in self._scan(log_type, None, **filters):
+            yield self._describe(record_id, record)
+
+    @staticmethod
+    def _describe(record_id: str, record: LogRecord) -> Dict:
+        fields = dict(record.fields, id=record_id)
+        fields['timestamp'] = datetime.fromtimestamp(record.timestamp).isoformat(timespec='milliseconds')
+        return fields
@@ -0,0 +1,187 @@
+import math
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bornes (s) des histogrammes de durée : de la demi-milliseconde à quelques secondes
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Compteur croissant, par combinaison de labels"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram(Metric):
+    """Histogramme à bornes fixes : une observation coûte une dichotomie et un incrément"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compteurs par borne (non cumulés) + dépassement, somme]
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+class Gauge(Metric):
+    """Valeur instantanée lue au moment de l'export : aucun coût sur le chemin mesuré.
+
+    La fonction renvoie un nombre, ou un dictionnaire {labels: valeur} ;
+    None omet la série (ex. composant désactivé).
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function: Callable, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def samples(self):
+        value = self.function()
+        if value is None:
+            return
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, current in sorted(values.items()):
+            labels = labels if isinstance(labels, tuple) else (labels,)
+            if current is not None:
+                yield f'{self.name}{_labels(self.labelnames, labels)} {_number(current)}'
+
+
+class Registry:
+    """Métriques d'un processus, exportées au format texte Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Enregistrer une métrique ; une métrique du même nom est remplacée (rechargement)"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+def ratio(hits: int, misses: int) -> Optional[float]:
+    """Taux de succès d'un cache, None tant qu'il n'a servi aucune lecture"""
+    total = hits + misses
+    return hits / total if total else None
+
+
+def serve(registry: 'Registry', port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Exposer /metrics sur un port dédié (processus sans Flask, ex. sampler)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+REGISTRY = Registry()
+
+# Ordonnanceur d'échantillonnage (label `job` : nom qualifié du callback)
+TICK_SECONDS = REGISTRY.register(Histogram(
+    'nbm_scheduler_tick_duration_seconds', "Durée d'exécution d'une tâche périodique", ('job',)))
+WAKEUP_DELAY_SECONDS = REGISTRY.register(Histogram(
+    'nbm_scheduler_wakeup_delay_seconds', "Retard du réveil par rapport à l'échéance", ('job',),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)))
+MISSED_TICKS = REGISTRY.register(Counter(
+    'nbm_scheduler_missed_ticks_total', 'Échéances sautées faute de temps', ('job',)))
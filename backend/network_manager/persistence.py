@@ -0,0 +1,196 @@
+import io
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_COLUMNS = (
+    'ts', 'interface', 'bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+    'speed_upload', 'speed_download'
+)
+
+# Table partitionnée par jour ; les partitions sont créées à la demande par le writer
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS network_samples (
+    ts TIMESTAMPTZ NOT NULL,
+    interface TEXT NOT NULL,
+    bytes_sent BIGINT NOT NULL,
+    bytes_recv BIGINT NOT NULL,
+    packets_sent BIGINT NOT NULL,
+    packets_recv BIGINT NOT NULL,
+    speed_upload DOUBLE PRECISION NOT NULL,
+    speed_download DOUBLE PRECISION NOT NULL
+) PARTITION BY RANGE (ts);
+
+CREATE INDEX IF NOT EXISTS network_samples_interface_ts_idx ON network_samples (interface, ts);
+"""
+
+PARTITION_SQL = """
+CREATE TABLE IF NOT EXISTS {name} PARTITION OF network_samples
+    FOR VALUES FROM ('{start}') TO ('{end}');
+"""
+
+
+def partition_name(day: datetime) -> str:
+    return f"network_samples_{day:%Y%m%d}"
+
+
+class SampleWriter:
+    """Persistance différée et groupée des échantillons dans PostgreSQL.
+
+    Le monitor dépose les échantillons dans une file bornée sans jamais
+    bloquer : quand elle est pleine, les plus anciens sont abandonnés. Un
+    thread d'écriture les envoie par lots avec COPY, et réessaie un lot en
+    échec avec un délai croissant avant de l'abandonner.
+    """
+
+    def __init__(self, database_url: Optional[str] = None, connect: Optional[Callable] = None,
+                 batch_size: int = 5000, flush_interval: float = 1.0, queue_size: int = 100000,
+                 max_retries: int = 5, retry_delay: float = 0.5):
+        self.database_url = database_url
+        self._connect = connect or self._psycopg2_connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.dropped_samples = 0
+        self.written_samples = 0
+        self._queue = deque(maxlen=queue_size)
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._connection = None
+        self._partitions = set()
+
+    def _psycopg2_connect(self):
+        import psycopg2
+        return psycopg2.connect(self.database_url)
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def submit(self, timestamp: float, stats: Iterable) -> None:
+        """Déposer les échantillons d'un tick (jamais bloquant)"""
+        if not self._running:
+            self.start()
+        rows = [
+            (timestamp, stat.interface, stat.bytes_sent, stat.bytes_recv, stat.packets_sent,
+             stat.packets_recv, stat.speed_upload, stat.speed_download)
+            for stat in stats
+        ]
+        with self._condition:
+            overflow = len(self._queue) + len(rows) - self._queue.maxlen
+            if overflow > 0:
+                self.dropped_samples += overflow
+            # deque(maxlen) abandonne les échantillons les plus anciens
+            self._queue.extend(rows)
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='sample-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Écrire les échantillons restants puis arrêter le thread"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close()
+
+    def _take_batch(self) -> List[tuple]:
+        with self._condition:
+            if self._running and len(self._queue) < self.batch_size:
+                self._condition.wait(self.flush_interval)
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write_with_retries(batch)
+            elif not self._running:
+                return
+
+    def _write_with_retries(self, batch: List[tuple]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write(batch)
+                self.written_samples += len(batch)
+                return
+            except Exception:
+                logger.exception("Échec de l'écriture d'un lot de %d échantillons (tentative %d)",
+                                 len(batch), attempt + 1)
+                self._close()
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay * (2 ** attempt))
+        self.dropped_samples += len(batch)
+
+    def _connection_or_connect(self):
+        if self._connection is None:
+            self._connection = self._connect()
+            with self._connection.cursor() as cursor:
+                cursor.execute(SCHEMA_SQL)
+            self._connection.commit()
+            self._partitions.clear()
+        return self._connection
+
+    def _ensure_partitions(self, cursor, days):
+        for day in days - self._partitions:
+            cursor.execute(PARTITION_SQL.format(
+                name=partition_name(day),
+                start=day.isoformat(),
+                end=(day + timedelta(days=1)).isoformat()
+            ))
+        self._partitions |= days
+
+    def _write(self, batch: List[tuple]):
+        """Envoyer un lot avec COPY dans une seule transaction"""
+        connection = self._connection_or_connect()
+        buffer = io.StringIO()
+        days = set()
+        last_timestamp, last_text = None, None
+        for row in batch:
+            if row[0] != last_timestamp:
+                moment = datetime.fromtimestamp(row[0], tz=timezone.utc)
+                days.add(moment.replace(hour=0, minute=0, second=0, microsecond=0))
+                last_timestamp, last_text = row[0], moment.isoformat()
+            buffer.write(last_text)
+            for value in row[1:]:
+                buffer.write('\t')
+                buffer.write(str(value))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        try:
+            with connection.cursor() as cursor:
+                self._ensure_partitions(cursor, days)
+                cursor.copy_expert(
+                    f"COPY network_samples ({', '.join(SAMPLE_COLUMNS)}) FROM STDIN", buffer
+                )
+            connection.commit()
+        except Exception:
+            self._partitions -= days
+            raise
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
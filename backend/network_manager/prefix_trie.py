@@ -0,0 +1,340 @@
+import ipaddress
+import socket
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Un préfixe est représenté par (version, réseau entier, longueur)
+Prefix = Tuple[int, int, int]
+
+WIDTHS = {4: 32, 6: 128}
+
+
+FAMILIES = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+
+def parse_prefix(text: str) -> Prefix:
+    """Convertir une adresse ou un CIDR en préfixe ; lève ValueError si invalide"""
+    text = str(text).strip()
+    address, separator, length = text.partition('/')
+    version = 6 if ':' in address else 4
+    width = WIDTHS[version]
+    try:
+        # Chemin rapide (inet_pton) pour les formes usuelles
+        network = int.from_bytes(socket.inet_pton(FAMILIES[version], address), 'big')
+        prefix_length = int(length) if separator else width
+    except (OSError, ValueError):
+        prefix_length = -1
+    if separator and not length.isdigit() or not 0 <= prefix_length <= width:
+        # Masques, identifiants de zone... : laisser ipaddress valider
+        parsed = ipaddress.ip_network(text, strict=False)
+        return parsed.version, int(parsed.network_address), parsed.prefixlen
+    shift = width - prefix_length
+    return version, network >> shift << shift, prefix_length
+
+
+def format_prefix(prefix: Prefix) -> str:
+    """Texte d'un préfixe ; une adresse d'hôte est écrite sans longueur"""
+    version, network, length = prefix
+    width = WIDTHS[version]
+    address = socket.inet_ntop(FAMILIES[version], network.to_bytes(width // 8, 'big'))
+    return address if length == width else f'{address}/{length}'
+
+
+class _Node:
+    __slots__ = ('network', 'length', 'children', 'terminal')
+
+    def __init__(self, network: int, length: int, terminal: bool = False):
+        self.network = network
+        self.length = length
+        self.children: List[Optional['_Node']] = [None, None]
+        self.terminal = terminal
+
+
+class PrefixTrie:
+    """Arbre radix compressé (Patricia) de préfixes IPv4 et IPv6.
+
+    Les recherches coûtent O(longueur du préfixe). En mode `aggregate`,
+    l'arbre maintient un ensemble minimal : un préfixe couvert par un autre
+    est ignoré, un préfixe plus large absorbe ceux qu'il couvre, et deux
+    préfixes frères sont fusionnés en leur parent. Les changements de
+    l'ensemble minimal sont accumulés pour être répercutés dans le noyau
+    (voir `take_changes`).
+    """
+
+    def __init__(self, aggregate: bool = False):
+        self.aggregate = aggregate
+        self._roots = {version: _Node(0, 0) for version in WIDTHS}
+        self._count = 0
+        self._changes: Dict[Prefix, int] = {}
+
+    def __len__(self):
+        return self._count
+
+    # Outils binaires
+
+    @staticmethod
+    def _bit(network: int, position: int, width: int) -> int:
+        return (network >> (width - 1 - position)) & 1
+
+    @staticmethod
+    def _mask(network: int, length: int, width: int) -> int:
+        return network >> (width - length) << (width - length) if length else 0
+
+    @staticmethod
+    def _common(a: int, a_length: int, b: int, b_length: int, width: int) -> int:
+        limit = min(a_length, b_length)
+        difference = a ^ b
+        if difference == 0:
+            return limit
+        return min(width - difference.bit_length(), limit)
+
+    # Journal des changements de l'ensemble
+
+    def _record(self, version: int, node: _Node, delta: int):
+        key = (version, node.network, node.length)
+        total = self._changes.get(key, 0) + delta
+        if total:
+            self._changes[key] = total
+        else:
+            self._changes.pop(key, None)
+        self._count += delta
+
+    def _set_terminal(self, version: int, node: _Node, terminal: bool):
+        if node.terminal != terminal:
+            node.terminal = terminal
+            self._record(version, node, 1 if terminal else -1)
+
+    def _drop_subtree(self, version: int, node: Optional[_Node]):
+        """Retirer tous les préfixes d'un sous-arbre"""
+        stack = [node] if node else []
+        while stack:
+            current = stack.pop()
+            if current.terminal:
+                self._set_terminal(version, current, False)
+            stack.extend(child for child in current.children if child)
+
+    def take_changes(self) -> Tuple[List[Prefix], List[Prefix]]:
+        """Renvoyer (ajouts, retraits) nets depuis le dernier appel"""
+        added = [prefix for prefix, delta in self._changes.items() if delta > 0]
+        removed = [prefix for prefix, delta in self._changes.items() if delta < 0]
+        self._changes = {}
+        return added, removed
+
+    # Opérations
+
+    def insert(self, prefix: Prefix) -> bool:
+        """Ajouter un préfixe ; renvoie False s'il était déjà présent (ou couvert)"""
+        version, network, length = prefix
+        width = WIDTHS[version]
+        network = self._mask(network, length, width)
+        aggregate = self.aggregate
+        node = self._roots[version]
+        path = []
+
+        # Descente rapide tant qu'un fils couvre le préfixe
+        while node.length < length and not (aggregate and node.terminal):
+            child = node.children[(network >> (width - 1 - node.length)) & 1]
+            if child is None or child.length > length or (network ^ child.network) >> (width - child.length):
+                break
+            path.append(node)
+            node = child
+
+        while True:
+            if aggregate and node.terminal and node.length <= length:
+                return False
+            if node.length == length:
+                if node.terminal:
+                    return False
+                if self.aggregate:
+                    for index, child in enumerate(node.children):
+                        self._drop_subtree(version, child)
+                        node.children[index] = None
+                self._set_terminal(version, node, True)
+                break
+
+            side = (network >> (width - 1 - node.length)) & 1
+            child = node.children[side]
+            if child is None:
+                node.children[side] = _Node(network, length)
+                self._set_terminal(version, node.children[side], True)
+                break
+
+            if length >= child.length and (network ^ child.network) >> (width - child.length) == 0:
+                # Le fils couvre le préfixe : descendre
+                path.append(node)
+                node = child
+                continue
+
+            common = self._common(network, length, child.network, child.length, width)
+            new = _Node(network, length)
+            if common == length:
+                # Le nouveau préfixe couvre le fils existant
+                if self.aggregate:
+                    self._drop_subtree(version, child)
+                else:
+                    new.children[self._bit(child.network, length, width)] = child
+            else:
+                branch = _Node(self._mask(network, common, width), common)
+                branch.children[self._bit(child.network, common, width)] = child
+                branch.children[self._bit(network, common, width)] = new
+                path.append(node)
+                node.children[side] = branch
+                node = branch
+                self._set_terminal(version, new, True)
+                break
+            node.children[side] = new
+            self._set_terminal(version, new, True)
+            break
+
+        if self.aggregate:
+            path.append(node)
+            self._merge_siblings(version, path)
+        return True
+
+    def _merge_siblings(self, version: int, path: List[_Node]):
+        """Fusionner les paires de préfixes frères en remontant le chemin"""
+        for node in reversed(path):
+            if node.terminal:
+                continue
+            left, right = node.children
+            if not (left and right):
+                return
+            if not (left.terminal and right.terminal
+                    and left.length == right.length == node.length + 1):
+                return
+            self._set_terminal(version, left, False)
+            self._set_terminal(version, right, False)
+            node.children = [None, None]
+            self._set_terminal(version, node, True)
+
+    def remove(self, prefix: Prefix) -> bool:
+        """Retirer un préfixe.
+
+        En mode `aggregate`, tout l'espace du préfixe est retiré : les
+        préfixes plus spécifiques disparaissent et un préfixe plus large qui
+        le couvre est découpé autour de lui.
+        """
+        version, network, length = prefix
+        width = WIDTHS[version]
+        network = self._mask(network, length, width)
+        node = self._roots[version]
+        path: List[Tuple[_Node, int]] = []
+
+        while True:
+            if self.aggregate and node.terminal and node.length < length:
+                self._split_around(version, node, network, length, width)
+                return True
+            if node.length == length:
+                if not self.aggregate:
+                    if not node.terminal:
+                        return False
+                    self._set_terminal(version, node, False)
+                else:
+                    changed = node.terminal or any(node.children)
+                    self._set_terminal(version, node, False)
+                    for index, child in enumerate(node.children):
+                        self._drop_subtree(version, child)
+                        node.children[index] = None
+                    if not changed:
+                        return False
+                self._prune(path, node)
+                return True
+
+            side = (network >> (width - 1 - node.length)) & 1
+            child = node.children[side]
+            if child is None:
+                return False
+            if length >= child.length and (network ^ child.network) >> (width - child.length) == 0:
+                path.append((node, side))
+                node = child
+                continue
+            common = self._common(network, length, child.network, child.length, width)
+            if self.aggregate and common == length:
+                # Le fils est entièrement contenu dans le préfixe retiré
+                self._drop_subtree(version, child)
+                node.children[side] = None
+                self._prune(path, node)
+                return True
+            return False
+
+    def _split_around(self, version: int, node: _Node, network: int, length: int, width: int):
+        """Remplacer un préfixe terminal par son complément autour de `network/length`"""
+        self._set_terminal(version, node, False)
+        for position in range(node.length, length):
+            sibling_bit = 1 - self._bit(network, position, width)
+            sibling = self._mask(network, position, width) | (sibling_bit << (width - 1 - position))
+            self.insert((version, sibling, position + 1))
+
+    def _prune(self, path: List[Tuple[_Node, int]], node: _Node):
+        """Supprimer les nœuds devenus inutiles après un retrait"""
+        while path:
+            parent, side = path.pop()
+            if node.terminal:
+                return
+            children = [child for child in node.children if child]
+            if len(children) == 2:
+                return
+            parent.children[side] = children[0] if children else None
+            node = parent
+
+    def contains(self, prefix: Prefix) -> bool:
+        """Vrai si le préfixe (ou l'adresse) est couvert par un préfixe de l'arbre"""
+        return self.covering(prefix) is not None
+
+    def covering(self, prefix: Prefix) -> Optional[Prefix]:
+        """Préfixe le plus large de l'arbre couvrant `prefix`"""
+        for found in self.supernets(prefix):
+            return found
+        return None
+
+    def supernets(self, prefix: Prefix) -> Iterator[Prefix]:
+        """Préfixes de l'arbre qui couvrent `prefix` (lui compris), du plus large au plus précis"""
+        version, network, length = prefix
+        width = WIDTHS[version]
+        node = self._roots[version]
+        while node is not None:
+            if node.length > length or (network ^ node.network) >> (width - node.length):
+                return
+            if node.terminal:
+                yield version, node.network, node.length
+            if node.length >= length:
+                return
+            node = node.children[self._bit(network, node.length, width)]
+
+    def subnets(self, prefix: Prefix) -> Iterator[Prefix]:
+        """Préfixes de l'arbre strictement contenus dans `prefix`"""
+        version, network, length = prefix
+        width = WIDTHS[version]
+        node = self._roots[version]
+        while node is not None and node.length < length:
+            node = node.children[self._bit(network, node.length, width)]
+        if node is None or self._common(network, length, node.network, node.length, width) < length:
+            return
+        for found in self._walk(version, node, None):
+            if found[2] > length:
+                yield found
+
+    def _walk(self, version: int, node: _Node, after: Optional[Tuple[int, int]]) -> Iterator[Prefix]:
+        """Parcours préfixe, trié par (réseau, longueur).
+
+        Les sous-arbres situés entièrement avant `after` sont ignorés sans
+        être parcourus : reprendre une pagination coûte O(profondeur).
+        """
+        width = WIDTHS[version]
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if after is not None:
+                last = current.network | ((1 << (width - current.length)) - 1)
+                if last < after[0]:
+                    continue
+            if current.terminal and (after is None or (current.network, current.length) > after):
+                yield version, current.network, current.length
+            stack.extend(child for child in reversed(current.children) if child)
+
+    def items(self, after: Optional[Prefix] = None) -> Iterator[Prefix]:
+        """Préfixes triés (IPv4 puis IPv6), en reprenant après le préfixe `after`"""
+        for version in sorted(self._roots):
+            if after is not None and version < after[0]:
+                continue
+            start = (after[1], after[2]) if after is not None and version == after[0] else None
+            yield from self._walk(version, self._roots[version], start)
@@ -0,0 +1,74 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Profileur statistique activable en production.
+
+    Un thread relève périodiquement la pile de chaque thread
+    (sys._current_frames) et compte les piles identiques : le coût ne dépend
+    que de la période d'échantillonnage, pas du code profilé. Le résultat
+    est au format « folded » (une pile par ligne, cadres séparés par ';'),
+    lu directement par flamegraph.pl ou speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """Démarrer (et remettre à zéro) ; False s'il tourne déjà"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> str:
+        """Arrêter et renvoyer les piles relevées"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self.folded()
+
+    def folded(self) -> str:
+        stacks = self._stacks.most_common()
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    code = frame.f_code
+                    frames.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self._stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from backend.network_manager.anomaly_detector import AnomalyEngine
+from backend.network_manager.prefix_trie import PrefixTrie, format_prefix, parse_prefix
+
+# Requêtes longues exécutées hors des workers Flask (voir backend/tasks)
+
+# Agrégation côté PostgreSQL : seules les partitions de la plage sont lues
+HISTORY_SQL = """
+SELECT interface,
+       floor(extract(epoch FROM ts) / %(step)s) * %(step)s AS bucket,
+       avg(speed_upload), min(speed_upload), max(speed_upload),
+       avg(speed_download), min(speed_download), max(speed_download),
+       max(bytes_sent) - min(bytes_sent), max(bytes_recv) - min(bytes_recv)
+FROM network_samples
+WHERE ts >= to_timestamp(%(since)s) AND ts < to_timestamp(%(until)s){interface_filter}
+GROUP BY interface, bucket
+ORDER BY interface, bucket
+"""
+
+HISTORY_COLUMNS = (
+    'speed_upload', 'speed_upload_min', 'speed_upload_max',
+    'speed_download', 'speed_download_min', 'speed_download_max',
+    'bytes_sent', 'bytes_recv'
+)
+
+EXPORT_COLUMNS = ('timestamp', 'interface', 'speed_upload', 'speed_download')
+
+
+def aggregate_history(connection, since: float, until: float, step: float,
+                      interface: Optional[str] = None) -> List[Dict]:
+    """Historique persistant agrégé au pas `step`, au format de RollupEngine.query"""
+    sql = HISTORY_SQL.format(interface_filter=' AND interface = %(interface)s' if interface else '')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'since': since, 'until': until, 'step': step, 'interface': interface})
+        rows = cursor.fetchall()
+
+    result: Dict[str, Dict] = {}
+    for name, bucket, *values in rows:
+        entry = result.get(name)
+        if entry is None:
+            entry = result[name] = {'interface': name, 'resolution': step, 'timestamp': []}
+            entry.update((column, []) for column in HISTORY_COLUMNS)
+        entry['timestamp'].append(float(bucket))
+        for column, value in zip(HISTORY_COLUMNS, values):
+            entry[column].append(float(value or 0))
+    return list(result.values())
+
+
+def stats_log_files(path: str) -> List[str]:
+    """Fichiers du journal des statistiques, du plus ancien au plus récent (rotation .N ... .1)"""
+    directory, name = os.path.split(path)
+    if not os.path.isdir(directory or '.'):
+        return []
+    rotated = []
+    for candidate in os.listdir(directory or '.'):
+        suffix = candidate[len(name) + 1:]
+        if candidate.startswith(name + '.') and suffix.isdigit():
+            rotated.append((int(suffix), os.path.join(directory, candidate)))
+    files = [file for _, file in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def iter_stats_log(path: str, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Iterator[Tuple[float, str, float, float]]:
+    """(horodatage, interface, débit montant, débit descendant) des lignes JSON du journal"""
+    for file in stats_log_files(path):
+        with open(file, encoding='utf-8') as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                    timestamp = record['timestamp']
+                    if since is not None and timestamp < since or until is not None and timestamp >= until:
+                        continue
+                    yield from ((timestamp, interface, upload, download) for interface, upload, download in
+                                zip(record['interfaces'], record['speed_upload'], record['speed_download']))
+                except (ValueError, KeyError, TypeError):
+                    # Ligne tronquée par une rotation ou un arrêt brutal
+                    continue
+
+
+def export_stats_log(path: str, destination: IO, since: Optional[float] = None,
+                     until: Optional[float] = None, interface: Optional[str] = None) -> int:
+    """Écrire en CSV les échantillons du journal ; renvoie le nombre de lignes"""
+    writer = csv.writer(destination)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in iter_stats_log(path, since, until):
+        if interface is None or row[1] == interface:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def backfill_anomalies(path: str, since: Optional[float] = None, until: Optional[float] = None,
+                       interface: Optional[str] = None, threshold: float = 4.0) -> List[Dict]:
+    """Rejouer le journal dans un moteur d'anomalies neuf et renvoyer ses événements"""
+    engine = AnomalyEngine(threshold=threshold, event_log_size=100000)
+    for timestamp, name, upload, download in iter_stats_log(path, since, until):
+        if interface is None or name == interface:
+            engine.observe(name, timestamp, upload, download)
+    return engine.events()
+
+
+def prepare_blocklist_import(text: str, max_errors: int = 1000) -> Dict:
+    """Valider et normaliser une liste d'adresses / CIDR (une par ligne, `#` pour commenter).
+
+    Renvoie les entrées dédoublonnées et triées, prêtes pour un blocage groupé,
+    ainsi que le nombre d'entrées de l'ensemble noyau minimal correspondant.
+    """
+    requested = PrefixTrie()
+    minimal = PrefixTrie(aggregate=True)
+    errors = []
+    lines = duplicates = 0
+    for number, line in enumerate(text.splitlines(), start=1):
+        # Formats courants des listes publiques : commentaires, séparateurs `;` ou `,`
+        value = line.split('#', 1)[0].replace(';', ',').split(',', 1)[0].strip()
+        if not value:
+            continue
+        lines += 1
+        try:
+            prefix = parse_prefix(value)
+        except ValueError as e:
+            if len(errors) < max_errors:
+                errors.append({'line': number, 'ip': value, 'message': str(e)})
+            continue
+        if not requested.insert(prefix):
+            duplicates += 1
+            continue
+        minimal.insert(prefix)
+    return {
+        'entries': [format_prefix(prefix) for prefix in requested.items()],
+        'lines': lines,
+        'duplicates': duplicates,
+        'invalid': lines - duplicates - len(requested),
+        'errors': errors,
+        'kernel_entries': len(minimal),
+    }
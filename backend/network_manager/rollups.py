@@ -0,0 +1,227 @@
+import math
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Compteurs agrégés, dans l'ordre des deltas fournis par le monitor
+ROLLUP_METRICS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv')
+
+# Nom de la vitesse moyenne exposée pour chaque compteur (mêmes clés que l'historique brut)
+RATE_NAMES = {
+    'bytes_sent': 'speed_upload',
+    'bytes_recv': 'speed_download',
+    'packets_sent': 'packets_sent_rate',
+    'packets_recv': 'packets_recv_rate',
+}
+
+# Colonnes d'un bucket : début, nombre d'échantillons, durée couverte,
+# puis pour chaque compteur la somme des deltas et les vitesses min / max
+BUCKET_COLUMNS = 3 + 3 * len(ROLLUP_METRICS)
+
+DAY = 86400
+
+
+def default_tiers(retention_days: int = 30) -> List[Tuple[int, int]]:
+    """Résolutions (s) et rétentions (s) par défaut ; le niveau horaire suit log_retention_days"""
+    return [
+        (1, 15 * 60),
+        (10, 6 * 3600),
+        (60, 2 * DAY),
+        (3600, max(1, retention_days) * DAY),
+    ]
+
+
+class BucketRing:
+    """Buckets clos d'un niveau, dans des colonnes typées bornées à `capacity`.
+
+    Les colonnes grandissent avec les buckets reçus : une interface récente
+    (ou éphémère) n'occupe pas la capacité complète de chaque niveau.
+    """
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self._columns = [array('d') for _ in range(BUCKET_COLUMNS)]
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, bucket: Sequence[float]):
+        i = self._head
+        if i == len(self._columns[0]):
+            for column, value in zip(self._columns, bucket):
+                column.append(value)
+        else:
+            for column, value in zip(self._columns, bucket):
+                column[i] = value
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def buckets(self, since: Optional[float] = None) -> List[Tuple[float, ...]]:
+        """Buckets dans l'ordre chronologique, éventuellement à partir de `since`"""
+        start = (self._head - self._count) % self.capacity
+        rows = []
+        for offset in range(self._count):
+            i = (start + offset) % self.capacity
+            if since is not None and self._columns[0][i] + self.resolution <= since:
+                continue
+            rows.append(tuple(column[i] for column in self._columns))
+        return rows
+
+    def resized(self, capacity: int) -> 'BucketRing':
+        """Copie avec une nouvelle capacité, en gardant les buckets les plus récents"""
+        ring = BucketRing(self.resolution, capacity)
+        for bucket in self.buckets()[-capacity:]:
+            ring.append(bucket)
+        return ring
+
+
+def _empty_bucket(start: float) -> List[float]:
+    bucket = [start, 0.0, 0.0]
+    for _ in ROLLUP_METRICS:
+        bucket.extend((0.0, math.inf, -math.inf))
+    return bucket
+
+
+def _merge(bucket: List[float], other: Sequence[float]):
+    """Fusionner un bucket (ou un échantillon) plus fin dans `bucket`"""
+    bucket[1] += other[1]
+    bucket[2] += other[2]
+    for base in range(3, BUCKET_COLUMNS, 3):
+        bucket[base] += other[base]
+        if other[base + 1] < bucket[base + 1]:
+            bucket[base + 1] = other[base + 1]
+        if other[base + 2] > bucket[base + 2]:
+            bucket[base + 2] = other[base + 2]
+
+
+class RollupSeries:
+    """Agrégats multi-résolution d'une interface.
+
+    Seul le niveau le plus fin reçoit les échantillons ; chaque bucket clos
+    est fusionné dans le bucket ouvert du niveau suivant, si bien que le
+    coût d'un échantillon ne dépend pas de la durée conservée.
+    """
+
+    def __init__(self, tiers: List[Tuple[int, int]]):
+        self.resolutions = [resolution for resolution, _ in tiers]
+        self.rings = [BucketRing(resolution, max(1, retention // resolution)) for resolution, retention in tiers]
+        self._open: List[Optional[List[float]]] = [None] * len(tiers)
+        self._lock = threading.Lock()
+
+    def add(self, timestamp: float, elapsed: float, deltas: Sequence[float]):
+        """Ajouter un échantillon : deltas des compteurs sur `elapsed` secondes"""
+        sample = [timestamp, 1.0, elapsed]
+        for delta in deltas:
+            rate = delta / elapsed if elapsed > 0 else 0.0
+            sample.extend((delta, rate, rate))
+        with self._lock:
+            self._add(0, timestamp, sample)
+
+    def _add(self, level: int, timestamp: float, sample: Sequence[float]):
+        resolution = self.resolutions[level]
+        start = (timestamp // resolution) * resolution
+        bucket = self._open[level]
+        if bucket is not None and bucket[0] != start:
+            self.rings[level].append(bucket)
+            if level + 1 < len(self.resolutions):
+                self._add(level + 1, bucket[0], bucket)
+            bucket = None
+        if bucket is None:
+            bucket = self._open[level] = _empty_bucket(start)
+        _merge(bucket, sample)
+
+    def set_retention(self, level: int, retention: int):
+        with self._lock:
+            self.rings[level] = self.rings[level].resized(max(1, retention // self.resolutions[level]))
+
+    def buckets(self, level: int, since: Optional[float] = None) -> List[Tuple[float, ...]]:
+        """Buckets clos du niveau, suivis du bucket en cours"""
+        with self._lock:
+            rows = self.rings[level].buckets(since)
+            if self._open[level] is not None:
+                rows.append(tuple(self._open[level]))
+        return rows
+
+
+class RollupEngine:
+    """Agrégation 1 s → 10 s → 1 min → 1 h de toutes les interfaces"""
+
+    def __init__(self, retention_days: int = 30, tiers: Optional[List[Tuple[int, int]]] = None):
+        self.tiers = list(tiers or default_tiers(retention_days))
+        self._series: Dict[str, RollupSeries] = {}
+        self._lock = threading.Lock()
+
+    def add(self, interface: str, timestamp: float, elapsed: float, deltas: Sequence[float]):
+        series = self._series.get(interface)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(interface, RollupSeries(self.tiers))
+        series.add(timestamp, elapsed, deltas)
+
+    def forget(self, interface: str):
+        """Libérer les agrégats d'une interface disparue"""
+        with self._lock:
+            self._series.pop(interface, None)
+
+    def set_retention_days(self, retention_days: int):
+        """Appliquer une nouvelle rétention (log_retention_days) au niveau le plus grossier"""
+        level = len(self.tiers) - 1
+        resolution, _ = self.tiers[level]
+        retention = max(1, retention_days) * DAY
+        self.tiers[level] = (resolution, retention)
+        for series in list(self._series.values()):
+            series.set_retention(level, retention)
+
+    def select_level(self, step: Optional[float]) -> int:
+        """Choisir le niveau le plus grossier dont la résolution ne dépasse pas `step`"""
+        level = 0
+        for index, (resolution, _) in enumerate(self.tiers):
+            if step is not None and resolution <= step:
+                level = index
+        return level
+
+    def query(self, interface: Optional[str] = None, since: Optional[float] = None,
+              step: Optional[float] = None) -> List[Dict]:
+        """Historique agrégé (colonnes) au pas demandé"""
+        level = self.select_level(step)
+        names = [interface] if interface else list(self._series)
+        result = []
+        for name in names:
+            series = self._series.get(name)
+            if series is None:
+                continue
+            rows = series.buckets(level, since)
+            if step and step > self.tiers[level][0]:
+                rows = _regroup(rows, step)
+            entry = {'interface': name, 'resolution': max(step or 0, self.tiers[level][0])}
+            entry.update(_columns(rows))
+            result.append(entry)
+        return result
+
+
+def _regroup(rows, step):
+    """Fusionner des buckets consécutifs dans des intervalles de `step` secondes"""
+    grouped = []
+    for row in rows:
+        start = (row[0] // step) * step
+        if not grouped or grouped[-1][0] != start:
+            grouped.append(_empty_bucket(start))
+        _merge(grouped[-1], row)
+    return grouped
+
+
+def _columns(rows) -> Dict[str, List[float]]:
+    """Convertir des buckets en colonnes : moyenne, min, max et somme par compteur"""
+    columns = {'timestamp': [row[0] for row in rows]}
+    for index, metric in enumerate(ROLLUP_METRICS):
+        base = 3 + 3 * index
+        rate = RATE_NAMES[metric]
+        columns[rate] = [row[base] / row[2] if row[2] > 0 else 0.0 for row in rows]
+        columns[f'{rate}_min'] = [row[base + 1] for row in rows]
+        columns[f'{rate}_max'] = [row[base + 2] for row in rows]
+        columns[metric] = [row[base] for row in rows]
+    return columns
@@ -0,0 +1,61 @@
+import logging
+import os
+import signal
+import threading
+
+from backend.network_manager import metrics
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.persistence import SampleWriter
+from backend.network_manager.segments import SegmentStore, segment_dir
+from backend.network_manager.shared_snapshot import SharedSnapshotWriter
+from backend.network_manager.system_config import ConfigWatcher, config_path
+
+# Segment partagé par défaut : /dev/shm reste en mémoire
+DEFAULT_SNAPSHOT_PATH = '/dev/shm/nbm_stats_snapshot'
+
+
+def snapshot_path() -> str:
+    return os.environ.get('NBM_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+
+
+def main():
+    """Processus d'échantillonnage unique : publie l'instantané pour tous les workers WSGI.
+
+    Lancer `python -m backend.network_manager.sampler`, puis les workers avec
+    NBM_STATS_MODE=reader et le même NBM_SNAPSHOT_PATH.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    database_url = os.environ.get('DATABASE_URL')
+    writer = SharedSnapshotWriter(snapshot_path())
+    monitor = AdvancedNetworkMonitor(
+        sinks=[SampleWriter(database_url)] if database_url else None,
+        snapshot_writer=writer,
+        segment_store=SegmentStore(segment_dir()) if segment_dir() else None
+    )
+
+    # Métriques de l'ordonnanceur de ce processus (les workers WSGI n'échantillonnent pas)
+    metrics_port = os.environ.get('NBM_METRICS_PORT')
+    if metrics_port:
+        metrics.REGISTRY.register(metrics.Gauge(
+            'nbm_monitored_interfaces', 'Interfaces présentes dans le dernier instantané',
+            lambda: len(monitor.snapshot.network_stats)))
+        metrics.REGISTRY.register(metrics.Gauge(
+            'nbm_queue_depth', 'Éléments en attente dans les files des consommateurs asynchrones',
+            lambda: {'stats_log': monitor.stats_logger.queue_depth()} if monitor.stats_logger else None,
+            ('queue',)))
+        metrics.serve(metrics.REGISTRY, int(metrics_port))
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    # Configuration modifiée par les workers via /api/system/config : rechargée à chaud
+    ConfigWatcher(config_path(), monitor).start(monitor.scheduler)
+    monitor.start_monitoring()
+    stopped.wait()
+    monitor.stop_monitoring()
+    writer.close()
+
+
+if __name__ == '__main__':
+    main()
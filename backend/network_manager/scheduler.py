@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from backend.network_manager.metrics import MISSED_TICKS, TICK_SECONDS, WAKEUP_DELAY_SECONDS
+
+# Intervalle minimal supporté entre deux échantillons (secondes)
+MIN_INTERVAL = 0.1
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """Tâche périodique enregistrée auprès d'un SamplingScheduler"""
+
+    def __init__(self, callback: Callable[[], None], interval: float):
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"L'intervalle minimal est de {MIN_INTERVAL} s")
+        self.callback = callback
+        self.interval = interval
+        # Label des métriques de l'ordonnanceur
+        self.name = getattr(callback, '__qualname__', repr(callback))
+        self.deadline = 0.0
+        self.cancelled = False
+        self.queued = False
+        self.entry = None
+        self.missed_ticks = 0
+
+
+class SamplingScheduler:
+    """Ordonnanceur à échéances absolues sur l'horloge monotone.
+
+    Chaque tâche est réveillée à `début + k * intervalle` : la durée du
+    travail ne décale pas les périodes suivantes. Si une échéance est
+    dépassée de plus d'un intervalle, les ticks manqués sont sautés au lieu
+    d'être rattrapés en rafale. Un seul thread pilote toutes les tâches.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def add_job(self, callback: Callable[[], None], interval: float, run_immediately: bool = True) -> ScheduledJob:
+        """Enregistrer une tâche périodique"""
+        job = ScheduledJob(callback, interval)
+        with self._condition:
+            job.deadline = self.clock() + (0 if run_immediately else interval)
+            self._push(job)
+            self._condition.notify()
+        return job
+
+    def remove_job(self, job: ScheduledJob):
+        """Annuler une tâche ; elle sera retirée à sa prochaine échéance"""
+        with self._condition:
+            job.cancelled = True
+            self._condition.notify()
+
+    def set_interval(self, job: ScheduledJob, interval: float):
+        """Changer la période d'une tâche sans redémarrer le thread.
+
+        Une période plus courte avance l'échéance en attente ; appelée depuis
+        le callback, elle s'applique à l'échéance suivante.
+        """
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"L'intervalle minimal est de {MIN_INTERVAL} s")
+        with self._condition:
+            previous, job.interval = job.interval, interval
+            if job.queued and interval < previous:
+                deadline = max(self.clock(), job.deadline - previous + interval)
+                if deadline < job.deadline:
+                    # L'entrée précédente, périmée, est ignorée au dépilement
+                    job.deadline = deadline
+                    self._push(job)
+                    self._condition.notify()
+
+    def _push(self, job: ScheduledJob):
+        # Seule la dernière entrée d'une tâche est valide
+        job.entry = next(self._sequence)
+        job.queued = True
+        heapq.heappush(self._queue, (job.deadline, job.entry, job))
+
+    def start(self):
+        """Démarrer le thread de l'ordonnanceur"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='sampling-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread de l'ordonnanceur"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _next_due_job(self) -> Optional[ScheduledJob]:
+        """Attendre la prochaine échéance et renvoyer la tâche correspondante"""
+        with self._condition:
+            while self._running:
+                while self._queue and (self._queue[0][2].cancelled or self._queue[0][1] != self._queue[0][2].entry):
+                    heapq.heappop(self._queue)
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                deadline, _, job = self._queue[0]
+                remaining = deadline - self.clock()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._queue)
+                job.queued = False
+                return job
+        return None
+
+    def _reschedule(self, job: ScheduledJob):
+        """Calculer l'échéance suivante sans dériver"""
+        next_deadline = job.deadline + job.interval
+        now = self.clock()
+        if next_deadline <= now:
+            skipped = int((now - next_deadline) // job.interval) + 1
+            job.missed_ticks += skipped
+            MISSED_TICKS.inc(job.name, amount=skipped)
+            next_deadline += skipped * job.interval
+        job.deadline = next_deadline
+        with self._condition:
+            if not job.cancelled:
+                self._push(job)
+
+    def _run(self):
+        while True:
+            job = self._next_due_job()
+            if job is None:
+                return
+            WAKEUP_DELAY_SECONDS.observe(max(0.0, self.clock() - job.deadline), job.name)
+            started = time.perf_counter()
+            try:
+                job.callback()
+            except Exception:
+                logger.exception("Erreur lors de l'exécution d'une tâche d'échantillonnage")
+            TICK_SECONDS.observe(time.perf_counter() - started, job.name)
+            self._reschedule(job)
@@ -0,0 +1,375 @@
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.network_manager.rollups import DAY, RATE_NAMES, ROLLUP_METRICS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NBMSEG01'
+# En-tête : magic, version, type d'enregistrement, résolution (s), nombre d'enregistrements validés,
+# premier et dernier horodatage (index des plages temporelles)
+HEADER = struct.Struct('<8sHHIQdd24x')
+VERSION = 1
+
+# Échantillon brut : deltas des compteurs sur `elapsed` secondes
+SAMPLE_DTYPE = np.dtype([('timestamp', '<f8'), ('elapsed', '<f8')] + [(metric, '<f8') for metric in ROLLUP_METRICS])
+# Bucket agrégé, mêmes colonnes que les buckets de RollupSeries
+BUCKET_DTYPE = np.dtype([('timestamp', '<f8'), ('count', '<f8'), ('elapsed', '<f8')] + [
+    (f'{metric}{suffix}', '<f8') for metric in ROLLUP_METRICS for suffix in ('', '_min', '_max')
+])
+KIND_SAMPLE, KIND_BUCKET = 0, 1
+DTYPES = {KIND_SAMPLE: SAMPLE_DTYPE, KIND_BUCKET: BUCKET_DTYPE}
+
+# (résolution, rétention) en secondes : les fichiers plus anciens que la rétention
+# sont compactés dans le niveau suivant, puis supprimés
+DEFAULT_LEVELS = [(1, 7 * DAY), (60, 90 * DAY), (3600, 2 * 365 * DAY)]
+DEFAULT_SEGMENT_DIR = '/var/lib/network-manager/segments'
+
+
+def segment_dir() -> Optional[str]:
+    """Répertoire des segments ; NBM_SEGMENT_DIR vide désactive l'historique sur disque"""
+    return os.environ.get('NBM_SEGMENT_DIR', DEFAULT_SEGMENT_DIR) or None
+
+
+def _day(timestamp: float) -> int:
+    return int(timestamp // DAY)
+
+
+def _day_name(day: int) -> str:
+    return f"{datetime.fromtimestamp(day * DAY, tz=timezone.utc):%Y%m%d}.seg"
+
+
+def _parse_day(name: str) -> Optional[int]:
+    try:
+        moment = datetime.strptime(name[:-4], '%Y%m%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return int(moment.timestamp()) // DAY
+
+
+class Segment:
+    """Fichier de segment projeté en mémoire, en lecture seule.
+
+    Les enregistrements sont de taille fixe et triés par horodatage : une
+    plage se trouve par dichotomie sur la colonne projetée et se lit comme
+    une vue NumPy, sans copie. Seul le nombre d'enregistrements validés de
+    l'en-tête est relu à chaque requête pour suivre les ajouts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = -1
+        self.records = None
+
+    def refresh(self) -> bool:
+        """Relire l'en-tête ; renvoie False si le fichier est absent ou invalide"""
+        try:
+            with open(self.path, 'rb') as segment_file:
+                raw = segment_file.read(HEADER.size)
+        except OSError:
+            return False
+        if len(raw) < HEADER.size:
+            return False
+        magic, _, kind, _, count, _, _ = HEADER.unpack(raw)
+        if magic != MAGIC or kind not in DTYPES:
+            return False
+        if count != self.count:
+            dtype = DTYPES[kind]
+            self.records = np.memmap(self.path, dtype=dtype, mode='r', offset=HEADER.size, shape=(count,)) \
+                if count else np.empty(0, dtype=dtype)
+            self.count = count
+        return True
+
+    def slice(self, since: Optional[float], until: Optional[float]) -> np.ndarray:
+        timestamps = self.records['timestamp']
+        start = 0 if since is None else int(np.searchsorted(timestamps, since, 'left'))
+        end = len(timestamps) if until is None else int(np.searchsorted(timestamps, until, 'left'))
+        return self.records[start:end]
+
+
+def _append(path: str, kind: int, resolution: int, records: np.ndarray):
+    """Ajouter des enregistrements puis valider le nouveau total dans l'en-tête"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dtype = DTYPES[kind]
+    if not os.path.exists(path):
+        with open(path, 'wb') as segment_file:
+            segment_file.write(HEADER.pack(MAGIC, VERSION, kind, resolution, 0, np.nan, np.nan))
+    with open(path, 'r+b') as segment_file:
+        _, _, _, _, count, first, last = HEADER.unpack(segment_file.read(HEADER.size))
+        if count:
+            # Horloge revenue en arrière : l'ordre chronologique du fichier prime
+            records = records[records['timestamp'] > last]
+        if not len(records):
+            return
+        segment_file.seek(HEADER.size + count * dtype.itemsize)
+        segment_file.write(records.astype(dtype, copy=False).tobytes())
+        segment_file.flush()
+        # Un enregistrement au-delà du total validé (arrêt brutal) est ignoré puis écrasé
+        first = records['timestamp'][0] if not count else first
+        segment_file.seek(0)
+        segment_file.write(HEADER.pack(MAGIC, VERSION, kind, resolution, count + len(records),
+                                       first, records['timestamp'][-1]))
+
+
+def _as_buckets(records: np.ndarray) -> Dict[str, np.ndarray]:
+    """Colonnes de buckets d'enregistrements bruts (un bucket par échantillon) ou agrégés"""
+    if records.dtype == BUCKET_DTYPE:
+        return {name: records[name] for name in BUCKET_DTYPE.names}
+    elapsed = records['elapsed']
+    columns = {'timestamp': records['timestamp'], 'count': np.ones(len(records)), 'elapsed': elapsed}
+    for metric in ROLLUP_METRICS:
+        rate = np.divide(records[metric], elapsed, out=np.zeros(len(records)), where=elapsed > 0)
+        columns[metric] = records[metric]
+        columns[f'{metric}_min'] = rate
+        columns[f'{metric}_max'] = rate
+    return columns
+
+
+def _records(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Enregistrements BUCKET_DTYPE à partir de colonnes"""
+    records = np.empty(len(columns['timestamp']), dtype=BUCKET_DTYPE)
+    for name in BUCKET_DTYPE.names:
+        records[name] = columns[name]
+    return records
+
+
+def _regroup(columns: Dict[str, np.ndarray], step: float) -> Dict[str, np.ndarray]:
+    """Fusionner des buckets triés dans des intervalles de `step` secondes"""
+    if not len(columns['timestamp']):
+        return columns
+    starts = np.floor(columns['timestamp'] / step) * step
+    index = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    grouped = {'timestamp': starts[index]}
+    for name, values in columns.items():
+        if name == 'timestamp':
+            continue
+        reduce = np.minimum if name.endswith('_min') else np.maximum if name.endswith('_max') else np.add
+        grouped[name] = reduce.reduceat(values, index)
+    return grouped
+
+
+class SegmentStore:
+    """Historique long terme dans des segments colonnaires journaliers, un fichier par interface.
+
+    Arborescence : <root>/<résolution>s/<interface>/<AAAAMMJJ>.seg. Le monitor
+    ajoute les échantillons bruts par lots ; les lecteurs (y compris d'autres
+    processus) projettent les fichiers à la demande : le démarrage ne relit
+    rien. Les jours plus anciens que la rétention d'un niveau sont compactés
+    dans le niveau suivant.
+    """
+
+    def __init__(self, root: str, levels: Optional[List[Tuple[int, int]]] = None, flush_interval: float = 5.0):
+        self.root = root
+        self.levels = list(levels or DEFAULT_LEVELS)
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[tuple]] = {}
+        self._last_flush = time.monotonic()
+        self._compacted_day = None
+        # Buckets de l'intervalle en cours, par (interface, niveau)
+        self._carry: Dict[Tuple[str, int], np.ndarray] = {}
+        self._segments: Dict[str, Segment] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _directory(self, level: int, interface: str) -> str:
+        if os.sep in interface or interface.startswith('.'):
+            raise ValueError(f'Interface invalide : {interface}')
+        return os.path.join(self.root, f'{self.levels[level][0]}s', interface)
+
+    def _path(self, level: int, interface: str, day: int) -> str:
+        return os.path.join(self._directory(level, interface), _day_name(day))
+
+    # Écriture (processus d'échantillonnage uniquement)
+
+    def add(self, interface: str, timestamp: float, elapsed: float, deltas: Sequence[float]):
+        """Déposer un échantillon ; les fichiers sont écrits par lots toutes les `flush_interval` s"""
+        self._pending.setdefault(interface, []).append((timestamp, elapsed, *deltas))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        self._last_flush = time.monotonic()
+        latest = None
+        with self._write_lock:
+            for interface, rows in pending.items():
+                latest = max(latest or rows[-1][0], rows[-1][0])
+                try:
+                    samples = np.array(rows, dtype=SAMPLE_DTYPE)
+                    self._write(0, interface, samples)
+                    self._roll_up(1, interface, samples)
+                except (OSError, ValueError):
+                    logger.exception("Écriture du segment impossible pour %s", interface)
+        # Compactage au premier lot de chaque jour, hors du thread d'échantillonnage
+        if latest is not None and _day(latest) != self._compacted_day:
+            self._compacted_day = _day(latest)
+            threading.Thread(target=self.compact, args=(latest,), name='segment-compaction', daemon=True).start()
+
+    def _write(self, level: int, interface: str, records: np.ndarray):
+        """Ajouter des enregistrements triés dans les fichiers journaliers d'un niveau"""
+        kind = KIND_SAMPLE if records.dtype == SAMPLE_DTYPE else KIND_BUCKET
+        days = (records['timestamp'] // DAY).astype(np.int64)
+        for day in np.unique(days):
+            _append(self._path(level, interface, int(day)), kind, self.levels[level][0], records[days == day])
+
+    def _roll_up(self, level: int, interface: str, records: np.ndarray):
+        """Tenir les niveaux grossiers à jour : seuls les intervalles clos y sont écrits.
+
+        Les enregistrements de l'intervalle en cours sont retenus jusqu'au lot
+        suivant ; perdus à l'arrêt, ils sont reconstitués par le compactage.
+        """
+        if level >= len(self.levels) or not len(records):
+            return
+        resolution = self.levels[level][0]
+        buckets = _records(_as_buckets(records))
+        carry = self._carry.get((interface, level))
+        if carry is not None:
+            buckets = np.concatenate((carry, buckets))
+        starts = buckets['timestamp'] // resolution
+        self._carry[(interface, level)] = buckets[starts == starts[-1]]
+        closed = buckets[starts < starts[-1]]
+        if not len(closed):
+            return
+        grouped = _records(_regroup(_as_buckets(closed), resolution))
+        self._write(level, interface, grouped)
+        self._roll_up(level + 1, interface, grouped)
+
+    def compact(self, now: Optional[float] = None):
+        """Reconstruire le niveau suivant des jours plus anciens que la rétention de leur niveau, puis les supprimer"""
+        now = time.time() if now is None else now
+        with self._write_lock:
+            for level, (_, retention) in enumerate(self.levels):
+                for interface, day, path in self._files(level):
+                    if (day + 1) * DAY > now - retention:
+                        continue
+                    try:
+                        if level + 1 < len(self.levels):
+                            self._compact_file(level, interface, day, path)
+                        os.remove(path)
+                    except (OSError, ValueError):
+                        logger.exception("Compactage impossible : %s", path)
+                        continue
+                    with self._lock:
+                        self._segments.pop(path, None)
+
+    def _compact_file(self, level: int, interface: str, day: int, path: str):
+        """Remplacer le fichier du niveau suivant par l'agrégat complet de la source.
+
+        Le niveau suivant, tenu à jour pendant l'échantillonnage, peut manquer
+        les intervalles en cours lors d'un redémarrage.
+        """
+        segment = Segment(path)
+        if not segment.refresh():
+            return
+        resolution = self.levels[level + 1][0]
+        records = _records(_regroup(_as_buckets(segment.records), resolution))
+        target = self._path(level + 1, interface, day)
+        # Écriture complète sous un nom temporaire puis renommage atomique
+        if os.path.exists(target + '.tmp'):
+            os.remove(target + '.tmp')
+        _append(target + '.tmp', KIND_BUCKET, resolution, records)
+        os.replace(target + '.tmp', target)
+
+    # Lecture
+
+    def _files(self, level: int, interface: Optional[str] = None) -> Iterable[Tuple[str, int, str]]:
+        base = os.path.join(self.root, f'{self.levels[level][0]}s')
+        interfaces = [interface] if interface else (os.listdir(base) if os.path.isdir(base) else [])
+        for name in interfaces:
+            directory = os.path.join(base, name)
+            if not os.path.isdir(directory):
+                continue
+            for file_name in os.listdir(directory):
+                day = _parse_day(file_name) if file_name.endswith('.seg') else None
+                if day is not None:
+                    yield name, day, os.path.join(directory, file_name)
+
+    def interfaces(self) -> List[str]:
+        names = set()
+        for level in range(len(self.levels)):
+            base = os.path.join(self.root, f'{self.levels[level][0]}s')
+            if os.path.isdir(base):
+                names.update(os.listdir(base))
+        return sorted(names)
+
+    def _segment(self, path: str) -> Optional[Segment]:
+        with self._lock:
+            segment = self._segments.get(path)
+            if segment is None:
+                segment = self._segments[path] = Segment(path)
+        if not segment.refresh():
+            with self._lock:
+                self._segments.pop(path, None)
+            return None
+        return segment
+
+    def select_level(self, step: Optional[float]) -> int:
+        """Niveau le plus grossier dont la résolution ne dépasse pas `step`"""
+        level = 0
+        for index, (resolution, _) in enumerate(self.levels):
+            if step is not None and resolution <= step:
+                level = index
+        return level
+
+    def query(self, interface: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, step: Optional[float] = None) -> List[Dict]:
+        """Historique au pas demandé, au format de RollupEngine.query.
+
+        Pour chaque jour, le niveau le plus proche de `step` disponible est lu,
+        complété par les niveaux plus fins pour les intervalles pas encore clos ;
+        un jour déjà compacté est lu dans le premier niveau plus grossier restant.
+        """
+        level = self.select_level(step)
+        preference = list(range(level, -1, -1)) + list(range(level + 1, len(self.levels)))
+        result = []
+        for name in ([interface] if interface else self.interfaces()):
+            days: Dict[int, Dict[int, str]] = {}
+            for candidate in preference:
+                for _, day, path in self._files(candidate, name):
+                    if (since is None or (day + 1) * DAY > since) and (until is None or day * DAY < until):
+                        days.setdefault(day, {})[candidate] = path
+            parts, resolution = [], self.levels[level][0]
+            for day in sorted(days):
+                start = since
+                for candidate in preference:
+                    path = days[day].get(candidate)
+                    segment = self._segment(path) if path else None
+                    if segment is None:
+                        continue
+                    records = segment.slice(start, until)
+                    if len(records):
+                        parts.append(_as_buckets(records))
+                        resolution = max(resolution, self.levels[candidate][0])
+                        start = records['timestamp'][-1] + self.levels[candidate][0]
+                    if candidate > level:
+                        break
+            if not parts:
+                continue
+            columns = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+            if step and step > self.levels[0][0]:
+                columns = _regroup(columns, step)
+            entry = {'interface': name, 'resolution': max(step or 0, resolution)}
+            entry.update(_columns(columns))
+            result.append(entry)
+        return result
+
+
+def _columns(columns: Dict[str, np.ndarray]) -> Dict[str, List[float]]:
+    """Colonnes de sortie : vitesse moyenne, min et max et somme par compteur"""
+    elapsed = columns['elapsed']
+    output = {'timestamp': columns['timestamp'].tolist()}
+    for metric in ROLLUP_METRICS:
+        rate = RATE_NAMES[metric]
+        output[rate] = np.divide(columns[metric], elapsed, out=np.zeros(len(elapsed)),
+                                 where=elapsed > 0).tolist()
+        output[f'{rate}_min'] = columns[f'{metric}_min'].tolist()
+        output[f'{rate}_max'] = columns[f'{metric}_max'].tolist()
+        output[metric] = columns[metric].tolist()
+    return output
@@ -0,0 +1,389 @@
+import errno
+import logging
+import os
+import re
+import socket
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from backend.network_manager.ip_blocker import KERNEL_ERRORS, BatchValidationError
+from backend.network_manager.prefix_trie import WIDTHS, format_prefix, parse_prefix
+
+logger = logging.getLogger(__name__)
+
+# Disposition HTB par interface : qdisc racine 1:, classe racine 1:1 (débit du lien),
+# classe par défaut 1:fffe pour le trafic non limité, une classe 1:n par règle
+TC_H_ROOT = 0xffffffff
+ROOT_QDISC = 0x10000
+ROOT_CLASS = 0x10001
+DEFAULT_CLASS = 0x1fffe
+FIRST_MINOR, LAST_MINOR = 0x2, 0xfffd
+
+ETH_P_IP, ETH_P_IPV6 = 0x0800, 0x86dd
+# Décalage des adresses dans l'en-tête IP (octets) : (source, destination)
+ADDRESS_OFFSETS = {4: (12, 16), 6: (8, 24)}
+
+RATE_UNITS = {
+    'bit': 1, 'kbit': 10 ** 3, 'mbit': 10 ** 6, 'gbit': 10 ** 9, 'tbit': 10 ** 12,
+    'bps': 8, 'kbps': 8 * 10 ** 3, 'mbps': 8 * 10 ** 6, 'gbps': 8 * 10 ** 9, 'tbps': 8 * 10 ** 12,
+}
+_RATE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*$')
+
+
+def parse_rate(rate) -> int:
+    """Débit en bits/s depuis un nombre (bits/s) ou une chaîne à la tc ('10mbit', '2mbps')"""
+    if isinstance(rate, bool):
+        raise ValueError(f'Débit invalide : {rate}')
+    if isinstance(rate, (int, float)):
+        value = rate
+    else:
+        match = _RATE.match(str(rate).lower())
+        if not match or match.group(2) not in RATE_UNITS and match.group(2):
+            raise ValueError(f'Débit invalide : {rate}')
+        value = float(match.group(1)) * RATE_UNITS[match.group(2) or 'bit']
+    if value < 8:
+        raise ValueError(f'Débit trop faible : {rate}')
+    return int(value)
+
+
+def u32_keys(prefix, match: str) -> List[str]:
+    """Clés u32 ('valeur/masque+décalage', mots de 32 bits) d'un préfixe source ou destination"""
+    version, network, length = prefix
+    width = WIDTHS[version]
+    offset = ADDRESS_OFFSETS[version][0 if match == 'src' else 1]
+    mask = ((1 << length) - 1) << (width - length)
+    keys = []
+    for word in range(width // 32):
+        shift = width - 32 * (word + 1)
+        word_mask = (mask >> shift) & 0xffffffff
+        if word_mask or not keys and word == width // 32 - 1:
+            keys.append(f'0x{(network >> shift) & 0xffffffff:08x}/0x{word_mask:08x}+{offset + 4 * word}')
+    return keys
+
+
+class TcOperation(NamedTuple):
+    """Une requête netlink tc : arguments de `IPRoute.tc` avec le nom de l'interface"""
+    command: str
+    kind: str
+    interface: str
+    handle: int = 0
+    params: Dict = {}
+
+
+class ShapingBackend:
+    """Backend noyau du contrôle de trafic"""
+
+    def has_interface(self, interface: str) -> bool:
+        raise NotImplementedError
+
+    def apply(self, operations: List[TcOperation]):
+        """Appliquer les opérations dans l'ordre ; lève OSError si l'une échoue"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libérer le socket netlink"""
+
+
+class RecordingShapingBackend(ShapingBackend):
+    """Backend hors ligne : enregistre les lots de requêtes netlink au lieu de les envoyer"""
+
+    def __init__(self, interfaces: Optional[Iterable[str]] = None):
+        self.interfaces = set(interfaces) if interfaces is not None else None
+        self.batches: List[List[TcOperation]] = []
+
+    def has_interface(self, interface):
+        return self.interfaces is None or interface in self.interfaces
+
+    def apply(self, operations):
+        self.batches.append(list(operations))
+
+
+class NetlinkShapingBackend(ShapingBackend):
+    """Requêtes tc encodées par pyroute2 et envoyées en un seul message netlink.
+
+    Toutes les opérations d'un lot sont concaténées (IPBatch) puis envoyées
+    par un seul `sendto` ; les acquittements sont lus ensuite. Des centaines
+    de classes et de filtres s'appliquent ainsi sans un processus `tc` par règle.
+    """
+
+    def __init__(self, ipr=None):
+        from pyroute2 import IPBatch, IPRoute
+        self._batch_class = IPBatch
+        # Socket netlink fourni (tests) ou ouvert ici
+        self._ipr = ipr if ipr is not None else IPRoute()
+        self._indexes: Dict[str, int] = {}
+
+    def _index(self, interface: str) -> Optional[int]:
+        if interface not in self._indexes:
+            indexes = self._ipr.link_lookup(ifname=interface)
+            if not indexes:
+                return None
+            self._indexes[interface] = indexes[0]
+        return self._indexes[interface]
+
+    def has_interface(self, interface):
+        return self._index(interface) is not None
+
+    def apply(self, operations):
+        if not operations:
+            return
+        batch = self._batch_class()
+        for operation in operations:
+            kind, params = operation.kind, operation.params
+            if operation.command == 'del-filter':
+                # pyroute2 exige la cible et les clés u32 dès qu'un paramètre de filtre est fourni :
+                # priorité et protocole passent directement dans le champ `info` du message
+                kind, params = None, {
+                    'parent': params['parent'], 'info': socket.htons(params['protocol']) | params['prio'] << 16
+                }
+            batch.tc(operation.command, kind, self._index(operation.interface), operation.handle, **params)
+        self._ipr.sendto(batch.batch, (0, 0))
+
+        # Un acquittement par requête, dans l'ordre d'envoi
+        failures = []
+        received = 0
+        while received < len(operations):
+            for message in self._ipr.marshal.parse(self._ipr.recv(65536)):
+                error = message['header'].get('error')
+                operation = operations[received]
+                received += 1
+                # Supprimer un élément déjà absent n'est pas une erreur
+                if error is not None and not (operation.command.startswith('del') and error.code == errno.ENOENT):
+                    failures.append(f'{operation.command} {operation.kind} {operation.interface}: {error}')
+        batch.reset()
+        if failures:
+            raise OSError(f'{len(failures)} requête(s) tc refusée(s) : ' + '; '.join(failures[:5]))
+
+    def close(self):
+        self._ipr.close()
+
+
+BACKENDS = {
+    'netlink': NetlinkShapingBackend,
+    'recording': RecordingShapingBackend,
+}
+
+
+def create_shaping_backend(name: str = None) -> ShapingBackend:
+    """Instancier un backend par son nom, ou détecter le plus adapté à l'hôte.
+
+    La variable d'environnement NBM_SHAPING_BACKEND force le choix.
+    """
+    name = name or os.environ.get('NBM_SHAPING_BACKEND', 'auto')
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f'Backend de contrôle de trafic inconnu : {name}')
+        return BACKENDS[name]()
+
+    if os.geteuid() == 0:
+        try:
+            return NetlinkShapingBackend()
+        except (ImportError, OSError):
+            logger.exception("Socket netlink indisponible")
+    logger.warning("Contrôle de trafic indisponible (pyroute2, root requis) : limites enregistrées hors ligne")
+    return RecordingShapingBackend()
+
+
+class BandwidthShaper:
+    """Limitation de débit par adresse ou par sous-réseau (HTB).
+
+    Chaque interface reçoit une qdisc HTB racine ; chaque limite y est une
+    classe HTB associée à un filtre u32 sur l'adresse source ou destination.
+    Sur l'interface côté clients, `dst` limite le trafic descendant vers la
+    cible. Un lot de limites est validé entièrement, puis appliqué en une
+    seule transaction netlink.
+    """
+
+    def __init__(self, backend: Optional[ShapingBackend] = None, default_rate='1gbit'):
+        self.backend = backend or create_shaping_backend()
+        self.default_rate = parse_rate(default_rate)
+        self._lock = threading.Lock()
+        # Interface -> cible normalisée -> règle
+        self._limits: Dict[str, Dict[str, Dict]] = {}
+        # Interfaces dont la qdisc est à reconstruire (jamais configurée, ou échec noyau)
+        self._stale: Set[str] = set()
+
+    # Opérations tc
+
+    def _rebuild_operations(self, interface: str, rules: Dict[str, Dict]) -> List[TcOperation]:
+        """Remplacer la qdisc racine par une qdisc HTB portant exactement `rules`"""
+        rate = f'{self.default_rate}bit'
+        operations = [
+            TcOperation('del', 'htb', interface, ROOT_QDISC, {'parent': TC_H_ROOT}),
+            TcOperation('add', 'htb', interface, ROOT_QDISC, {'parent': TC_H_ROOT, 'default': DEFAULT_CLASS & 0xffff}),
+            TcOperation('add-class', 'htb', interface, ROOT_CLASS, {'parent': ROOT_QDISC, 'rate': rate, 'ceil': rate}),
+            TcOperation('add-class', 'htb', interface, DEFAULT_CLASS, {'parent': ROOT_CLASS, 'rate': rate, 'ceil': rate}),
+        ]
+        for rule in rules.values():
+            operations.append(self._class_operation('add-class', interface, rule))
+            operations.append(self._filter_operation('add-filter', interface, rule))
+        return operations
+
+    @staticmethod
+    def _class_operation(command: str, interface: str, rule: Dict) -> TcOperation:
+        return TcOperation(command, 'htb', interface, ROOT_QDISC | rule['minor'], {
+            'parent': ROOT_CLASS, 'rate': f"{rule['rate']}bit", 'ceil': f"{rule['ceil']}bit"
+        })
+
+    @staticmethod
+    def _filter_operation(command: str, interface: str, rule: Dict) -> TcOperation:
+        prefix = parse_prefix(rule['target'])
+        params = {
+            'parent': ROOT_QDISC,
+            'prio': rule['minor'],
+            'protocol': ETH_P_IP if prefix[0] == 4 else ETH_P_IPV6,
+        }
+        if command == 'add-filter':
+            params.update(target=ROOT_QDISC | rule['minor'], keys=u32_keys(prefix, rule['match']))
+        return TcOperation(command, 'u32', interface, 0, params)
+
+    def _allocate_minor(self, limits: Dict[str, Dict]) -> int:
+        used = {rule['minor'] for rule in limits.values()}
+        for minor in range(FIRST_MINOR, LAST_MINOR + 1):
+            if minor not in used:
+                return minor
+        raise ValueError('Nombre maximal de limites atteint pour cette interface')
+
+    # API publique
+
+    def _parse_limit(self, limit: Dict) -> Dict:
+        """Valider une demande de limite ; lève ValueError si elle est invalide"""
+        if not isinstance(limit, dict):
+            raise ValueError('Limite attendue sous forme d\'objet')
+        interface = limit.get('interface')
+        if not interface or not self.backend.has_interface(interface):
+            raise ValueError(f'Interface inconnue : {interface}')
+        if not limit.get('target'):
+            raise ValueError('Adresse ou CIDR cible requis')
+        match = limit.get('match', 'dst')
+        if match not in ('src', 'dst'):
+            raise ValueError('Sens de correspondance attendu : src ou dst')
+        rate = parse_rate(limit.get('rate'))
+        ceil = parse_rate(limit['ceil']) if limit.get('ceil') is not None else rate
+        if ceil < rate:
+            raise ValueError('Le plafond doit être supérieur ou égal au débit garanti')
+        return {
+            'interface': interface,
+            'target': format_prefix(parse_prefix(limit['target'])),
+            'match': match,
+            'rate': rate,
+            'ceil': ceil,
+        }
+
+    def set_limits(self, limits: Iterable[Dict]) -> List[Dict]:
+        """Créer ou modifier un lot de limites en une seule transaction netlink.
+
+        Toutes les limites sont validées avant toute modification : une seule
+        entrée invalide fait rejeter le lot (BatchValidationError).
+        """
+        parsed, errors = [], []
+        for index, limit in enumerate(limits):
+            try:
+                parsed.append(self._parse_limit(limit))
+            except (TypeError, ValueError) as e:
+                target = limit.get('target') if isinstance(limit, dict) else None
+                errors.append({'index': index, 'target': target, 'message': str(e)})
+        if errors:
+            raise BatchValidationError(errors)
+
+        with self._lock:
+            updated = {interface: dict(rules) for interface, rules in self._limits.items()}
+            rebuilt = {limit['interface'] for limit in parsed
+                       if limit['interface'] not in self._limits or limit['interface'] in self._stale}
+            operations, statuses = [], []
+            for index, limit in enumerate(parsed):
+                interface = limit['interface']
+                rules = updated.setdefault(interface, {})
+                previous = rules.get(limit['target'])
+                if previous is None:
+                    try:
+                        rule = dict(limit, minor=self._allocate_minor(rules))
+                    except ValueError as e:
+                        raise BatchValidationError([{'index': index, 'target': limit['target'], 'message': str(e)}])
+                    statuses.append('created')
+                else:
+                    rule = dict(limit, minor=previous['minor'])
+                    statuses.append('updated')
+                rules[limit['target']] = rule
+                if interface in rebuilt:
+                    continue
+                if previous is None:
+                    operations.append(self._class_operation('add-class', interface, rule))
+                    operations.append(self._filter_operation('add-filter', interface, rule))
+                else:
+                    operations.append(self._class_operation('change-class', interface, rule))
+                    if rule['match'] != previous['match']:
+                        operations.append(self._filter_operation('del-filter', interface, previous))
+                        operations.append(self._filter_operation('add-filter', interface, rule))
+            # Les interfaces reconstruites reçoivent leur qdisc complète en tête du lot
+            operations = [operation for interface in sorted(rebuilt)
+                          for operation in self._rebuild_operations(interface, updated[interface])] + operations
+
+            try:
+                self.backend.apply(operations)
+            except KERNEL_ERRORS:
+                logger.exception("Échec de l'application de %d limite(s)", len(parsed))
+                # Les interfaces touchées seront reconstruites à la prochaine modification
+                self._stale.update(limit['interface'] for limit in parsed)
+                statuses = ['error'] * len(parsed)
+            else:
+                self._limits = updated
+                self._stale -= rebuilt
+
+        logger.info("Lot de limites : %d entrée(s), %d requête(s) netlink", len(parsed), len(operations))
+        return [self._describe(limit, status) for limit, status in zip(parsed, statuses)]
+
+    def clear_limits(self, interface: str, targets: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Retirer des limites d'une interface, ou toutes (suppression de la qdisc racine)"""
+        targets = None if targets is None else [format_prefix(parse_prefix(target)) for target in targets]
+        with self._lock:
+            rules = self._limits.get(interface, {})
+            removed = list(rules) if targets is None else [target for target in dict.fromkeys(targets)
+                                                           if target in rules]
+            remaining = {target: rule for target, rule in rules.items() if target not in removed}
+            if targets is None:
+                operations = [TcOperation('del', 'htb', interface, ROOT_QDISC, {'parent': TC_H_ROOT})]
+            elif interface in self._stale:
+                operations = self._rebuild_operations(interface, remaining)
+            else:
+                operations = []
+                for target in removed:
+                    # Le filtre référence la classe : le retirer d'abord
+                    operations.append(self._filter_operation('del-filter', interface, rules[target]))
+                    operations.append(self._class_operation('del-class', interface, rules[target]))
+            try:
+                if operations:
+                    self.backend.apply(operations)
+            except KERNEL_ERRORS:
+                logger.exception("Échec du retrait des limites de %s", interface)
+                self._stale.add(interface)
+                return [{'interface': interface, 'target': target, 'status': 'error'}
+                        for target in (removed if targets is None else targets)]
+            if targets is None:
+                self._limits.pop(interface, None)
+                self._stale.discard(interface)
+            elif rules:
+                self._limits[interface] = remaining
+                self._stale.discard(interface)
+
+        results = [{'interface': interface, 'target': target, 'status': 'cleared'} for target in removed]
+        if targets is not None:
+            results.extend({'interface': interface, 'target': target, 'status': 'not_limited'}
+                           for target in targets if target not in removed)
+        return results
+
+    def list_limits(self, interface: Optional[str] = None) -> List[Dict]:
+        """Lister les limites actives, éventuellement pour une seule interface"""
+        with self._lock:
+            return [
+                self._describe(rule)
+                for name, rules in sorted(self._limits.items()) if interface in (None, name)
+                for rule in rules.values()
+            ]
+
+    @staticmethod
+    def _describe(rule: Dict, status: Optional[str] = None) -> Dict:
+        description = {key: rule[key] for key in ('interface', 'target', 'match', 'rate', 'ceil')}
+        if status is not None:
+            description['status'] = status
+        return description
@@ -0,0 +1,215 @@
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.network_manager.snapshot import StatsSnapshot
+from backend.network_manager.stream import StatsBroadcaster
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NBMSNAP1'
+
+# Disposition du segment (little-endian) :
+#   0   magic (8 octets)
+#   8   compteur de séquence du seqlock (impair pendant une écriture)
+#   16  en-tête de l'instantané (voir HEADER)
+#   DATA_OFFSET  corps JSON des statistiques puis des anomalies
+SEQUENCE = struct.Struct('<Q')
+HEADER = struct.Struct('<QQdII8s')
+SEQUENCE_OFFSET = 8
+HEADER_OFFSET = 16
+DATA_OFFSET = HEADER_OFFSET + HEADER.size
+
+DEFAULT_SIZE = 1 << 20
+
+
+class SharedSnapshotWriter:
+    """Publication de l'instantané dans un fichier projeté en mémoire.
+
+    Un seul processus d'échantillonnage écrit ; le compteur de séquence
+    (seqlock) est impair pendant l'écriture, si bien que les lecteurs
+    détectent une lecture concurrente et recommencent, sans verrou partagé.
+    Un fichier sous /dev/shm reste en mémoire.
+    """
+
+    def __init__(self, path: str, size: int = DEFAULT_SIZE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        # Ne jamais réduire un segment existant : un lecteur peut encore le projeter en entier
+        self._size = max(size, DATA_OFFSET, os.fstat(self._fd).st_size)
+        os.ftruncate(self._fd, self._size)
+        self._map = mmap.mmap(self._fd, self._size)
+        self._map[:SEQUENCE_OFFSET] = MAGIC
+        # Reprendre la séquence d'un segment existant : les lecteurs ne doivent pas la voir reculer
+        sequence = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+        self._sequence = sequence + (sequence & 1)
+        self._written = None
+
+    def write(self, snapshot: StatsSnapshot):
+        """Écrire l'instantané s'il a changé depuis la dernière écriture"""
+        versions = (snapshot.instance, snapshot.version, snapshot.anomalies_version)
+        if versions == self._written:
+            return
+        stats_body, anomalies_body = snapshot.stats_body, snapshot.anomalies_body
+        needed = DATA_OFFSET + len(stats_body) + len(anomalies_body)
+        if needed > self._size:
+            self._grow(needed)
+
+        timestamp = snapshot.timestamp if snapshot.timestamp is not None else math.nan
+        self._sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self._sequence)
+        HEADER.pack_into(self._map, HEADER_OFFSET, snapshot.version, snapshot.anomalies_version, timestamp,
+                         len(stats_body), len(anomalies_body), snapshot.instance.encode()[:8])
+        end = DATA_OFFSET + len(stats_body)
+        self._map[DATA_OFFSET:end] = stats_body
+        self._map[end:end + len(anomalies_body)] = anomalies_body
+        self._sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self._sequence)
+        self._written = versions
+
+    def _grow(self, needed: int):
+        """Agrandir le segment ; les lecteurs le projettent à nouveau à la lecture suivante"""
+        size = self._size
+        while size < needed:
+            size *= 2
+        self._map.close()
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._size = size
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SharedSnapshotReader:
+    """Lecture de l'instantané publié par le processus d'échantillonnage.
+
+    Expose la même interface que le monitor pour les routes (`snapshot`,
+    `broadcaster`, `get_current_stats`). Une requête ne lit que le compteur
+    de séquence : le segment n'est copié et décodé qu'une fois par tick et
+    par worker, lorsqu'il a changé.
+    """
+
+    def __init__(self, path: str, max_retries: int = 100, poll_interval: float = 0.2, segment_store=None):
+        self.path = path
+        # Segments écrits par le processus d'échantillonnage, projetés en lecture seule
+        self.segment_store = segment_store
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+        self._map: Optional[mmap.mmap] = None
+        self._sequence = None
+        self._snapshot = StatsSnapshot.empty()
+        self._lock = threading.Lock()
+        self._broadcaster: Optional[StatsBroadcaster] = None
+        self._follower: Optional[threading.Thread] = None
+
+    def _open(self) -> bool:
+        try:
+            with open(self.path, 'rb') as segment:
+                self._map = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Segment absent ou vide : le processus d'échantillonnage n'a pas encore démarré
+            return False
+        if self._map[:SEQUENCE_OFFSET] != MAGIC:
+            self._map.close()
+            self._map = None
+            return False
+        return True
+
+    @property
+    def snapshot(self) -> StatsSnapshot:
+        segment = self._map
+        if segment is not None and SEQUENCE.unpack_from(segment, SEQUENCE_OFFSET)[0] == self._sequence:
+            return self._snapshot
+        with self._lock:
+            if self._map is None and not self._open():
+                return self._snapshot
+            return self._refresh()
+
+    def _refresh(self) -> StatsSnapshot:
+        for _ in range(self.max_retries):
+            before = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+            if before == self._sequence:
+                return self._snapshot
+            if before & 1:
+                # Écriture en cours
+                time.sleep(0)
+                continue
+            version, anomalies_version, timestamp, stats_length, anomalies_length, instance = \
+                HEADER.unpack_from(self._map, HEADER_OFFSET)
+            end = DATA_OFFSET + stats_length + anomalies_length
+            if end > len(self._map):
+                # Segment agrandi par l'écrivain : le projeter à nouveau (l'ancienne
+                # projection, peut-être encore lue par une requête, est libérée par le GC)
+                self._map = None
+                if not self._open():
+                    return self._snapshot
+                continue
+            stats_body = self._map[DATA_OFFSET:DATA_OFFSET + stats_length]
+            anomalies_body = self._map[DATA_OFFSET + stats_length:end]
+            if SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0] != before:
+                continue
+            try:
+                network_stats = json.loads(stats_body)['network_stats']
+                anomalies = json.loads(anomalies_body)['anomalies']
+            except (ValueError, KeyError):
+                logger.exception("Instantané partagé illisible : %s", self.path)
+                return self._snapshot
+            self._snapshot = StatsSnapshot(
+                version=version,
+                anomalies_version=anomalies_version,
+                timestamp=None if math.isnan(timestamp) else timestamp,
+                network_stats=tuple(network_stats),
+                anomalies=tuple(anomalies),
+                stats_body=stats_body,
+                anomalies_body=anomalies_body,
+                instance=instance.decode()
+            )
+            self._sequence = before
+            return self._snapshot
+        logger.warning("Instantané partagé instable, version précédente servie")
+        return self._snapshot
+
+    def get_current_stats(self):
+        return [dict(stats) for stats in self.snapshot.network_stats]
+
+    def get_history(self, interface=None, since=None, step=None):
+        if self.segment_store is None:
+            raise RuntimeError("Historique disponible uniquement dans le processus d'échantillonnage")
+        return self.segment_store.query(interface, since, step=step)
+
+    @property
+    def broadcaster(self) -> StatsBroadcaster:
+        """Diffuseur local alimenté par le segment partagé (démarré au premier abonné)"""
+        with self._lock:
+            if self._broadcaster is None:
+                self._broadcaster = StatsBroadcaster()
+                self._follower = threading.Thread(target=self._follow, name='snapshot-follower', daemon=True)
+                self._follower.start()
+        return self._broadcaster
+
+    def _follow(self):
+        """Convertir chaque nouvel instantané en delta pour les abonnés SSE du worker"""
+        published: Dict[str, Dict] = {}
+        anomalies_version = None
+        version = None
+        while True:
+            snapshot = self.snapshot
+            if (snapshot.instance, snapshot.version, snapshot.anomalies_version) != version:
+                current = {stats['interface']: stats for stats in snapshot.network_stats}
+                changed = [stats for name, stats in current.items() if published.get(name) != stats]
+                removed = [name for name in published if name not in current]
+                if changed or removed or snapshot.anomalies_version != anomalies_version:
+                    self._broadcaster.publish(snapshot.timestamp, changed, removed, list(snapshot.anomalies))
+                published = current
+                anomalies_version = snapshot.anomalies_version
+                version = (snapshot.instance, snapshot.version, snapshot.anomalies_version)
+            time.sleep(self.poll_interval)
@@ -0,0 +1,75 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+# Identifiant propre au processus : un ETag ne reste pas valide après un redémarrage
+_INSTANCE_ID = os.urandom(4).hex()
+
+
+def _encode(payload: Dict) -> bytes:
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """Instantané immuable des statistiques, publié une fois par tick.
+
+    Les corps JSON des routes sont construits à la publication : une
+    requête ne fait plus que renvoyer des octets déjà prêts. Le monitor
+    remplace l'instantané par une simple affectation, donc un lecteur voit
+    toujours un état cohérent.
+    """
+    version: int
+    anomalies_version: int
+    timestamp: Optional[float]
+    network_stats: Tuple[Dict, ...]
+    anomalies: Tuple[Dict, ...]
+    stats_body: bytes
+    anomalies_body: bytes
+    # Processus qui a construit l'instantané (partagé entre workers, voir shared_snapshot)
+    instance: str = _INSTANCE_ID
+
+    @property
+    def stats_etag(self) -> str:
+        return f'{self.instance}-s{self.version}'
+
+    @property
+    def anomalies_etag(self) -> str:
+        return f'{self.instance}-a{self.anomalies_version}'
+
+    @classmethod
+    def empty(cls) -> 'StatsSnapshot':
+        return cls.build(None, None, (), ())
+
+    @classmethod
+    def build(cls, previous: Optional['StatsSnapshot'], timestamp: Optional[float],
+              network_stats: Sequence[Dict], anomalies: Sequence[Dict], changed: bool = True) -> 'StatsSnapshot':
+        """Construire l'instantané suivant en ne re-sérialisant que ce qui a changé"""
+        anomalies = tuple(anomalies)
+        if previous is None:
+            version, anomalies_version = 0, 0
+            stats_body = anomalies_body = None
+        else:
+            version = previous.version + (1 if changed else 0)
+            stats_body = None if changed else previous.stats_body
+            if anomalies == previous.anomalies:
+                anomalies_version, anomalies_body = previous.anomalies_version, previous.anomalies_body
+            else:
+                anomalies_version, anomalies_body = previous.anomalies_version + 1, None
+
+        network_stats = tuple(network_stats)
+        if stats_body is None:
+            stats_body = _encode({'status': 'success', 'network_stats': network_stats})
+        if anomalies_body is None:
+            anomalies_body = _encode({'status': 'success', 'anomalies': anomalies})
+
+        return cls(
+            version=version,
+            anomalies_version=anomalies_version,
+            timestamp=timestamp,
+            network_stats=network_stats,
+            anomalies=anomalies,
+            stats_body=stats_body,
+            anomalies_body=anomalies_body
+        )
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedStatsLogger:
+    """Journalisation asynchrone et groupée des statistiques réseau.
+
+    L'échantillonneur dépose un enregistrement par tick dans une file
+    bornée ; un thread d'écriture le sérialise en une ligne JSON compacte
+    (une colonne par champ), regroupe les lignes et les écrit lorsque le
+    budget de taille ou de temps est atteint. Le fichier tourne par taille.
+    """
+
+    def __init__(self, path: str, flush_bytes: int = 64 * 1024, flush_interval: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, queue_size: int = 1024):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped_records = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._pending = []
+        self._pending_bytes = 0
+
+    def submit(self, timestamp: float, stats: Iterable) -> bool:
+        """Déposer les statistiques d'un tick sans bloquer l'échantillonneur"""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait((timestamp, stats))
+            return True
+        except queue.Full:
+            self.dropped_records += 1
+            return False
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        """Démarrer le thread d'écriture"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stats-logger', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Vider la file, écrire les lignes en attente et arrêter le thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    @staticmethod
+    def format_record(timestamp: float, stats: Iterable) -> str:
+        """Sérialiser un tick en une ligne JSON colonnaire"""
+        interfaces, uploads, downloads = [], [], []
+        for stat in stats:
+            interfaces.append(stat.interface)
+            uploads.append(round(stat.speed_upload, 1))
+            downloads.append(round(stat.speed_download, 1))
+        return json.dumps({
+            'timestamp': round(timestamp, 3),
+            'interfaces': interfaces,
+            'speed_upload': uploads,
+            'speed_download': downloads
+        }, separators=(',', ':')) + '\n'
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                self._flush()
+                self._close()
+                return
+            if item:
+                line = self.format_record(*item)
+                self._pending.append(line)
+                self._pending_bytes += len(line)
+
+            if self._pending_bytes >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self):
+        """Écrire les lignes en attente en un seul appel"""
+        if not self._pending:
+            return
+        data = ''.join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        try:
+            log_file = self._open()
+            log_file.write(data)
+            log_file.flush()
+            if log_file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            logger.exception("Impossible d'écrire le journal des statistiques réseau")
+            self._close()
+
+    def _rotate(self):
+        """Faire tourner les fichiers : stats.log -> stats.log.1 -> ..."""
+        self._close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
@@ -0,0 +1,122 @@
+import json
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional
+
+
+def format_event(event: str, payload: Dict) -> bytes:
+    """Encoder un message Server-Sent Events"""
+    data = json.dumps(payload, separators=(',', ':'))
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+class Subscription:
+    """Abonnement d'un client au flux de statistiques"""
+
+    def __init__(self, broadcaster: 'StatsBroadcaster', max_pending: int):
+        self._broadcaster = broadcaster
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.lagging = False
+
+    def _deliver(self, message: bytes):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Client trop lent : il sera resynchronisé avec un snapshot complet
+            self.lagging = True
+
+    def events(self, keepalive: float = 15.0) -> Iterator[bytes]:
+        """Générer les messages : snapshot complet, puis uniquement les deltas"""
+        try:
+            yield self._broadcaster.snapshot_event()
+            while True:
+                if self.lagging:
+                    self._drain()
+                    self.lagging = False
+                    yield self._broadcaster.snapshot_event()
+                    continue
+                try:
+                    yield self._queue.get(timeout=keepalive)
+                except queue.Empty:
+                    # Commentaire SSE : maintient la connexion et détecte les déconnexions
+                    yield b': keepalive\n\n'
+        finally:
+            self.close()
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+
+class StatsBroadcaster:
+    """Diffusion des statistiques à tous les abonnés.
+
+    Chaque tick est sérialisé une seule fois, quel que soit le nombre de
+    clients : le même message est ensuite déposé dans la file de chacun.
+    """
+
+    def __init__(self, max_pending: int = 32):
+        self.max_pending = max_pending
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+        self._anomalies: List[Dict] = []
+        self._timestamp: Optional[float] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def stream(self, keepalive: float = 15.0) -> Iterator[bytes]:
+        """Générateur pour une réponse HTTP ; l'abonnement vit autant que la connexion"""
+        subscription = self.subscribe()
+        yield from subscription.events(keepalive)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def snapshot_event(self) -> bytes:
+        """Message complet envoyé à la connexion d'un client"""
+        with self._lock:
+            payload = {
+                'timestamp': self._timestamp,
+                'network_stats': list(self._stats.values()),
+                'anomalies': self._anomalies
+            }
+        return format_event('snapshot', payload)
+
+    def publish(self, timestamp: float, changed: List[Dict], removed: List[str], anomalies: List[Dict]):
+        """Publier le delta d'un tick à tous les abonnés"""
+        with self._lock:
+            for stats in changed:
+                self._stats[stats['interface']] = stats
+            for interface in removed:
+                self._stats.pop(interface, None)
+            self._anomalies = anomalies
+            self._timestamp = timestamp
+            subscribers = list(self._subscribers)
+
+        if not subscribers:
+            return
+        message = format_event('delta', {
+            'timestamp': timestamp,
+            'network_stats': changed,
+            'removed': removed,
+            'anomalies': anomalies
+        })
+        for subscription in subscribers:
+            subscription._deliver(message)
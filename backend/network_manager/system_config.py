@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Dict, Optional
+
+from backend.network_manager.adaptive import AdaptiveSampling
+from backend.network_manager.scheduler import MIN_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = '/var/lib/network-manager/system_config.json'
+# Délai entre deux vérifications du fichier par le processus d'échantillonnage (mode reader)
+WATCH_INTERVAL = 5.0
+
+
+def config_path() -> str:
+    return os.environ.get('NBM_SYSTEM_CONFIG', DEFAULT_CONFIG_PATH)
+
+
+@dataclass(frozen=True)
+class SystemConfig:
+    """Configuration modifiable à chaud depuis /api/system/config"""
+    # Interfaces suivies, séparées par des virgules (vide : toutes)
+    network_interface: str = ''
+    # Intervalle de base (s) ; en mode adaptatif, entre fast_interval et max_interval selon l'activité
+    monitoring_interval: float = 1.0
+    # Débit (octets/s) ouvrant une anomalie quel que soit le score statistique (0 : désactivé)
+    bandwidth_threshold: float = 0
+    log_retention_days: int = 30
+    anomaly_detection_enabled: bool = True
+    adaptive_sampling: bool = True
+    fast_interval: float = 0.25
+    max_interval: float = 30.0
+
+    def updated(self, data: Dict) -> 'SystemConfig':
+        """Copie modifiée par les champs fournis ; lève ValueError si une valeur est invalide"""
+        if not isinstance(data, dict):
+            raise ValueError('Objet JSON attendu')
+        known = {field.name: field.type for field in fields(self)}
+        changes = {}
+        for name, value in data.items():
+            if name not in known:
+                raise ValueError(f'Paramètre inconnu : {name}')
+            expected = known[name]
+            if expected is bool:
+                if not isinstance(value, bool):
+                    raise ValueError(f'{name} : booléen attendu')
+            elif expected is str:
+                if not isinstance(value, str):
+                    raise ValueError(f'{name} : texte attendu')
+                value = ','.join(part.strip() for part in value.split(',') if part.strip())
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'{name} : nombre attendu')
+            changes[name] = expected(value)
+        if 'monitoring_interval' in changes and 'max_interval' not in changes:
+            # Le plafond adaptatif suit un intervalle de base plus long (ex. formulaire sans max_interval)
+            changes['max_interval'] = max(self.max_interval, changes['monitoring_interval'])
+        config = replace(self, **changes)
+        config.validate()
+        return config
+
+    def validate(self):
+        if not MIN_INTERVAL <= self.fast_interval <= self.monitoring_interval:
+            raise ValueError(f"fast_interval doit être compris entre {MIN_INTERVAL} s et monitoring_interval")
+        if not self.monitoring_interval <= 300:
+            raise ValueError('monitoring_interval ne peut dépasser 300 s')
+        if not self.monitoring_interval <= self.max_interval <= 3600:
+            raise ValueError('max_interval doit être compris entre monitoring_interval et 3600 s')
+        if self.bandwidth_threshold < 0:
+            raise ValueError('bandwidth_threshold doit être positif')
+        if not 1 <= self.log_retention_days <= 3650:
+            raise ValueError('log_retention_days doit être compris entre 1 et 3650')
+
+    def interfaces(self):
+        return [name for name in self.network_interface.split(',') if name]
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def apply(self, monitor):
+        """Appliquer au monitor en cours d'exécution, sans redémarrer l'échantillonnage.
+
+        Configuration validée avant toute modification ; les bornes adaptatives
+        sont installées d'un bloc, avant le nouvel intervalle de base.
+        """
+        self.validate()
+        # Appliquée entre deux ticks : le tick ne voit jamais une configuration à moitié installée
+        with monitor.config_lock:
+            monitor.set_interfaces(self.interfaces())
+            if not self.adaptive_sampling:
+                monitor.set_adaptive(None)
+            elif monitor.adaptive is not None:
+                monitor.adaptive.configure(self.monitoring_interval, self.max_interval, self.fast_interval)
+            monitor.set_interval(self.monitoring_interval)
+            if self.adaptive_sampling and monitor.adaptive is None:
+                monitor.set_adaptive(AdaptiveSampling(self.monitoring_interval, self.fast_interval,
+                                                      self.max_interval))
+            monitor.rollups.set_retention_days(self.log_retention_days)
+            monitor.anomaly_detection_enabled = self.anomaly_detection_enabled
+            monitor.anomaly_engine.ceiling = self.bandwidth_threshold or None
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'SystemConfig':
+        """Configuration enregistrée, ou valeurs par défaut si le fichier est absent ou invalide"""
+        if not path or not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding='utf-8') as config_file:
+                return cls().updated(json.load(config_file))
+        except (OSError, ValueError, TypeError):
+            logger.exception("Configuration système illisible : %s", path)
+            return cls()
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as config_file:
+            json.dump(self.to_dict(), config_file, indent=2)
+        os.replace(temporary, path)
+
+
+class ConfigWatcher:
+    """Recharge la configuration enregistrée par les workers WSGI (mode reader) dans le processus d'échantillonnage"""
+
+    def __init__(self, path: str, monitor):
+        self.path = path
+        self.monitor = monitor
+        # Valeur initiale distincte de tout mtime : le premier passage applique toujours la configuration
+        self._mtime = -1
+
+    def check(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            # Fichier absent : valeurs par défaut
+            mtime = None
+        if mtime != self._mtime:
+            self._mtime = mtime
+            config = SystemConfig.load(self.path)
+            try:
+                config.apply(self.monitor)
+            except ValueError:
+                # Configuration précédente conservée jusqu'à la prochaine modification du fichier
+                logger.exception("Configuration système non appliquée : %s", config.to_dict())
+                return
+            logger.info("Configuration système appliquée : %s", config.to_dict())
+
+    def start(self, scheduler):
+        """Appliquer la configuration courante puis surveiller le fichier sur l'ordonnanceur du monitor"""
+        self.check()
+        return scheduler.add_job(self.check, WATCH_INTERVAL, run_immediately=False)
@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify
-from backend.auth.jwt_auth import authenticate, AuthManager, USER_DATABASE
+import logging
+from flask import Blueprint, request, jsonify, g
+from backend.auth.jwt_auth import authenticate, AuthManager, RevocationStoreError, USER_DATABASE
+from backend.network_manager.log_index import AppLogFormat
 
 auth_bp = Blueprint('auth', __name__)
+# Journal d'audit (app.log), consulté par /api/logs/authentication
+audit_logger = logging.getLogger('backend.auth.audit')
+
+def audit(action, user, status):
+    audit_logger.info(AppLogFormat.AUDIT_MESSAGE, action, user, status)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -21,6 +28,7 @@ def login():
     # Tentative d'authentification
     token = authenticate(username, password)
     
+    audit('login', username, 'success' if token else 'failure')
     if token:
         return jsonify({
             'status': 'success',
@@ -41,8 +49,7 @@ def login():
 def get_profile():
     """Récupérer les informations du profil utilisateur"""
     # Le décorateur login_required garantit que seuls les utilisateurs authentifiés peuvent accéder
-    token = request.headers.get('Authorization')
-    username = AuthManager.verify_token(token)
+    username = g.user_id
     
     user = USER_DATABASE.get(username)
     
@@ -65,8 +72,7 @@ def get_profile():
 def change_password():
     """Changer le mot de passe de l'utilisateur"""
     data = request.get_json()
-    token = request.headers.get('Authorization')
-    username = AuthManager.verify_token(token)
+    username = g.user_id
     
     # Validation des données
     if not data or 'current_password' not in data or 'new_password' not in data:
@@ -79,15 +85,47 @@ def change_password():
     
     # Vérifier le mot de passe actuel
     if not user or not user.check_password(data['current_password']):
+        audit('change_password', username, 'failure')
         return jsonify({
             'status': 'error',
             'message': 'Mot de passe actuel incorrect'
         }), 401
     
+    # Les tokens émis avec l'ancien mot de passe ne sont plus acceptés ;
+    # un nouveau token est renvoyé pour la session courante
+    try:
+        AuthManager.invalidate_user_tokens(username)
+    except RevocationStoreError as e:
+        audit('change_password', username, 'failure')
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 503
+    
     # Mettre à jour le mot de passe
     user.password_hash = AuthManager.generate_password_hash(data['new_password'])
+    audit('change_password', username, 'success')
     
     return jsonify({
         'status': 'success',
-        'message': 'Mot de passe modifié avec succès'
+        'message': 'Mot de passe modifié avec succès',
+        'token': AuthManager.generate_token(username)
+    }), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@AuthManager.login_required
+def logout():
+    """Révoquer le token de la session courante"""
+    try:
+        AuthManager.revoke_token(request.headers.get('Authorization'))
+    except RevocationStoreError as e:
+        audit('logout', g.user_id, 'failure')
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 503
+    audit('logout', g.user_id, 'success')
+    return jsonify({
+        'status': 'success',
+        'message': 'Déconnexion réussie'
     }), 200
@@ -0,0 +1,103 @@
+import hmac
+import os
+from flask import Blueprint, request, jsonify
+from backend.network_manager.fleet import (
+    MAX_INTERFACES, MAX_NODES, NODE_RETENTION, FleetAggregator, FleetLimitError, FrameError
+)
+from backend.auth.jwt_auth import AuthManager
+
+fleet_bp = Blueprint('fleet', __name__)
+# Jeton partagé par les agents (Authorization: Bearer <jeton>) ; réception refusée s'il est vide
+FLEET_TOKEN = os.environ.get('NBM_FLEET_TOKEN')
+# Taille maximale d'une trame (octets)
+MAX_FRAME_SIZE = 4 << 20
+aggregator = FleetAggregator(
+    stale_after=float(os.environ.get('NBM_FLEET_STALE_AFTER', 30)),
+    max_nodes=int(os.environ.get('NBM_FLEET_MAX_NODES', MAX_NODES)),
+    max_interfaces=int(os.environ.get('NBM_FLEET_MAX_INTERFACES', MAX_INTERFACES)),
+    retention=float(os.environ.get('NBM_FLEET_RETENTION', NODE_RETENTION))
+)
+
+@fleet_bp.route('/ingest', methods=['POST'])
+def ingest_frame():
+    """Recevoir une trame binaire d'un agent"""
+    if not FLEET_TOKEN:
+        return jsonify({
+            'status': 'error',
+            'message': 'Réception désactivée : NBM_FLEET_TOKEN non configuré'
+        }), 503
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {FLEET_TOKEN}'):
+        return jsonify({'message': "Jeton d'agent invalide"}), 401
+    if (request.content_length or 0) > MAX_FRAME_SIZE:
+        return jsonify({
+            'status': 'error',
+            'message': 'Trame trop volumineuse'
+        }), 413
+
+    try:
+        samples = aggregator.ingest(request.get_data(cache=False))
+    except FrameError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except FleetLimitError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 429
+    return jsonify({
+        'status': 'success',
+        'samples': samples
+    }), 200
+
+@fleet_bp.route('/nodes', methods=['GET'])
+@AuthManager.login_required
+def get_fleet_nodes():
+    """Nœuds connus, dernière trame reçue et débits cumulés"""
+    return jsonify({
+        'status': 'success',
+        'summary': aggregator.summary(),
+        'nodes': aggregator.nodes()
+    }), 200
+
+@fleet_bp.route('/stats', methods=['GET'])
+@AuthManager.login_required
+def get_fleet_stats():
+    """Dernières statistiques par nœud et par interface (paramètre node optionnel)"""
+    return jsonify({
+        'status': 'success',
+        'network_stats': aggregator.stats(request.args.get('node'))
+    }), 200
+
+@fleet_bp.route('/anomalies', methods=['GET'])
+@AuthManager.login_required
+def get_fleet_anomalies():
+    """Anomalies détectées sur la flotte (paramètre node optionnel)"""
+    return jsonify({
+        'status': 'success',
+        'anomalies': aggregator.anomalies(request.args.get('node'))
+    }), 200
+
+@fleet_bp.route('/history', methods=['GET'])
+@AuthManager.login_required
+def get_fleet_history():
+    """Historique agrégé d'un nœud (paramètres node, interface, since, step)"""
+    node = request.args.get('node')
+    try:
+        if not node:
+            raise ValueError('Paramètre node requis')
+        since = request.args.get('since', type=float)
+        step = request.args.get('step', type=float)
+        if step is not None and step <= 0:
+            raise ValueError('Le pas doit être positif')
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    return jsonify({
+        'status': 'success',
+        'history': aggregator.history(node, request.args.get('interface'), since, step)
+    }), 200
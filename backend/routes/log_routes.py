@@ -0,0 +1,90 @@
+import csv
+import io
+import os
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from backend.network_manager.log_index import LogStore
+from backend.auth.jwt_auth import AuthManager
+
+logs_bp = Blueprint('logs', __name__)
+log_store = LogStore(
+    os.environ.get('NBM_APP_LOG', '/var/log/network-manager/app.log'),
+    os.environ.get('NBM_STATS_LOG', '/var/log/network-manager/network_stats.log')
+)
+
+# Lignes CSV envoyées par fragment de réponse
+EXPORT_CHUNK_ROWS = 500
+
+def _filters():
+    """Filtres communs : plage temporelle (since / until, horodatages epoch) et termes indexés"""
+    return {
+        'since': request.args.get('since', type=float),
+        'until': request.args.get('until', type=float),
+        'level': request.args.get('level'),
+        'interface': request.args.get('interface'),
+        'user': request.args.get('user'),
+    }
+
+def _page(log_type):
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+        page = log_store.query(log_type, request.args.get('cursor'), limit, **_filters())
+        return jsonify({
+            'status': 'success',
+            **page
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@logs_bp.route('/', methods=['GET'])
+@AuthManager.login_required
+def get_system_logs():
+    """Journal de l'application, du plus récent au plus ancien (pagination par curseur)"""
+    log_type = request.args.get('type', 'system')
+    return _page('system' if log_type == 'all' else log_type)
+
+@logs_bp.route('/network', methods=['GET'])
+@AuthManager.login_required
+def get_network_logs():
+    """Statistiques journalisées par interface"""
+    return _page('network')
+
+@logs_bp.route('/authentication', methods=['GET'])
+@AuthManager.login_required
+def get_authentication_logs():
+    """Connexions, déconnexions et changements de mot de passe"""
+    return _page('authentication')
+
+@logs_bp.route('/export', methods=['GET'])
+@AuthManager.login_required
+def export_logs():
+    """Export CSV en flux : les enregistrements sont lus et envoyés bloc par bloc"""
+    log_type = request.args.get('type', 'system')
+    log_type = 'system' if log_type == 'all' else log_type
+    if log_type not in LogStore.TYPES:
+        return jsonify({
+            'status': 'error',
+            'message': f'Type de journal inconnu : {log_type}'
+        }), 400
+    columns = LogStore.COLUMNS[log_type]
+    records = log_store.export(log_type, **_filters())
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, record in enumerate(records, start=1):
+            writer.writerow([record.get(column) for column in columns])
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={log_type}_logs.csv'}
+    )
@@ -0,0 +1,127 @@
+import hmac
+import os
+import time
+from flask import Blueprint, Response, g, request, jsonify
+from backend.network_manager.metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram, ratio
+from backend.network_manager.profiler import SamplingProfiler
+from backend.routes import network_routes
+from backend.tasks.network_tasks import result_cache
+from backend.auth.jwt_auth import AuthManager
+
+metrics_bp = Blueprint('metrics', __name__)
+# Jeton exigé par /metrics s'il est défini (Authorization: Bearer <jeton>), accès libre sinon
+METRICS_TOKEN = os.environ.get('NBM_METRICS_TOKEN')
+profiler = SamplingProfiler()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'nbm_http_requests_total', 'Requêtes API par route, méthode et statut', ('route', 'method', 'status')))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    'nbm_http_request_duration_seconds', 'Durée de traitement des requêtes API', ('route', 'method')))
+
+
+def _queue_depths():
+    monitor = network_routes.network_monitor
+    depths = {}
+    stats_logger = getattr(monitor, 'stats_logger', None)
+    if stats_logger is not None:
+        depths['stats_log'] = stats_logger.queue_depth()
+    for sink in getattr(monitor, 'sinks', ()):
+        if hasattr(sink, 'queue_depth'):
+            depths[type(sink).__name__] = sink.queue_depth()
+    return depths
+
+
+def _blocklist():
+    if network_routes.ip_blocker is None:
+        # Mode reader : liste de blocage absente des workers
+        return {}
+    counts = network_routes.ip_blocker.counts()
+    return {'requested': counts['entries'], 'kernel': counts['kernel_entries']}
+
+
+for _gauge in (
+    Gauge('nbm_monitored_interfaces', 'Interfaces présentes dans le dernier instantané',
+          lambda: len(network_routes.network_monitor.snapshot.network_stats)),
+    Gauge('nbm_token_cache_hit_ratio', 'Part des vérifications de token servies par le cache',
+          lambda: ratio(AuthManager.token_cache.hits, AuthManager.token_cache.misses)),
+    Gauge('nbm_result_cache_hit_ratio', 'Part des opérations longues servies par le cache de résultats',
+          lambda: ratio(result_cache.hits, result_cache.misses)),
+    Gauge('nbm_queue_depth', 'Éléments en attente dans les files des consommateurs asynchrones',
+          _queue_depths, ('queue',)),
+    Gauge('nbm_blocklist_entries', 'Entrées de la liste de blocage (demandées, ensemble noyau)',
+          _blocklist, ('set',)),
+    Gauge('nbm_profiler_running', 'Profileur statistique actif', lambda: int(profiler.running)),
+):
+    REGISTRY.register(_gauge)
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _record(response):
+    started = g.pop('metrics_started', None)
+    if started is not None and request.path.startswith('/api/'):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_DURATION.observe(time.perf_counter() - started, route, request.method)
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    return response
+
+
+def init_metrics(app):
+    """Instrumenter les requêtes de l'application et exposer /metrics"""
+    app.before_request(_start_timer)
+    app.after_request(_record)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def export_metrics():
+    """Métriques du processus au format texte Prometheus"""
+    if METRICS_TOKEN:
+        expected = f'Bearer {METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return jsonify({'message': 'Jeton de métriques invalide'}), 401
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@metrics_bp.route('/api/debug/profiler', methods=['GET'])
+@AuthManager.login_required
+def get_profiler():
+    """État du profileur et piles relevées jusqu'ici (format folded)"""
+    return jsonify({
+        'status': 'success',
+        'running': profiler.running,
+        'started_at': profiler.started_at,
+        'samples': profiler.samples,
+        'stacks': profiler.folded()
+    }), 200
+
+
+@metrics_bp.route('/api/debug/profiler', methods=['POST'])
+@AuthManager.login_required
+def toggle_profiler():
+    """Démarrer ({"action": "start"}) ou arrêter ({"action": "stop"}) le profileur statistique"""
+    action = (request.get_json(silent=True) or {}).get('action')
+    if action == 'start':
+        if not profiler.start():
+            return jsonify({
+                'status': 'error',
+                'message': 'Profileur déjà actif'
+            }), 409
+        return jsonify({
+            'status': 'success',
+            'message': 'Profileur démarré'
+        }), 200
+    if action == 'stop':
+        if not profiler.running:
+            return jsonify({
+                'status': 'error',
+                'message': 'Profileur inactif'
+            }), 409
+        stacks = profiler.stop()
+        return Response(stacks, mimetype='text/plain')
+    return jsonify({
+        'status': 'error',
+        'message': "Action attendue : 'start' ou 'stop'"
+    }), 400
@@ -1,37 +1,158 @@
-from flask import Blueprint, request, jsonify
+import logging
+import os
+from functools import wraps
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from backend.network_manager import encoding
 from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
-from backend.network_manager.ip_blocker import IPBlocker
+from backend.network_manager.persistence import SampleWriter
+from backend.network_manager.flows import FlowMonitor, default_flow_source
+from backend.network_manager.sampler import snapshot_path
+from backend.network_manager.segments import SegmentStore, segment_dir
+from backend.network_manager.shared_snapshot import SharedSnapshotReader
+from backend.network_manager.firewall import FirewallUnavailableError
+from backend.network_manager.ip_blocker import KERNEL_ERRORS, BatchValidationError, IPBlocker
+from backend.network_manager.shaping import BandwidthShaper
+from backend.network_manager.system_config import SystemConfig, config_path
 from backend.auth.jwt_auth import AuthManager
 
+logger = logging.getLogger(__name__)
+
 network_bp = Blueprint('network', __name__)
-network_monitor = AdvancedNetworkMonitor()
-ip_blocker = IPBlocker()
+# standalone : le processus échantillonne lui-même ; reader : les workers WSGI lisent
+# l'instantané publié par un processus unique (python -m backend.network_manager.sampler)
+STATS_MODE = os.environ.get('NBM_STATS_MODE', 'standalone')
+# Historique long terme : segments écrits par le processus qui échantillonne, lus par tous
+segment_store = SegmentStore(segment_dir()) if segment_dir() else None
+if STATS_MODE == 'reader':
+    network_monitor = SharedSnapshotReader(snapshot_path(), segment_store=segment_store)
+    flow_monitor = FlowMonitor()
+    # Chaque worker tiendrait son propre index de blocage et réécrirait le fichier d'échéances :
+    # blocage et limitation de débit sont réservés au mode standalone (un seul propriétaire de l'état noyau)
+    ip_blocker = None
+    ip_blocker_error = 'Blocage et limitation de débit indisponibles en mode reader'
+    bandwidth_shaper = None
+else:
+    # Persistance des échantillons dans PostgreSQL lorsque DATABASE_URL est configurée
+    database_url = os.environ.get('DATABASE_URL')
+    network_monitor = AdvancedNetworkMonitor(
+        sinks=[SampleWriter(database_url)] if database_url else None,
+        segment_store=segment_store
+    )
+    # Comptabilité par IP (conntrack), sur l'ordonnanceur du monitor
+    flow_monitor = FlowMonitor(default_flow_source(), scheduler=network_monitor.scheduler)
+    ip_blocker_error = None
+    try:
+        ip_blocker = IPBlocker(state_path='/var/lib/network-manager/ip_blocklist.json')
+    except (FirewallUnavailableError, *KERNEL_ERRORS) as e:
+        # Routes de blocage en 503 plutôt qu'un succès sans effet sur le trafic
+        logger.error("Blocage d'IP indisponible : %s", e)
+        ip_blocker = None
+        ip_blocker_error = f"Blocage d'IP indisponible : {e}"
+    bandwidth_shaper = BandwidthShaper()
+# Représentations encodées des instantanés (format × compression), resservies jusqu'au tick suivant
+response_variants = encoding.VariantCache()
+# Suffixe d'ETag par format : chaque représentation a son propre ETag (en-tête Vary)
+FORMAT_TAGS = {encoding.JSON: '', encoding.COLUMNAR: '-c', encoding.MSGPACK: '-m'}
+
+def start_stats_source():
+    """Démarrer l'échantillonnage dans ce processus (mode standalone uniquement)"""
+    if STATS_MODE != 'reader':
+        # Configuration enregistrée (intervalle, échantillonnage adaptatif, interfaces suivies...)
+        try:
+            SystemConfig.load(config_path()).apply(network_monitor)
+        except ValueError:
+            # Une configuration enregistrée invalide ne doit pas empêcher le démarrage
+            logger.exception("Configuration système ignorée, valeurs par défaut conservées")
+        network_monitor.start_monitoring()
+        flow_monitor.start()
+
+def kernel_owner_required(f):
+    """Refuser les routes de limitation de débit dans un worker en mode reader"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if STATS_MODE == 'reader':
+            return jsonify({
+                'status': 'error',
+                'message': 'Blocage et limitation de débit indisponibles en mode reader'
+            }), 503
+        return f(*args, **kwargs)
+    return decorated_function
+
+def firewall_required(f):
+    """Refuser les routes de blocage sans pare-feu noyau (mode reader ou hôte sans ipset / nftables)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if ip_blocker is None:
+            return jsonify({
+                'status': 'error',
+                'message': ip_blocker_error
+            }), 503
+        return f(*args, **kwargs)
+    return decorated_function
+
+def _negotiate():
+    """Format (Accept) et compression (Accept-Encoding) demandés ; JSON par lignes par défaut"""
+    mimetype = request.accept_mimetypes.best_match(encoding.formats(), default=encoding.JSON)
+    return mimetype, request.accept_encodings.best_match(encoding.encodings())
+
+def _columnar_payload(key, rows, **fields):
+    return {'status': 'success', 'format': 'columnar', **fields, key: encoding.columns(rows)}
+
+def _encoded_response(body, mimetype, applied, etag=None):
+    response = Response(body, mimetype=mimetype)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    if applied:
+        response.headers['Content-Encoding'] = applied
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def _snapshot_response(body, etag, key, rows):
+    """Servir un instantané dans le format négocié, avec 304 si le client l'a déjà.
+
+    Le JSON par lignes est le corps pré-sérialisé de l'instantané ; les autres
+    représentations sont encodées une fois par version puis mises en cache.
+    """
+    mimetype, requested = _negotiate()
+
+    def build():
+        encoded = body if mimetype == encoding.JSON else encoding.encode(_columnar_payload(key, rows), mimetype)
+        return encoding.compress(encoded, requested)
+
+    encoded, applied = response_variants.get((etag, mimetype, requested), build)
+    variant_etag = f"{etag}{FORMAT_TAGS[mimetype]}{'-' + applied if applied else ''}"
+    return _encoded_response(encoded, mimetype, applied, variant_etag)
 
 @network_bp.route('/network/stats', methods=['GET'])
 @AuthManager.login_required
 def get_network_stats():
     """Récupérer les statistiques réseau actuelles"""
+    snapshot = network_monitor.snapshot
+    return _snapshot_response(snapshot.stats_body, snapshot.stats_etag, 'network_stats', snapshot.network_stats)
+
+@network_bp.route('/network/history', methods=['GET'])
+@AuthManager.login_required
+def get_network_history():
+    """Récupérer l'historique des vitesses par interface"""
+    interface = request.args.get('interface')
     try:
-        stats = network_monitor.get_current_stats()
-        return jsonify({
-            'status': 'success',
-            'network_stats': stats
-        }), 200
-    except Exception as e:
+        since = request.args.get('since', type=float)
+        step = request.args.get('step', type=float)
+        if step is not None and step <= 0:
+            raise ValueError('Le pas doit être positif')
+    except ValueError as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
-        }), 500
+        }), 400
 
-@network_bp.route('/network/anomalies', methods=['GET'])
-@AuthManager.login_required
-def detect_network_anomalies():
-    """Détecter les anomalies réseau"""
     try:
-        anomalies = network_monitor.detect_anomalies()
+        history = network_monitor.get_history(interface, since, step)
         return jsonify({
             'status': 'success',
-            'anomalies': anomalies
+            'history': history
         }), 200
     except Exception as e:
         return jsonify({
@@ -39,8 +160,47 @@ def detect_network_anomalies():
             'message': str(e)
         }), 500
 
+@network_bp.route('/network/stream', methods=['GET'])
+@AuthManager.login_required
+def stream_network_stats():
+    """Flux Server-Sent Events : snapshot complet puis deltas à chaque tick"""
+    return Response(
+        stream_with_context(network_monitor.broadcaster.stream()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@network_bp.route('/network/top-talkers', methods=['GET'])
+@AuthManager.login_required
+def get_top_talkers():
+    """Adresses sources et destinations les plus actives (octets) sur une fenêtre glissante"""
+    if not flow_monitor.enabled:
+        return jsonify({
+            'status': 'error',
+            'message': 'Comptabilité par IP indisponible (conntrack illisible)'
+        }), 503
+
+    window = request.args.get('window', 60, type=float)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    top = flow_monitor.top_talkers.top(request.args.get('interface'), window, limit)
+    return jsonify({
+        'status': 'success',
+        'top_talkers': top
+    }), 200
+
+@network_bp.route('/network/anomalies', methods=['GET'])
+@AuthManager.login_required
+def detect_network_anomalies():
+    """Détecter les anomalies réseau"""
+    snapshot = network_monitor.snapshot
+    return _snapshot_response(snapshot.anomalies_body, snapshot.anomalies_etag, 'anomalies', snapshot.anomalies)
+
 @network_bp.route('/ip/block', methods=['POST'])
 @AuthManager.login_required
+@firewall_required
 def block_ip():
     """Bloquer une adresse IP"""
     data = request.json
@@ -67,6 +227,7 @@ def block_ip():
 
 @network_bp.route('/ip/unblock', methods=['POST'])
 @AuthManager.login_required
+@firewall_required
 def unblock_ip():
     """Débloquer une adresse IP"""
     data = request.json
@@ -90,18 +251,163 @@ def unblock_ip():
             'message': str(e)
         }), 500
 
+# Taille maximale d'un lot de blocage / déblocage
+MAX_BATCH_SIZE = 100000
+
+def _batch_entries(data):
+    """Extraire la liste `entries` d'un corps de requête de lot"""
+    entries = (data or {}).get('entries')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('Liste d\'entrées requise')
+    if len(entries) > MAX_BATCH_SIZE:
+        raise ValueError(f'Lot limité à {MAX_BATCH_SIZE} entrées')
+    return entries
+
+def _batch_response(results):
+    failed = any(result['status'] == 'error' for result in results)
+    return jsonify({
+        'status': 'error' if failed else 'success',
+        'count': len(results),
+        'results': results
+    }), 500 if failed else 200
+
+@network_bp.route('/ip/block/batch', methods=['POST'])
+@AuthManager.login_required
+@firewall_required
+def block_ip_batch():
+    """Bloquer un lot d'adresses IP ou de plages CIDR en une seule transaction pare-feu"""
+    data = request.json
+    try:
+        entries = _batch_entries(data)
+        duration = data.get('duration')
+        # Entrée : "10.0.0.1" ou {"ip_address": "10.0.0.0/24", "duration": 3600}
+        results = ip_blocker.block_many(
+            (entry.get('ip_address'), entry.get('duration', duration)) if isinstance(entry, dict)
+            else (entry, duration)
+            for entry in entries
+        )
+        return _batch_response(results)
+    except BatchValidationError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'errors': e.errors
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@network_bp.route('/ip/unblock/batch', methods=['POST'])
+@AuthManager.login_required
+@firewall_required
+def unblock_ip_batch():
+    """Débloquer un lot d'adresses IP ou de plages CIDR en une seule transaction pare-feu"""
+    try:
+        entries = _batch_entries(request.json)
+        results = ip_blocker.unblock_many(
+            entry.get('ip_address') if isinstance(entry, dict) else entry for entry in entries
+        )
+        return _batch_response(results)
+    except BatchValidationError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'errors': e.errors
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
 @network_bp.route('/ip/blocked', methods=['GET'])
 @AuthManager.login_required
+@firewall_required
 def list_blocked_ips():
-    """Lister les adresses IP bloquées"""
+    """Lister les adresses IP et plages bloquées, par pages (paramètres cursor et limit)"""
     try:
-        blocked_ips = ip_blocker.list_blocked_ips()
+        limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+        page = ip_blocker.list_blocked(request.args.get('cursor'), limit)
+        mimetype, requested = _negotiate()
+        if mimetype == encoding.JSON:
+            payload = {
+                'status': 'success',
+                'blocked_ips': [entry['ip'] for entry in page['entries']],
+                **page
+            }
+        else:
+            # La colonne ip remplace blocked_ips
+            payload = _columnar_payload('entries', page.pop('entries'), **page)
+        body, applied = encoding.compress(encoding.encode(payload, mimetype), requested)
+        return _encoded_response(body, mimetype, applied), 200
+    except ValueError as e:
         return jsonify({
-            'status': 'success',
-            'blocked_ips': blocked_ips
-        }), 200
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
+
+@network_bp.route('/shaping/limits', methods=['GET'])
+@AuthManager.login_required
+@kernel_owner_required
+def list_bandwidth_limits():
+    """Lister les limites de débit actives (paramètre interface optionnel)"""
+    return jsonify({
+        'status': 'success',
+        'limits': bandwidth_shaper.list_limits(request.args.get('interface'))
+    }), 200
+
+@network_bp.route('/shaping/limits', methods=['POST'])
+@AuthManager.login_required
+@kernel_owner_required
+def set_bandwidth_limits():
+    """Créer ou modifier un lot de limites de débit en une seule transaction netlink"""
+    data = request.json or {}
+    # Lot {"limits": [...]} ou limite unique {"interface": ..., "target": ..., "rate": ...}
+    limits = data.get('limits', [data] if 'target' in data else None)
+    if not isinstance(limits, list) or not limits:
+        return jsonify({
+            'status': 'error',
+            'message': 'Liste de limites requise'
+        }), 400
+    if len(limits) > MAX_BATCH_SIZE:
+        return jsonify({
+            'status': 'error',
+            'message': f'Lot limité à {MAX_BATCH_SIZE} entrées'
+        }), 400
+
+    try:
+        return _batch_response(bandwidth_shaper.set_limits(limits))
+    except BatchValidationError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'errors': e.errors
+        }), 400
+
+@network_bp.route('/shaping/limits', methods=['DELETE'])
+@AuthManager.login_required
+@kernel_owner_required
+def clear_bandwidth_limits():
+    """Retirer les limites d'une interface (toutes, ou celles des paramètres target)"""
+    interface = request.args.get('interface')
+    if not interface:
+        return jsonify({
+            'status': 'error',
+            'message': 'Interface requise'
+        }), 400
+
+    try:
+        targets = request.args.getlist('target') or None
+        return _batch_response(bandwidth_shaper.clear_limits(interface, targets))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from backend.network_manager.system_config import SystemConfig, config_path
+from backend.routes import network_routes
+from backend.auth.jwt_auth import AuthManager
+
+system_bp = Blueprint('system', __name__)
+
+
+@system_bp.route('/config', methods=['GET'])
+@AuthManager.login_required
+def get_system_config():
+    """Configuration système courante (champs à la racine, repris tels quels par le formulaire)"""
+    return jsonify(SystemConfig.load(config_path()).to_dict()), 200
+
+
+@system_bp.route('/config', methods=['POST'])
+@AuthManager.login_required
+def update_system_config():
+    """Modifier la configuration ; appliquée à chaud, sans redémarrer l'échantillonnage"""
+    try:
+        config = SystemConfig.load(config_path()).updated(request.get_json(silent=True))
+        # Appliquée avant d'être enregistrée : une configuration refusée n'atteint jamais le disque.
+        # En mode reader, le processus d'échantillonnage recharge le fichier de lui-même
+        if network_routes.STATS_MODE != 'reader':
+            config.apply(network_routes.network_monitor)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    try:
+        config.save(config_path())
+    except OSError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Impossible d'enregistrer la configuration : {e}"
+        }), 500
+    return jsonify({
+        'status': 'success',
+        'message': 'Configuration système mise à jour',
+        'config': config.to_dict()
+    }), 200
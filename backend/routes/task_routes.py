@@ -0,0 +1,90 @@
+import os
+import re
+from flask import Blueprint, request, jsonify, send_file
+from backend.tasks.celery_app import celery_app
+from backend.tasks.network_tasks import OPERATIONS, export_path, submit
+from backend.auth.jwt_auth import AuthManager
+
+tasks_bp = Blueprint('tasks', __name__)
+
+# Identifiants de tâche Celery (UUID) : jamais utilisés tels quels dans un chemin sans vérification
+TASK_ID = re.compile(r'^[0-9a-f-]{36}$')
+
+@tasks_bp.route('/<operation>', methods=['POST'])
+@AuthManager.login_required
+def submit_task(operation):
+    """Lancer une opération longue dans un worker Celery (résultat immédiat s'il est en cache)"""
+    if operation not in OPERATIONS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Opération inconnue : {operation}'
+        }), 404
+
+    try:
+        task_id, cached = submit(operation, request.get_json(silent=True) or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if task_id is None:
+        return jsonify({
+            'status': 'success',
+            'cached': True,
+            'result': cached
+        }), 200
+    return jsonify({
+        'status': 'accepted',
+        'task_id': task_id,
+        'status_url': f'/api/tasks/{task_id}',
+        'result_url': f'/api/tasks/{task_id}/result'
+    }), 202
+
+@tasks_bp.route('/<task_id>', methods=['GET'])
+@AuthManager.login_required
+def get_task_status(task_id):
+    """État d'une tâche : PENDING, STARTED, SUCCESS ou FAILURE"""
+    result = celery_app.AsyncResult(task_id)
+    return jsonify({
+        'status': 'success',
+        'task_id': task_id,
+        'state': result.state,
+        'ready': result.ready()
+    }), 200
+
+@tasks_bp.route('/<task_id>/result', methods=['GET'])
+@AuthManager.login_required
+def get_task_result(task_id):
+    """Résultat d'une tâche terminée ; 202 tant qu'elle est en cours"""
+    result = celery_app.AsyncResult(task_id)
+    if not result.ready():
+        return jsonify({
+            'status': 'pending',
+            'task_id': task_id,
+            'state': result.state
+        }), 202
+    if result.failed():
+        return jsonify({
+            'status': 'error',
+            'task_id': task_id,
+            'message': str(result.result)
+        }), 500
+    return jsonify({
+        'status': 'success',
+        'task_id': task_id,
+        'result': result.result
+    }), 200
+
+@tasks_bp.route('/<task_id>/download', methods=['GET'])
+@AuthManager.login_required
+def download_export(task_id):
+    """Télécharger le fichier CSV produit par une tâche logs-export"""
+    path = export_path(task_id) if TASK_ID.match(task_id) else None
+    if path is None or not os.path.exists(path):
+        return jsonify({
+            'status': 'error',
+            'message': 'Export introuvable ou expiré'
+        }), 404
+    return send_file(path, mimetype='text/csv', as_attachment=True,
+                     download_name=f'network_stats_{task_id}.csv')
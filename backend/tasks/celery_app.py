@@ -0,0 +1,30 @@
+import os
+
+from celery import Celery
+
+# Courtier et stockage des états de tâche ; le cache de résultats utilise la même instance Redis
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+RESULT_TTL = int(os.environ.get('NBM_RESULT_TTL', 300))
+TASK_TIME_LIMIT = int(os.environ.get('NBM_TASK_TIME_LIMIT', 1800))
+# Attente tolérée dans la file avant le démarrage d'une tâche
+QUEUE_DELAY = 300
+
+celery_app = Celery(
+    'network_manager',
+    broker=os.environ.get('CELERY_BROKER_URL', REDIS_URL),
+    backend=os.environ.get('CELERY_RESULT_BACKEND', REDIS_URL),
+    include=['backend.tasks.network_tasks']
+)
+celery_app.conf.update(
+    task_serializer='json',
+    result_serializer='json',
+    accept_content=['json'],
+    # État STARTED visible par les routes de suivi
+    task_track_started=True,
+    # États conservés au moins aussi longtemps que les fichiers exportés
+    result_expires=max(RESULT_TTL, 3600),
+    # Tâches longues : une à la fois par processus, acquittées une fois terminées
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_time_limit=TASK_TIME_LIMIT,
+)
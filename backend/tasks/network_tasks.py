@@ -0,0 +1,169 @@
+import math
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from celery import uuid
+
+from backend.network_manager import reports
+from backend.tasks.celery_app import QUEUE_DELAY, REDIS_URL, RESULT_TTL, TASK_TIME_LIMIT, celery_app
+from backend.tasks.result_cache import ResultCache
+
+STATS_LOG_PATH = os.environ.get('NBM_STATS_LOG', '/var/log/network-manager/network_stats.log')
+# Partagé entre les workers Celery (écriture) et les workers Flask (téléchargement)
+EXPORT_DIR = os.environ.get('NBM_EXPORT_DIR', '/var/lib/network-manager/exports')
+# Nombre de points visé lorsque le pas de l'historique n'est pas précisé
+HISTORY_POINTS = 1000
+MAX_IMPORT_BYTES = 32 * 1024 * 1024
+
+result_cache = ResultCache.from_url(REDIS_URL, ttl=RESULT_TTL, claim_ttl=TASK_TIME_LIMIT + QUEUE_DELAY)
+
+
+class CachedTask(celery_app.Task):
+    """Tâche dont le résultat est mis en cache sous la clé `cache_key` de ses arguments"""
+
+    def on_success(self, retval, task_id, args, kwargs):
+        result_cache.put(kwargs['cache_key'], retval)
+        result_cache.release(kwargs['cache_key'])
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        result_cache.release(kwargs['cache_key'])
+
+
+@celery_app.task(base=CachedTask, name='network.aggregate_history')
+def aggregate_history(cache_key, since, until, step, interface=None):
+    """Historique persistant (PostgreSQL) agrégé sur une longue plage"""
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError('Historique persistant indisponible : DATABASE_URL non configurée')
+    import psycopg2
+    connection = psycopg2.connect(database_url)
+    try:
+        return reports.aggregate_history(connection, since, until, step, interface)
+    finally:
+        connection.close()
+
+
+@celery_app.task(base=CachedTask, bind=True, name='network.export_logs')
+def export_logs(self, cache_key, since=None, until=None, interface=None):
+    """Export CSV du journal des statistiques, téléchargeable par /api/tasks/<id>/download"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_old_exports()
+    path = export_path(self.request.id)
+    with open(path + '.tmp', 'w', newline='', encoding='utf-8') as destination:
+        rows = reports.export_stats_log(STATS_LOG_PATH, destination, since, until, interface)
+    os.replace(path + '.tmp', path)
+    return {'task_id': self.request.id, 'rows': rows, 'filename': os.path.basename(path)}
+
+
+@celery_app.task(base=CachedTask, name='network.prepare_blocklist_import')
+def prepare_blocklist_import(cache_key, text):
+    """Validation d'une liste de blocage volumineuse ; le blocage reste fait par /ip/block/batch"""
+    return reports.prepare_blocklist_import(text)
+
+
+@celery_app.task(base=CachedTask, name='network.backfill_anomalies')
+def backfill_anomalies(cache_key, since=None, until=None, interface=None, threshold=4.0):
+    """Détection d'anomalies rejouée sur le journal des statistiques"""
+    return reports.backfill_anomalies(STATS_LOG_PATH, since, until, interface, threshold)
+
+
+def export_path(task_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f'{task_id}.csv')
+
+
+def _remove_old_exports():
+    """Supprimer les exports dont l'état de tâche a expiré"""
+    limit = time.time() - celery_app.conf.result_expires
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+        except OSError:
+            continue
+
+
+# Normalisation des paramètres : des requêtes équivalentes partagent la même clé de cache
+
+def _optional_float(data: Dict, name: str) -> Optional[float]:
+    value = data.get(name)
+    return None if value is None else float(value)
+
+
+def _optional_interface(data: Dict) -> Optional[str]:
+    return data.get('interface') or None
+
+
+def _normalize_history(data: Dict) -> Dict:
+    since = _optional_float(data, 'since')
+    if since is None:
+        raise ValueError('Début de plage (since) requis')
+    until = _optional_float(data, 'until') or time.time()
+    if until <= since:
+        raise ValueError('Plage vide')
+    step = _optional_float(data, 'step') or max(1, math.ceil((until - since) / HISTORY_POINTS))
+    if step <= 0:
+        raise ValueError('Le pas doit être positif')
+    # Bornes alignées sur le pas
+    return {
+        'since': math.floor(since / step) * step,
+        'until': math.ceil(until / step) * step,
+        'step': step,
+        'interface': _optional_interface(data),
+    }
+
+
+def _normalize_range(data: Dict) -> Dict:
+    since, until = _optional_float(data, 'since'), _optional_float(data, 'until')
+    if since is not None and until is not None and until <= since:
+        raise ValueError('Plage vide')
+    return {
+        'since': None if since is None else math.floor(since),
+        'until': None if until is None else math.ceil(until),
+        'interface': _optional_interface(data),
+    }
+
+
+def _normalize_backfill(data: Dict) -> Dict:
+    params = _normalize_range(data)
+    params['threshold'] = float(data.get('threshold', 4.0))
+    if params['threshold'] <= 0:
+        raise ValueError('Le seuil doit être positif')
+    return params
+
+
+def _normalize_import(data: Dict) -> Dict:
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError('Liste d\'adresses requise')
+    if len(text) > MAX_IMPORT_BYTES:
+        raise ValueError(f'Liste limitée à {MAX_IMPORT_BYTES // (1024 * 1024)} Mo')
+    return {'text': text}
+
+
+OPERATIONS = {
+    'history': (_normalize_history, aggregate_history),
+    'logs-export': (_normalize_range, export_logs),
+    'blocklist-import': (_normalize_import, prepare_blocklist_import),
+    'anomalies-backfill': (_normalize_backfill, backfill_anomalies),
+}
+
+
+def submit(operation: str, data: Dict) -> Tuple[Optional[str], Optional[Any]]:
+    """Lancer une opération longue : (identifiant de tâche, None), ou (None, résultat en cache).
+
+    Lève KeyError pour une opération inconnue et ValueError pour des paramètres invalides.
+    """
+    normalize, task = OPERATIONS[operation]
+    params = normalize(data)
+    key = result_cache.key(operation, params)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return None, cached
+    task_id = uuid()
+    running = result_cache.claim(key, task_id)
+    if running is not None:
+        return running, None
+    task.apply_async(kwargs=dict(params, cache_key=key), task_id=task_id)
+    return task_id, None
@@ -0,0 +1,56 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+
+class ResultCache:
+    """Résultats des tâches longues dans Redis, indexés par opération et paramètres normalisés.
+
+    Pendant le calcul, la clé pointe vers la tâche en cours : une requête
+    identique la rejoint au lieu d'en lancer une seconde.
+    """
+
+    def __init__(self, client, ttl: int = 300, prefix: str = 'nbm', claim_ttl: Optional[int] = None):
+        self.client = client
+        self.ttl = ttl
+        # Durée de vie de l'association clé -> tâche en cours : au moins la durée maximale d'une tâche,
+        # pour qu'une requête identique ne relance pas un calcul encore en cours
+        self.claim_ttl = ttl if claim_ttl is None else claim_ttl
+        self.prefix = prefix
+        # Lectures servies / manquées par ce processus (métriques)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 300, claim_ttl: Optional[int] = None) -> 'ResultCache':
+        import redis
+        return cls(redis.Redis.from_url(url), ttl, claim_ttl=claim_ttl)
+
+    def key(self, operation: str, params: Dict) -> str:
+        """Clé stable : même opération et mêmes paramètres normalisés, même clé"""
+        canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+        return f'{self.prefix}:result:{operation}:{hashlib.sha256(canonical.encode()).hexdigest()}'
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def put(self, key: str, value: Any):
+        self.client.set(key, json.dumps(value, separators=(',', ':')), ex=self.ttl)
+
+    def claim(self, key: str, task_id: str) -> Optional[str]:
+        """Associer la tâche à la clé ; renvoie l'identifiant de la tâche déjà en cours s'il y en a une"""
+        if self.client.set(f'{key}:task', task_id, nx=True, ex=self.claim_ttl):
+            return None
+        running = self.client.get(f'{key}:task')
+        if running is None:
+            # Tâche terminée entre-temps : nouvelle tentative
+            return self.claim(key, task_id)
+        return running.decode() if isinstance(running, bytes) else running
+
+    def release(self, key: str):
+        self.client.delete(f'{key}:task')
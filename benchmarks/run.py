@@ -0,0 +1,311 @@
+"""Benchmarks des chemins critiques : échantillonnage, routes, authentification, blocage d'IP, collecteur.
+
+    python -m benchmarks.run                          # résultats JSON sur la sortie standard
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+
+Chaque cas est exécuté une fois à blanc, puis `--repeat` fois ; la durée
+retenue est la médiane. Avec --baseline, le code de sortie vaut 1 si un cas
+est plus lent que la référence au-delà de la tolérance. Les références
+dépendent de la machine : les enregistrer sur le matériel cible.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Aucun effet de bord sur l'hôte lors de l'import des routes
+os.environ.setdefault('NBM_FIREWALL_BACKEND', 'memory')
+os.environ.setdefault('NBM_SHAPING_BACKEND', 'recording')
+os.environ.setdefault('NBM_SEGMENT_DIR', '')
+os.environ.setdefault('NBM_STATS_MODE', 'standalone')
+
+from backend.network_manager import encoding
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.firewall import MemoryBackend
+from backend.network_manager.fleet import FleetAggregator, FrameInterface, encode_frame
+from backend.network_manager.ip_blocker import IPBlocker
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+BLOCKLIST_SIZE = 100_000
+FLEET_AGENTS = 300
+
+# Nom -> fonction de préparation renvoyant (opération chronométrée, nombre d'opérations par appel)
+CASES: Dict[str, Callable[[], Tuple[Callable[[], None], int]]] = {}
+
+
+class Skipped(Exception):
+    """Cas impossible dans cet environnement (dépendance ou configuration absente)"""
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _monitor(interface_count: int, ticks: int = 3) -> AdvancedNetworkMonitor:
+    """Monitor alimenté par une source synthétique, sans journal ni ordonnanceur démarré"""
+    monitor = AdvancedNetworkMonitor(counter_source=SyntheticSource(interface_count), log_path=None)
+    for _ in range(ticks):
+        monitor._update_network_stats()
+    return monitor
+
+
+def _monitor_update(interface_count: int):
+    def setup():
+        monitor = _monitor(interface_count)
+        return monitor._update_network_stats, interface_count
+    return setup
+
+
+for _count in (10, 1_000, 10_000):
+    case(f'monitor.update[{_count}]')(_monitor_update(_count))
+
+
+@case('monitor.detect_anomalies[1000]')
+def detect_anomalies():
+    monitor = _monitor(1_000)
+    return lambda: [monitor.detect_anomalies() for _ in range(10_000)], 10_000
+
+
+@case('monitor.detect_anomalies_thresholds[1000]')
+def detect_anomalies_thresholds():
+    monitor = _monitor(1_000)
+    return lambda: [monitor.detect_anomalies(1024, 1024) for _ in range(100)], 100
+
+
+@case('monitor.current_stats_json[1000]')
+def current_stats_json():
+    monitor = _monitor(1_000)
+    return lambda: json.dumps(monitor.get_current_stats()), 1
+
+
+@case('encoding.stats_columnar_gzip[1000]')
+def stats_columnar_gzip():
+    # Représentation compacte d'un instantané, encodée une fois par tick
+    rows = _monitor(1_000).snapshot.network_stats
+
+    def run():
+        payload = {'status': 'success', 'format': 'columnar', 'network_stats': encoding.columns(rows)}
+        encoding.compress(encoding.encode(payload, encoding.COLUMNAR), 'gzip')
+    return run, 1
+
+
+def _token() -> str:
+    from backend.auth.jwt_auth import AuthManager
+    return AuthManager.generate_token('benchmark')
+
+
+@case('auth.verify_cached')
+def verify_cached():
+    try:
+        from backend.auth.jwt_auth import AuthManager
+    except ImportError as e:
+        raise Skipped(str(e))
+    token = _token()
+    return lambda: [AuthManager.verify_claims(token) for _ in range(10_000)], 10_000
+
+
+@case('auth.verify_uncached')
+def verify_uncached():
+    try:
+        from backend.auth.jwt_auth import AuthManager, TokenCache
+    except ImportError as e:
+        raise Skipped(str(e))
+    tokens = [AuthManager.generate_token(f'user{i}') for i in range(1_000)]
+
+    def run():
+        AuthManager.token_cache = TokenCache()
+        for token in tokens:
+            AuthManager.verify_claims(token)
+    return run, len(tokens)
+
+
+@case('route.network_stats[100]')
+def route_network_stats():
+    try:
+        from flask import Flask
+        from backend.routes import network_routes
+    except ImportError as e:
+        raise Skipped(str(e))
+    network_routes.network_monitor = _monitor(100)
+    app = Flask(__name__)
+    app.register_blueprint(network_routes.network_bp, url_prefix='/api/network')
+    client = app.test_client()
+    headers = {'Authorization': _token()}
+    response = client.get('/api/network/network/stats', headers=headers)
+    if response.status_code != 200:
+        raise Skipped(f'/network/stats : HTTP {response.status_code}')
+    return lambda: [client.get('/api/network/network/stats', headers=headers) for _ in range(500)], 500
+
+
+def _addresses(count: int) -> List[str]:
+    return [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(count)]
+
+
+def _blocker(entries: List[str]) -> IPBlocker:
+    blocker = IPBlocker(MemoryBackend())
+    blocker.block_many([(entry, None) for entry in entries])
+    return blocker
+
+
+@case(f'ip_blocker.block_unblock[{BLOCKLIST_SIZE}]')
+def block_unblock():
+    # Une adresse sur deux : pas de fusion de préfixes, pire cas pour l'ensemble noyau
+    entries = _addresses(2 * BLOCKLIST_SIZE)[::2]
+    blocker = IPBlocker(MemoryBackend())
+    requests = [(entry, None) for entry in entries]
+
+    def run():
+        blocker.block_many(requests)
+        blocker.unblock_many(entries)
+    return run, 2 * len(entries)
+
+
+@case(f'ip_blocker.lookup[{BLOCKLIST_SIZE}]')
+def lookup():
+    addresses = _addresses(2 * BLOCKLIST_SIZE)
+    blocker = _blocker(addresses[::2])
+    # Moitié d'adresses bloquées, moitié non
+    probes = addresses[::2][:BLOCKLIST_SIZE // 2] + addresses[1::2][:BLOCKLIST_SIZE // 2]
+    return lambda: [blocker.is_blocked(address) for address in probes], len(probes)
+
+
+@case(f'ip_blocker.list[{BLOCKLIST_SIZE}]')
+def list_blocked():
+    blocker = _blocker(_addresses(2 * BLOCKLIST_SIZE)[::2])
+
+    def run():
+        cursor = None
+        while True:
+            cursor = blocker.list_blocked(cursor, limit=500)['next_cursor']
+            if cursor is None:
+                break
+    return run, BLOCKLIST_SIZE
+
+
+@case(f'fleet.ingest[{FLEET_AGENTS}x4]')
+def fleet_ingest():
+    # Une trame par agent : 4 interfaces, 5 échantillons d'une seconde (envoi toutes les 5 s)
+    start = time.time()
+    frames = [
+        encode_frame(f'node-{agent}', 1, {
+            f'eth{interface}': FrameInterface((10 ** 9, 10 ** 9, 10 ** 6, 10 ** 6), [
+                (start + second, 1.0, (125000 + agent, 250000 + second, 900, 1800)) for second in range(5)
+            ]) for interface in range(4)
+        }) for agent in range(FLEET_AGENTS)
+    ]
+    aggregator = FleetAggregator()
+    return lambda: [aggregator.ingest(frame) for frame in frames], FLEET_AGENTS * 4 * 5
+
+
+def measure(name: str, repeat: int) -> Dict:
+    try:
+        operation, ops = CASES[name]()
+    except Skipped as e:
+        return {'name': name, 'skipped': str(e)}
+    operation()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - start)
+    seconds = statistics.median(durations)
+    return {
+        'name': name,
+        'ops': ops,
+        'seconds': seconds,
+        'min_seconds': min(durations),
+        'max_seconds': max(durations),
+        'ops_per_second': ops / seconds if seconds > 0 else float('inf'),
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[Dict]:
+    """Cas plus lents que la référence au-delà de la tolérance (débit relatif).
+
+    Un cas mesuré dans la référence mais ignoré dans cette exécution (import
+    cassé, configuration absente) compte comme une régression.
+    """
+    reference = {entry['name']: entry for entry in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = reference.get(result['name'])
+        if previous is None or 'skipped' in previous:
+            continue
+        if 'skipped' in result:
+            regressions.append(result)
+            continue
+        ratio = result['ops_per_second'] / previous['ops_per_second']
+        result['baseline_ratio'] = ratio
+        if ratio < 1 - tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', '--filter', help='ne lancer que les cas dont le nom contient ce texte')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', help='écrire les résultats JSON dans ce fichier')
+    parser.add_argument('--baseline', help='référence JSON à comparer')
+    parser.add_argument('--save-baseline', help='enregistrer les résultats comme référence')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='baisse de débit tolérée (défaut 0.25, soit 25 %%)')
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if not args.filter or args.filter in name]
+    results = []
+    for name in names:
+        result = measure(name, args.repeat)
+        results.append(result)
+        if 'skipped' in result:
+            print(f"{name:45} ignoré : {result['skipped']}", file=sys.stderr)
+        else:
+            print(f"{name:45} {result['ops_per_second']:>14,.0f} op/s  {result['seconds'] * 1000:>10.2f} ms",
+                  file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        report['regressions'] = [result['name'] for result in regressions]
+        for result in regressions:
+            if 'skipped' in result:
+                print(f"Régression : {result['name']} ignoré ({result['skipped']}), mesuré dans la référence",
+                      file=sys.stderr)
+            else:
+                print(f"Régression : {result['name']} ({result['baseline_ratio']:.0%} du débit de référence)",
+                      file=sys.stderr)
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(body + '\n')
+    else:
+        print(body)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            baseline_file.write(body + '\n')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,25 +30,21 @@ function Dashboard() {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    const fetchNetworkData = async () => {
-      try {
-        const stats = await NetworkService.getNetworkStats();
-        const networkAnomalies = await NetworkService.getNetworkAnomalies();
-        
-        setNetworkStats(stats);
-        setAnomalies(networkAnomalies);
+    // Mises à jour poussées par le serveur (remplace l'actualisation toutes les 30 secondes)
+    const unsubscribe = NetworkService.subscribeNetworkStats(
+      ({ networkStats, anomalies }) => {
+        setNetworkStats(networkStats);
+        setAnomalies(anomalies);
         setLoading(false);
-      } catch (err) {
+      },
+      () => {
         setError('Impossible de charger les données réseau');
         setLoading(false);
       }
-    };
-
-    fetchNetworkData();
-    const intervalId = setInterval(fetchNetworkData, 30000); // Actualisation toutes les 30 secondes
+    );
 
-    // Nettoyer l'intervalle lors du démontage
-    return () => clearInterval(intervalId);
+    // Fermer le flux lors du démontage
+    return unsubscribe;
   }, []);
 
   // Préparer les données pour le graphique
@@ -5,18 +5,24 @@ function IPBlocker() {
   const [ipToBlock, setIpToBlock] = useState('');
   const [duration, setDuration] = useState(null);
   const [blockedIPs, setBlockedIPs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalBlocked, setTotalBlocked] = useState(0);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [successMessage, setSuccessMessage] = useState(null);
+  const [bulkEntries, setBulkEntries] = useState('');
 
   useEffect(() => {
     fetchBlockedIPs();
   }, []);
 
-  const fetchBlockedIPs = async () => {
+  const fetchBlockedIPs = async (cursor = null) => {
     try {
-      const ips = await NetworkService.getBlockedIPs();
-      setBlockedIPs(ips);
+      const page = await NetworkService.getBlockedIPs(cursor);
+      // Sans curseur, la liste est rechargée depuis la première page
+      setBlockedIPs((previous) => cursor ? [...previous, ...page.entries] : page.entries);
+      setNextCursor(page.nextCursor);
+      setTotalBlocked(page.total);
     } catch (err) {
       setError('Impossible de charger les IP bloquées');
     }
@@ -29,10 +35,11 @@ function IPBlocker() {
     setSuccessMessage(null);
 
     try {
-      // Valider l'adresse IP
-      const ipRegex = /^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})$/;
-      if (!ipRegex.test(ipToBlock)) {
-        throw new Error('Adresse IP invalide');
+      // Valider l'adresse IP ou la plage CIDR (IPv4 ou IPv6)
+      const ipv4Regex = /^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})(\/\d{1,2})?$/;
+      const ipv6Regex = /^[0-9a-fA-F:]*:[0-9a-fA-F:.]*(\/\d{1,3})?$/;
+      if (!ipv4Regex.test(ipToBlock) && !ipv6Regex.test(ipToBlock)) {
+        throw new Error('Adresse IP ou plage CIDR invalide');
       }
 
       const result = await NetworkService.blockIP(ipToBlock, duration);
@@ -51,6 +58,29 @@ function IPBlocker() {
     }
   };
 
+  const handleBulkBlock = async (e) => {
+    e.preventDefault();
+    setLoading(true);
+    setError(null);
+    setSuccessMessage(null);
+
+    try {
+      // Une entrée par ligne (adresse ou CIDR), validée côté serveur avant tout blocage
+      const entries = bulkEntries.split(/[\s,;]+/).filter(Boolean);
+      const result = await NetworkService.blockIPs(entries, duration);
+      setSuccessMessage(`${result.count} entrées bloquées avec succès`);
+      setBulkEntries('');
+      fetchBlockedIPs();
+    } catch (err) {
+      const errors = err.response?.data?.errors || [];
+      setError(errors.length
+        ? `Entrées invalides : ${errors.slice(0, 5).map((item) => item.ip).join(', ')}`
+        : 'Erreur lors du blocage groupé');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleUnblockIP = async (ip) => {
     try {
       await NetworkService.unblockIP(ip);
@@ -70,13 +100,13 @@ function IPBlocker() {
         <h2 className="text-xl font-semibold mb-4">Bloquer une IP</h2>
         <form onSubmit={handleBlockIP} className="space-y-4">
           <div>
-            <label htmlFor="ip" className="block mb-2">Adresse IP</label>
+            <label htmlFor="ip" className="block mb-2">Adresse IP ou plage CIDR</label>
             <input
               type="text"
               id="ip"
               value={ipToBlock}
               onChange={(e) => setIpToBlock(e.target.value)}
-              placeholder="Ex: 192.168.1.100"
+              placeholder="Ex: 192.168.1.100 ou 10.0.0.0/24"
               className="w-full p-2 border rounded"
               required
             />
@@ -104,6 +134,24 @@ function IPBlocker() {
           </button>
         </form>
 
+        <form onSubmit={handleBulkBlock} className="space-y-4 mt-6">
+          <label htmlFor="bulk" className="block mb-2">Import en lot (une adresse ou plage par ligne)</label>
+          <textarea
+            id="bulk"
+            value={bulkEntries}
+            onChange={(e) => setBulkEntries(e.target.value)}
+            rows={5}
+            className="w-full p-2 border rounded font-mono"
+          />
+          <button
+            type="submit"
+            disabled={loading || !bulkEntries.trim()}
+            className="bg-blue-500 text-white px-4 py-2 rounded hover:bg-blue-600 disabled:opacity-50"
+          >
+            Bloquer le lot
+          </button>
+        </form>
+
         {/* Gestion des messages */}
         {error && <div className="text-red-500 mt-4">{error}</div>}
         {successMessage && <div className="text-green-500 mt-4">{successMessage}</div>}
@@ -111,7 +159,7 @@ function IPBlocker() {
 
       {/* Liste des IP bloquées */}
       <div className="bg-white shadow-md rounded-lg p-6">
-        <h2 className="text-xl font-semibold mb-4">IP Bloquées</h2>
+        <h2 className="text-xl font-semibold mb-4">IP Bloquées ({totalBlocked})</h2>
         {blockedIPs.length === 0 ? (
           <p className="text-gray-600">Aucune IP bloquée</p>
         ) : (
@@ -119,7 +167,7 @@ function IPBlocker() {
             <thead>
               <tr className="bg-gray-200">
                 <th className="border p-2">Adresse IP</th>
-                <th className="border p-2">Date de blocage</th>
+                <th className="border p-2">Expiration</th>
                 <th className="border p-2">Actions</th>
               </tr>
             </thead>
@@ -128,7 +176,7 @@ function IPBlocker() {
                 <tr key={ip.ip} className="hover:bg-gray-100">
                   <td className="border p-2">{ip.ip}</td>
                   <td className="border p-2">
-                    {new Date(ip.blocked_at).toLocaleString()}
+                    {ip.expires_at ? new Date(ip.expires_at * 1000).toLocaleString() : 'Permanent'}
                   </td>
                   <td className="border p-2">
                     <button
@@ -143,6 +191,14 @@ function IPBlocker() {
             </tbody>
           </table>
         )}
+        {nextCursor && (
+          <button
+            onClick={() => fetchBlockedIPs(nextCursor)}
+            className="mt-4 bg-gray-200 px-4 py-2 rounded hover:bg-gray-300"
+          >
+            Charger plus
+          </button>
+        )}
       </div>
     </div>
   );
@@ -6,14 +6,19 @@ function LogViewer() {
   const [logType, setLogType] = useState('system');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
-  const [pagination, setPagination] = useState({
-    page: 1,
-    limit: 50
-  });
+  // Curseurs des pages visitées (null : première page) et curseur de la page suivante
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const limit = 50;
+  const cursor = cursors[cursors.length - 1];
+
+  useEffect(() => {
+    setCursors([null]);
+  }, [logType]);
 
   useEffect(() => {
     fetchLogs();
-  }, [logType, pagination.page]);
+  }, [logType, cursor]);
 
   const fetchLogs = async () => {
     setLoading(true);
@@ -21,18 +26,20 @@ function LogViewer() {
 
     try {
       let logsData;
+      const options = { cursor, limit };
       switch(logType) {
         case 'network':
-          logsData = await LogService.getNetworkLogs(pagination);
+          logsData = await LogService.getNetworkLogs(options);
           break;
         case 'authentication':
-          logsData = await LogService.getAuthenticationLogs(pagination);
+          logsData = await LogService.getAuthenticationLogs(options);
           break;
         default:
-          logsData = await LogService.getSystemLogs(pagination);
+          logsData = await LogService.getSystemLogs(options);
       }
 
       setLogs(logsData.logs);
+      setNextCursor(logsData.next_cursor);
     } catch (err) {
       setError('Impossible de charger les logs');
       console.error(err);
@@ -52,26 +59,26 @@ function LogViewer() {
   const renderLogTable = () => {
     // Colonnes variables selon le type de log
     const columns = {
-      system: ['Timestamp', 'Niveau', 'Message'],
-      network: ['Interface', 'Timestamp', 'Événement', 'Détails'],
-      authentication: ['Utilisateur', 'Timestamp', 'Action', 'Statut']
+      system: [['Timestamp', 'timestamp'], ['Niveau', 'level'], ['Message', 'message']],
+      network: [['Interface', 'interface'], ['Timestamp', 'timestamp'], ['Événement', 'event'], ['Détails', 'details']],
+      authentication: [['Utilisateur', 'user'], ['Timestamp', 'timestamp'], ['Action', 'action'], ['Statut', 'status']]
     }[logType];
 
     return (
       <table className="w-full border-collapse">
         <thead>
           <tr className="bg-gray-200">
-            {columns.map(column => (
-              <th key={column} className="border p-2">{column}</th>
+            {columns.map(([label]) => (
+              <th key={label} className="border p-2">{label}</th>
             ))}
           </tr>
         </thead>
         <tbody>
-          {logs.map((log, index) => (
-            <tr key={index} className="hover:bg-gray-100">
-              {columns.map(column => (
-                <td key={column} className="border p-2">
-                  {log[column.toLowerCase().replace(' ', '_')] || 'N/A'}
+          {logs.map(log => (
+            <tr key={log.id} className="hover:bg-gray-100">
+              {columns.map(([label, field]) => (
+                <td key={label} className="border p-2">
+                  {log[field] || 'N/A'}
                 </td>
               ))}
             </tr>
@@ -121,16 +128,17 @@ function LogViewer() {
       {/* Pagination */}
       <div className="mt-6 flex justify-center space-x-4">
         <button 
-          onClick={() => setPagination(prev => ({ ...prev, page: prev.page - 1 }))}
-          disabled={pagination.page === 1}
+          onClick={() => setCursors(prev => prev.slice(0, -1))}
+          disabled={cursors.length === 1}
           className="px-4 py-2 bg-blue-500 text-white rounded disabled:opacity-50"
         >
           Précédent
         </button>
-        <span>Page {pagination.page}</span>
+        <span>Page {cursors.length}</span>
         <button 
-          onClick={() => setPagination(prev => ({ ...prev, page: prev.page + 1 }))}
-          className="px-4 py-2 bg-blue-500 text-white rounded"
+          onClick={() => setCursors(prev => [...prev, nextCursor])}
+          disabled={!nextCursor}
+          className="px-4 py-2 bg-blue-500 text-white rounded disabled:opacity-50"
         >
           Suivant
         </button>
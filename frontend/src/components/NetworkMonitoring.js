@@ -29,34 +29,47 @@ function NetworkMonitoring() {
   const [selectedInterface, setSelectedInterface] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [topTalkers, setTopTalkers] = useState(null);
 
   useEffect(() => {
-    const fetchNetworkData = async () => {
-      try {
-        const stats = await NetworkService.getNetworkStats();
-        const networkAnomalies = await NetworkService.getNetworkAnomalies();
-        
-        setNetworkStats(stats);
-        setAnomalies(networkAnomalies);
-        
+    // Mises à jour poussées par le serveur (remplace l'actualisation toutes les 30 secondes)
+    const unsubscribe = NetworkService.subscribeNetworkStats(
+      ({ networkStats, anomalies }) => {
+        setNetworkStats(networkStats);
+        setAnomalies(anomalies);
+
         // Sélectionner la première interface par défaut
-        if (stats.length > 0) {
-          setSelectedInterface(stats[0].interface);
+        if (networkStats.length > 0) {
+          setSelectedInterface(current => current || networkStats[0].interface);
         }
-        
         setLoading(false);
-      } catch (err) {
+      },
+      () => {
         setError('Impossible de charger les données réseau');
         setLoading(false);
       }
-    };
+    );
 
-    fetchNetworkData();
-    const intervalId = setInterval(fetchNetworkData, 30000); // Actualisation toutes les 30 secondes
-
-    return () => clearInterval(intervalId);
+    // Fermer le flux lors du démontage
+    return unsubscribe;
   }, []);
 
+  // Top talkers de l'interface sélectionnée, actualisés lorsqu'une anomalie apparaît
+  useEffect(() => {
+    if (!selectedInterface) return;
+    NetworkService.getTopTalkers({ interface: selectedInterface, window: 300, limit: 5 })
+      .then(setTopTalkers)
+      .catch(() => setTopTalkers(null));
+  }, [selectedInterface, anomalies.length]);
+
+  const handleBlockTalker = async (ip) => {
+    try {
+      await NetworkService.blockIP(ip);
+    } catch (err) {
+      setError(`Impossible de bloquer ${ip}`);
+    }
+  };
+
   // Préparer les données pour le graphique de l'interface sélectionnée
   const getInterfaceChartData = () => {
     if (!selectedInterface) return null;
@@ -152,6 +165,42 @@ function NetworkMonitoring() {
         )}
       </div>
 
+      {/* Top talkers (5 dernières minutes) */}
+      {topTalkers && (
+        <div className="bg-white shadow-md rounded-lg p-6 mb-6">
+          <h2 className="text-xl font-semibold mb-4">Adresses les plus actives (5 min)</h2>
+          <div className="grid grid-cols-2 gap-4">
+            {[['sources', 'Sources'], ['destinations', 'Destinations']].map(([key, title]) => (
+              <table key={key} className="w-full border-collapse">
+                <thead>
+                  <tr className="bg-gray-200">
+                    <th className="border p-2">{title}</th>
+                    <th className="border p-2">Volume (Ko)</th>
+                    <th className="border p-2">Actions</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {topTalkers[key].map((talker) => (
+                    <tr key={talker.ip}>
+                      <td className="border p-2">{talker.ip}</td>
+                      <td className="border p-2">{(talker.bytes / 1024).toFixed(1)}</td>
+                      <td className="border p-2">
+                        <button
+                          onClick={() => handleBlockTalker(talker.ip)}
+                          className="bg-red-500 text-white px-2 py-1 rounded hover:bg-red-600"
+                        >
+                          Bloquer
+                        </button>
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* Anomalies Réseau */}
       <div className="bg-white shadow-md rounded-lg p-6">
         <h2 className="text-xl font-semibold mb-4">Anomalies Réseau</h2>
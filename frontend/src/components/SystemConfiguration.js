@@ -5,10 +5,11 @@ import { AuthService } from '../services/AuthService';
 function SystemConfiguration() {
   const [configuration, setConfiguration] = useState({
     network_interface: '',
-    monitoring_interval: 30,
+    monitoring_interval: 1,
     bandwidth_threshold: 1024 * 1024, // 1 Mo/s
     log_retention_days: 30,
-    anomaly_detection_enabled: true
+    anomaly_detection_enabled: true,
+    adaptive_sampling: true
   });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -37,7 +38,8 @@ function SystemConfiguration() {
     setConfiguration(prev => ({
       ...prev,
       [name]: type === 'checkbox' ? checked : 
-              name === 'monitoring_interval' || name === 'bandwidth_threshold' || name === 'log_retention_days' 
+              name === 'monitoring_interval' ? parseFloat(value) :
+              name === 'bandwidth_threshold' || name === 'log_retention_days' 
               ? parseInt(value) : value
     }));
   };
@@ -99,8 +101,9 @@ function SystemConfiguration() {
             name="monitoring_interval"
             value={configuration.monitoring_interval}
             onChange={handleConfigurationChange}
-            min="5"
+            min="0.25"
             max="300"
+            step="0.25"
             className="w-full p-2 border rounded"
           />
         </div>
@@ -156,6 +159,21 @@ function SystemConfiguration() {
           </label>
         </div>
 
+        {/* Échantillonnage Adaptatif */}
+        <div className="flex items-center">
+          <input
+            type="checkbox"
+            id="adaptive_sampling"
+            name="adaptive_sampling"
+            checked={configuration.adaptive_sampling}
+            onChange={handleConfigurationChange}
+            className="mr-2"
+          />
+          <label htmlFor="adaptive_sampling">
+            Échantillonnage adaptatif (rapide pendant les rafales, espacé sur les interfaces inactives)
+          </label>
+        </div>
+
         <button
           type="submit"
           disabled={loading}
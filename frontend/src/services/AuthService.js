@@ -21,6 +21,13 @@ export const AuthService = {
   },
 
   logout: () => {
+    // Révoquer le token côté serveur (sans attendre la réponse)
+    const token = localStorage.getItem('token');
+    if (token) {
+      axios.post(`${API_URL}logout`, {}, { headers: { 'Authorization': token } })
+        .catch(() => {});
+    }
+
     // Supprimer les informations de l'utilisateur
     localStorage.removeItem('user');
     localStorage.removeItem('token');
@@ -50,6 +57,11 @@ export const AuthService = {
         }
       });
       
+      // Les anciens tokens sont invalidés : conserver celui renvoyé par le serveur
+      if (response.data.token) {
+        localStorage.setItem('token', response.data.token);
+      }
+      
       return response.data;
     } catch (error) {
       console.error('Erreur de modification de mot de passe', error);
@@ -3,6 +3,7 @@ import { AuthService } from './AuthService';
 
 const API_URL = 'http://localhost:5000/api/logs/';
 
+// Pages du plus récent au plus ancien : passer le next_cursor de la réponse pour la page suivante
 export const LogService = {
   async getSystemLogs(options = {}) {
     try {
@@ -11,7 +12,7 @@ export const LogService = {
           'Authorization': AuthService.getToken() 
         },
         params: {
-          page: options.page || 1,
+          cursor: options.cursor,
           limit: options.limit || 50,
           type: options.type || 'all'
         }
@@ -30,7 +31,7 @@ export const LogService = {
           'Authorization': AuthService.getToken() 
         },
         params: {
-          page: options.page || 1,
+          cursor: options.cursor,
           limit: options.limit || 50,
           interface: options.interface
         }
@@ -49,7 +50,7 @@ export const LogService = {
           'Authorization': AuthService.getToken() 
         },
         params: {
-          page: options.page || 1,
+          cursor: options.cursor,
           limit: options.limit || 50,
           user: options.user
         }
@@ -3,15 +3,32 @@ import { AuthService } from './AuthService';
 
 const API_URL = 'http://localhost:5000/api/network/';
 
+// Format compact : une liste de valeurs par champ (les clés ne sont pas répétées par ligne).
+// Le JSON par lignes reste accepté si le serveur ne propose pas ce format ; la compression
+// (gzip / brotli) est négociée et décodée par le navigateur.
+const COLUMNAR_ACCEPT = 'application/vnd.nbm.columnar+json, application/json;q=0.5';
+
+// Reconstituer les lignes d'une réponse en colonnes
+const toRows = (data, key) => {
+  if (data.format !== 'columnar') return data[key];
+  const columns = data[key];
+  const names = Object.keys(columns);
+  const count = names.length ? columns[names[0]].length : 0;
+  return Array.from({ length: count }, (_, i) =>
+    Object.fromEntries(names.map(name => [name, columns[name][i]]))
+  );
+};
+
 export const NetworkService = {
   async getNetworkStats() {
     try {
-      const response = await axios.get(`${API_URL}stats`, {
+      const response = await axios.get(`${API_URL}network/stats`, {
         headers: { 
-          'Authorization': AuthService.getToken() 
+          'Authorization': AuthService.getToken(),
+          'Accept': COLUMNAR_ACCEPT
         }
       });
-      return response.data.network_stats;
+      return toRows(response.data, 'network_stats');
     } catch (error) {
       console.error('Erreur lors de la récupération des statistiques réseau', error);
       throw error;
@@ -20,18 +37,117 @@ export const NetworkService = {
 
   async getNetworkAnomalies() {
     try {
-      const response = await axios.get(`${API_URL}anomalies`, {
+      const response = await axios.get(`${API_URL}network/anomalies`, {
         headers: { 
-          'Authorization': AuthService.getToken() 
+          'Authorization': AuthService.getToken(),
+          'Accept': COLUMNAR_ACCEPT
         }
       });
-      return response.data.anomalies;
+      return toRows(response.data, 'anomalies');
     } catch (error) {
       console.error('Erreur lors de la récupération des anomalies réseau', error);
       throw error;
     }
   },
 
+  async getNetworkHistory(options = {}) {
+    try {
+      const response = await axios.get(`${API_URL}network/history`, {
+        headers: { 
+          'Authorization': AuthService.getToken() 
+        },
+        params: {
+          interface: options.interface,
+          since: options.since,
+          step: options.step
+        }
+      });
+      return response.data.history;
+    } catch (error) {
+      console.error('Erreur lors de la récupération de l\'historique réseau', error);
+      throw error;
+    }
+  },
+
+  // Adresses les plus actives (sources / destinations) sur une fenêtre glissante
+  async getTopTalkers(options = {}) {
+    try {
+      const response = await axios.get(`${API_URL}network/top-talkers`, {
+        headers: { 
+          'Authorization': AuthService.getToken() 
+        },
+        params: {
+          interface: options.interface,
+          window: options.window,
+          limit: options.limit
+        }
+      });
+      return response.data.top_talkers;
+    } catch (error) {
+      console.error('Erreur lors de la récupération des top talkers', error);
+      throw error;
+    }
+  },
+
+  // Abonnement au flux Server-Sent Events : un snapshot complet à la connexion,
+  // puis uniquement les interfaces modifiées à chaque tick.
+  // fetch est utilisé plutôt qu'EventSource pour pouvoir envoyer l'en-tête Authorization.
+  subscribeNetworkStats(onUpdate, onError) {
+    const controller = new AbortController();
+    const statsByInterface = new Map();
+
+    const handleEvent = (rawEvent) => {
+      let eventType = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event:')) eventType = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (!data) return; // Commentaire keepalive
+
+      const payload = JSON.parse(data);
+      if (eventType === 'snapshot') statsByInterface.clear();
+      payload.network_stats.forEach(stat => statsByInterface.set(stat.interface, stat));
+      (payload.removed || []).forEach(name => statsByInterface.delete(name));
+
+      onUpdate({
+        networkStats: Array.from(statsByInterface.values()),
+        anomalies: payload.anomalies
+      });
+    };
+
+    const connect = async () => {
+      try {
+        const response = await fetch(`${API_URL}network/stream`, {
+          headers: { 'Authorization': AuthService.getToken() },
+          signal: controller.signal
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let separator;
+          while ((separator = buffer.indexOf('\n\n')) >= 0) {
+            handleEvent(buffer.slice(0, separator));
+            buffer = buffer.slice(separator + 2);
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Erreur du flux de statistiques réseau', error);
+        if (onError) onError(error);
+      }
+    };
+
+    connect();
+    return () => controller.abort();
+  },
+
   async blockIP(ipAddress, duration = null) {
     try {
       const response = await axios.post(`${API_URL}ip/block`, 
@@ -66,17 +182,109 @@ export const NetworkService = {
     }
   },
 
-  async getBlockedIPs() {
+  // Blocage groupé : une seule requête et une seule transaction pare-feu pour tout le lot
+  async blockIPs(entries, duration = null) {
+    try {
+      const response = await axios.post(`${API_URL}ip/block/batch`,
+        { entries, duration },
+        {
+          headers: { 
+            'Authorization': AuthService.getToken() 
+          }
+        }
+      );
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors du blocage groupé', error);
+      throw error;
+    }
+  },
+
+  async unblockIPs(entries) {
+    try {
+      const response = await axios.post(`${API_URL}ip/unblock/batch`,
+        { entries },
+        {
+          headers: { 
+            'Authorization': AuthService.getToken() 
+          }
+        }
+      );
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors du déblocage groupé', error);
+      throw error;
+    }
+  },
+
+  async getBlockedIPs(cursor = null, limit = 500) {
     try {
       const response = await axios.get(`${API_URL}ip/blocked`, {
+        params: cursor ? { cursor, limit } : { limit },
         headers: { 
-          'Authorization': AuthService.getToken() 
+          'Authorization': AuthService.getToken(),
+          'Accept': COLUMNAR_ACCEPT
         }
       });
-      return response.data.blocked_ips;
+      // Page d'entrées triées ; nextCursor est null sur la dernière page
+      return {
+        entries: toRows(response.data, 'entries'),
+        nextCursor: response.data.next_cursor,
+        total: response.data.total
+      };
     } catch (error) {
       console.error('Erreur lors de la récupération des IP bloquées', error);
       throw error;
     }
+  },
+
+  async getBandwidthLimits(networkInterface = null) {
+    try {
+      const response = await axios.get(`${API_URL}shaping/limits`, {
+        params: networkInterface ? { interface: networkInterface } : {},
+        headers: { 
+          'Authorization': AuthService.getToken() 
+        }
+      });
+      return response.data.limits;
+    } catch (error) {
+      console.error('Erreur lors de la récupération des limites de débit', error);
+      throw error;
+    }
+  },
+
+  // Limites { interface, target, rate, ceil, match } appliquées en une seule transaction netlink
+  async setBandwidthLimits(limits) {
+    try {
+      const response = await axios.post(`${API_URL}shaping/limits`,
+        { limits },
+        {
+          headers: { 
+            'Authorization': AuthService.getToken() 
+          }
+        }
+      );
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors de l\'application des limites de débit', error);
+      throw error;
+    }
+  },
+
+  async clearBandwidthLimits(networkInterface, targets = []) {
+    try {
+      const params = new URLSearchParams({ interface: networkInterface });
+      targets.forEach(target => params.append('target', target));
+      const response = await axios.delete(`${API_URL}shaping/limits`, {
+        params,
+        headers: { 
+          'Authorization': AuthService.getToken() 
+        }
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors du retrait des limites de débit', error);
+      throw error;
+    }
   }
 };
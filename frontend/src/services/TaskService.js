@@ -0,0 +1,66 @@
+import axios from 'axios';
+import { AuthService } from './AuthService';
+
+const API_URL = 'http://localhost:5000/api/tasks/';
+
+const authHeaders = () => ({ 'Authorization': AuthService.getToken() });
+
+export const TaskService = {
+  // Opérations : history, logs-export, blocklist-import, anomalies-backfill
+  async submit(operation, params = {}) {
+    try {
+      const response = await axios.post(`${API_URL}${operation}`, params, {
+        headers: authHeaders()
+      });
+      // 200 : résultat en cache ; 202 : tâche lancée
+      return response.data;
+    } catch (error) {
+      console.error('Erreur lors du lancement de la tâche', error);
+      throw error;
+    }
+  },
+
+  async getStatus(taskId) {
+    const response = await axios.get(`${API_URL}${taskId}`, { headers: authHeaders() });
+    return response.data;
+  },
+
+  // Lancer l'opération puis interroger son état jusqu'au résultat
+  async run(operation, params = {}, { interval = 1000, timeout = 600000 } = {}) {
+    const submitted = await this.submit(operation, params);
+    if (submitted.cached) return submitted.result;
+
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+      const response = await axios.get(`${API_URL}${submitted.task_id}/result`, {
+        headers: authHeaders(),
+        validateStatus: status => status === 200 || status === 202
+      });
+      if (response.status === 200) return response.data.result;
+      await new Promise(resolve => setTimeout(resolve, interval));
+    }
+    throw new Error('Délai dépassé pour la tâche ' + submitted.task_id);
+  },
+
+  async downloadExport(taskId) {
+    try {
+      const response = await axios.get(`${API_URL}${taskId}/download`, {
+        headers: authHeaders(),
+        responseType: 'blob'
+      });
+
+      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const link = document.createElement('a');
+      link.href = url;
+      link.setAttribute('download', `network_stats_${taskId}.csv`);
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+
+      return true;
+    } catch (error) {
+      console.error('Erreur lors du téléchargement de l\'export', error);
+      throw error;
+    }
+  }
+};
@@ -0,0 +1,151 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest import mock
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.adaptive import AdaptiveSampling
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.scheduler import SamplingScheduler
+from backend.network_manager.system_config import ConfigWatcher, SystemConfig
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestAdaptiveSampling(unittest.TestCase):
+    def test_interval_follows_activity(self):
+        """Tester l'intervalle rapide sur variation ou anomalie, puis l'espacement d'une interface inactive"""
+        adaptive = AdaptiveSampling(base_interval=1.0, fast_interval=0.25, max_interval=8.0)
+        self.assertEqual(adaptive.update('eth0', 50000, 50000), 1.0)
+        self.assertEqual(adaptive.update('eth0', 500000, 50000), 0.25)
+        self.assertEqual(adaptive.update('eth0', 500000, 50000), 0.5)
+        self.assertEqual(adaptive.update('eth0', 500000, 50000, anomaly=True), 0.25)
+        self.assertEqual(adaptive.update('eth0', 500000, 50000), 0.5)
+        self.assertEqual(adaptive.update('eth0', 500000, 50000), 1.0)
+        # Inactive : doublement jusqu'au plafond
+        intervals = [adaptive.update('eth0', 0, 10) for _ in range(5)]
+        self.assertEqual(intervals, [0.25, 1.0, 2.0, 4.0, 8.0])
+        # Reprise du trafic : intervalle rapide, puis retour progressif à l'intervalle de base
+        intervals = [adaptive.update('eth0', rate, 40000) for rate in (40000, 41000, 40000, 41000)]
+        self.assertEqual(intervals, [0.25, 0.5, 1.0, 1.0])
+        with self.assertRaises(ValueError):
+            adaptive.configure(base_interval=0.1)
+
+    def test_monitor_samples_each_interface_when_due(self):
+        """Tester que seules les interfaces dues sont relevées et que les débits couvrent l'écart réel"""
+        clock = FakeClock()
+        source = SyntheticSource(2, prefix='eth', bytes_per_read=0)
+        source.set_rate('eth0', 100000, 100000)
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=source,
+                                         adaptive=AdaptiveSampling(1.0, 0.25, 8.0))
+        with mock.patch('backend.network_manager.advanced_monitor.time.monotonic', clock):
+            for _ in range(8):
+                monitor._update_network_stats()
+                clock.now += 1.0
+            # eth1 est inactive : espacée jusqu'à 8 s, eth0 relevée à chaque seconde
+            self.assertEqual(monitor.adaptive.interval('eth0'), 1.0)
+            self.assertEqual(monitor.adaptive.interval('eth1'), 8.0)
+            self.assertEqual(len(monitor.history.buffer('eth0')), 8)
+            self.assertEqual(len(monitor.history.buffer('eth1')), 4)
+
+            # eth0 passe de 100 Ko à 1 Mo par lecture : intervalle rapide
+            source.set_rate('eth0', 1000000, 100000)
+            # eth1 relevée 8 s après son dernier échantillon : débit rapporté à l'écart réel
+            source.set_rate('eth1', 4000, 4000)
+            clock.now = 1015.0
+            monitor._update_network_stats()
+        self.assertEqual(monitor.adaptive.interval('eth0'), 0.25)
+        stats = {stat['interface']: stat for stat in monitor.get_current_stats()}
+        self.assertAlmostEqual(stats['eth1']['speed_upload'], 4000 / 8)
+
+class TestSystemConfig(unittest.TestCase):
+    def test_validation(self):
+        """Tester le refus des paramètres inconnus, mal typés ou hors bornes"""
+        config = SystemConfig().updated({'monitoring_interval': 5, 'network_interface': ' eth0, wlan0 ,'})
+        self.assertEqual(config.monitoring_interval, 5.0)
+        self.assertEqual(config.interfaces(), ['eth0', 'wlan0'])
+        for invalid in ({'unknown': 1}, {'monitoring_interval': '5'}, {'anomaly_detection_enabled': 1},
+                        {'monitoring_interval': 0.1}, {'monitoring_interval': 500}, {'log_retention_days': 0}):
+            with self.assertRaises(ValueError):
+                SystemConfig().updated(invalid)
+
+    def test_watcher_applies_saved_config(self):
+        """Tester l'application à chaud d'une configuration enregistrée"""
+        path = os.path.join(tempfile.mkdtemp(), 'system_config.json')
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(3, prefix='eth'))
+        scheduler = SamplingScheduler()
+        watcher = ConfigWatcher(path, monitor)
+        # Fichier absent : valeurs par défaut, échantillonnage adaptatif actif
+        watcher.check()
+        self.assertIsNotNone(monitor.adaptive)
+
+        SystemConfig().updated({
+            'network_interface': 'eth1', 'monitoring_interval': 2, 'adaptive_sampling': False,
+            'bandwidth_threshold': 2048, 'anomaly_detection_enabled': False
+        }).save(path)
+        job = watcher.start(scheduler)
+        self.assertIsNone(monitor.adaptive)
+        self.assertEqual(monitor.interval, 2.0)
+        self.assertEqual(monitor.anomaly_engine.ceiling, 2048)
+        self.assertFalse(monitor.anomaly_detection_enabled)
+        monitor._update_network_stats()
+        self.assertEqual([stat['interface'] for stat in monitor.get_current_stats()], ['eth1'])
+        scheduler.remove_job(job)
+
+    def test_apply_fast_interval_above_current_interval(self):
+        """Tester un intervalle rapide supérieur à l'intervalle courant, appliqué d'un bloc"""
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(1),
+                                         adaptive=AdaptiveSampling(1.0, 0.25, 8.0))
+        SystemConfig().updated({'monitoring_interval': 5, 'fast_interval': 2}).apply(monitor)
+        self.assertEqual(monitor.interval, 5.0)
+        self.assertEqual((monitor.adaptive.fast_interval, monitor.adaptive.base_interval), (2.0, 5.0))
+
+        # Retour en arrière : le nouvel intervalle de base est inférieur à l'ancien intervalle rapide
+        SystemConfig().updated({'monitoring_interval': 1, 'fast_interval': 0.5}).apply(monitor)
+        self.assertEqual((monitor.adaptive.fast_interval, monitor.adaptive.base_interval), (0.5, 1.0))
+
+        # Activation de l'échantillonnage adaptatif avec les bornes finales
+        monitor.set_adaptive(None)
+        SystemConfig().updated({'monitoring_interval': 5, 'fast_interval': 3}).apply(monitor)
+        self.assertEqual((monitor.adaptive.fast_interval, monitor.adaptive.base_interval), (3.0, 5.0))
+
+    def test_apply_waits_for_running_tick(self):
+        """Tester qu'une configuration appliquée pendant un tick n'est installée qu'à sa fin"""
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(3, prefix='eth'),
+                                         adaptive=AdaptiveSampling(1.0, 0.25, 8.0))
+        monitor._update_network_stats()
+        # Toutes les interfaces dues au tick suivant
+        monitor._next_due.clear()
+        appliers = []
+        has_open = monitor.anomaly_engine.has_open
+
+        def apply_mid_tick(interface):
+            # Requête POST /system/config concurrente, au milieu du calcul du tick
+            if not appliers:
+                config = SystemConfig().updated({'adaptive_sampling': False, 'network_interface': 'eth0'})
+                appliers.append(threading.Thread(target=config.apply, args=(monitor,)))
+                appliers[0].start()
+                appliers[0].join(0.1)
+                self.assertTrue(appliers[0].is_alive())
+            return has_open(interface)
+
+        with mock.patch.object(monitor.anomaly_engine, 'has_open', side_effect=apply_mid_tick):
+            monitor._update_network_stats()
+        appliers[0].join()
+        self.assertEqual(len(monitor.get_current_stats()), 3)
+        self.assertIsNone(monitor.adaptive)
+        self.assertEqual(monitor._next_due, {})
+        monitor._update_network_stats()
+        self.assertEqual([stat['interface'] for stat in monitor.get_current_stats()], ['eth0'])
+
+if __name__ == '__main__':
+    unittest.main()
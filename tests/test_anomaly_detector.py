@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.anomaly_detector import (
+    AnomalyEngine, EwmaDetector, SeasonalEwmaDetector, ThresholdDetector
+)
+
+class TestAnomalyEngine(unittest.TestCase):
+    def feed(self, engine, start, values, download=1000.0):
+        for offset, value in enumerate(values):
+            engine.observe('eth0', float(start + offset), value, download)
+
+    def test_spike_opens_and_closes_event(self):
+        """Tester l'ouverture puis la fermeture d'un événement sur un pic"""
+        engine = AnomalyEngine(EwmaDetector(alpha=0.1, warmup=20, min_std=100))
+        # Lien de 10 Go/s stable : aucun événement malgré un débit élevé
+        self.feed(engine, 0, [1e9 + (i % 5) * 1e6 for i in range(100)])
+        self.assertEqual(engine.events(), [])
+
+        self.feed(engine, 100, [5e9, 6e9])
+        events = engine.events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['metric'], 'speed_upload')
+        self.assertEqual(events[0]['start'], 100.0)
+        self.assertIsNone(events[0]['end'])
+        self.assertGreaterEqual(events[0]['value'], 5e9)
+
+        self.feed(engine, 102, [1e9] * 3)
+        events = engine.events()
+        self.assertEqual(events[0]['end'], 102.0)
+
+    def test_event_log_is_bounded(self):
+        """Tester que le journal d'événements reste borné"""
+        engine = AnomalyEngine(ThresholdDetector(threshold=100), threshold=1.0, event_log_size=3)
+        for i in range(10):
+            self.feed(engine, i * 2, [500, 0], download=0)
+        self.assertEqual(len(engine.events()), 3)
+
+    def test_seasonal_baseline_per_hour(self):
+        """Tester que la référence saisonnière est propre à chaque heure"""
+        detector = SeasonalEwmaDetector(warmup=1, utc=True)
+        detector.score(('eth0', 'speed_upload'), 1e6, 0)
+        _, baseline_other_hour = detector.score(('eth0', 'speed_upload'), 5e6, 3600)
+        _, baseline_same_hour = detector.score(('eth0', 'speed_upload'), 5e6, 60)
+        self.assertEqual(baseline_other_hour, 0.0)
+        self.assertEqual(baseline_same_hour, 1e6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,37 @@
 import unittest
 import sys
 import os
+from unittest import mock
 
 # Ajouter le chemin du projet pour l'import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.auth.jwt_auth import AuthManager, authenticate, User
+from backend.auth.jwt_auth import (
+    AuthManager, MemoryRevocationStore, RedisRevocationStore, TokenCache, authenticate, User
+)
+
+class FakeRedis:
+    """Client Redis en mémoire (get / mget / set / incr), sans expiration ; `down` simule une panne"""
+    def __init__(self):
+        self.data = {}
+        self.reads = 0
+        self.down = False
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        if self.down:
+            raise ConnectionError('Redis injoignable')
+        self.reads += 1
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
 
 class TestAuthentication(unittest.TestCase):
     def setUp(self):
@@ -58,5 +84,83 @@ class TestAuthentication(unittest.TestCase):
         decoded_username = AuthManager.verify_token(token)
         self.assertIsNotNone(decoded_username)
 
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        AuthManager.token_cache.clear()
+        patcher = mock.patch.object(AuthManager, 'revocations', MemoryRevocationStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verified_token_is_not_decoded_again(self):
+        """Tester qu'un token déjà vérifié est servi par le cache"""
+        token = AuthManager.generate_token('cached_user')
+        with mock.patch('backend.auth.jwt_auth.jwt.decode', wraps=__import__('jwt').decode) as decode:
+            for _ in range(5):
+                self.assertEqual(AuthManager.verify_token(token), 'cached_user')
+        self.assertEqual(decode.call_count, 1)
+
+    def test_revocation_and_user_invalidation(self):
+        """Tester la révocation d'un token et l'invalidation après changement de mot de passe"""
+        token = AuthManager.generate_token('revoked_user')
+        other = AuthManager.generate_token('other_user')
+        AuthManager.revoke_token(token)
+        self.assertIsNone(AuthManager.verify_token(token))
+
+        # Invalidation dans la même seconde que l'émission ; un token émis ensuite reste valide
+        AuthManager.invalidate_user_tokens('other_user')
+        self.assertIsNone(AuthManager.verify_token(other))
+        self.assertEqual(AuthManager.verify_token(AuthManager.generate_token('other_user')), 'other_user')
+
+    def test_revocations_are_shared_between_workers(self):
+        """Tester qu'une déconnexion et une invalidation faites par un worker s'appliquent aux autres"""
+        redis_client = FakeRedis()
+        now = [0.0]
+        workers = [(TokenCache(), RedisRevocationStore(redis_client, cache_ttl=5, clock=lambda: now[0]))
+                   for _ in range(2)]
+
+        def verify(worker, token):
+            with mock.patch.object(AuthManager, 'token_cache', worker[0]), \
+                    mock.patch.object(AuthManager, 'revocations', worker[1]):
+                return AuthManager.verify_token(token)
+
+        with mock.patch.object(AuthManager, 'revocations', workers[0][1]):
+            token, other = AuthManager.generate_token('alice'), AuthManager.generate_token('bob')
+        self.assertEqual(verify(workers[1], token), 'alice')
+        with mock.patch.object(AuthManager, 'token_cache', workers[0][0]), \
+                mock.patch.object(AuthManager, 'revocations', workers[0][1]):
+            AuthManager.revoke_token(token)
+            AuthManager.invalidate_user_tokens('bob')
+        self.assertIsNone(verify(workers[0], token))
+        # État lu par l'autre worker servi localement, sans aller-retour Redis, jusqu'à sa péremption
+        reads = redis_client.reads
+        self.assertEqual(verify(workers[1], token), 'alice')
+        self.assertEqual(redis_client.reads, reads)
+        now[0] = 6
+        self.assertIsNone(verify(workers[1], token))
+        self.assertIsNone(verify(workers[1], other))
+
+    def test_redis_outage_uses_last_known_state(self):
+        """Tester le dernier état connu servi pendant une panne Redis, et le refus des tokens jamais vérifiés"""
+        redis_client = FakeRedis()
+        now = [0.0]
+        store = RedisRevocationStore(redis_client, cache_ttl=5, clock=lambda: now[0])
+        with mock.patch.object(AuthManager, 'revocations', store):
+            known = AuthManager.generate_token('alice')
+            self.assertEqual(AuthManager.verify_token(known), 'alice')
+            unknown = AuthManager.generate_token('bob')
+            redis_client.down = True
+            now[0] = 60
+            self.assertEqual(AuthManager.verify_token(known), 'alice')
+            self.assertIsNone(AuthManager.verify_token(unknown))
+
+    def test_cache_is_bounded_and_honours_expiry(self):
+        """Tester l'éviction LRU et l'expiration des entrées"""
+        cache = TokenCache(max_size=2)
+        for name in ('a', 'b', 'c'):
+            cache.put(name, {'user_id': name, 'exp': 100})
+        self.assertIsNone(cache.get('a', now=50))
+        self.assertEqual(cache.get('c', now=50)['user_id'], 'c')
+        self.assertIsNone(cache.get('c', now=100))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import run
+
+class TestBenchmarkComparison(unittest.TestCase):
+    def test_regressions_against_baseline(self):
+        """Tester la détection des régressions de débit par rapport à la référence"""
+        baseline = {'results': [
+            {'name': 'a', 'ops_per_second': 1000.0},
+            {'name': 'b', 'ops_per_second': 1000.0},
+            {'name': 'c', 'skipped': 'flask absent'},
+            {'name': 'e', 'ops_per_second': 1000.0},
+        ]}
+        results = [
+            {'name': 'a', 'ops_per_second': 800.0},
+            {'name': 'b', 'ops_per_second': 700.0},
+            {'name': 'c', 'ops_per_second': 10.0},
+            {'name': 'd', 'ops_per_second': 1.0},
+            # Cas mesuré dans la référence, ignoré ici (ex. import cassé) : régression
+            {'name': 'e', 'skipped': 'flask absent'},
+        ]
+        regressions = run.compare(results, baseline, tolerance=0.25)
+        self.assertEqual([result['name'] for result in regressions], ['b', 'e'])
+        self.assertAlmostEqual(results[0]['baseline_ratio'], 0.8)
+
+    def test_measure_smallest_case(self):
+        """Tester le format d'un résultat mesuré"""
+        result = run.measure('monitor.update[10]', repeat=2)
+        self.assertEqual(result['ops'], 10)
+        self.assertGreater(result['ops_per_second'], 0)
+        self.assertLessEqual(result['min_seconds'], result['seconds'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager import encoding
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+
+class TestEncoding(unittest.TestCase):
+    def test_columns_and_compression(self):
+        """Tester la disposition en colonnes et la compression des grands corps uniquement"""
+        rows = [{'ip': '10.0.0.1', 'expires_at': None}, {'ip': '10.0.0.0/24', 'comment': 'x'}]
+        self.assertEqual(encoding.columns(rows), {
+            'ip': ['10.0.0.1', '10.0.0.0/24'], 'expires_at': [None, None], 'comment': [None, 'x']
+        })
+        self.assertEqual(encoding.columns([]), {})
+
+        small = encoding.encode({'status': 'success'}, encoding.COLUMNAR)
+        self.assertEqual(encoding.compress(small, 'gzip'), (small, None))
+        self.assertEqual(encoding.MSGPACK in encoding.formats(), encoding.msgpack is not None)
+
+        # Un millier d'interfaces : colonnes compressées au moins dix fois plus petites que le JSON par lignes
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(1000))
+        for _ in range(2):
+            monitor._update_network_stats()
+        snapshot = monitor.snapshot
+        payload = {'status': 'success', 'network_stats': encoding.columns(snapshot.network_stats)}
+        body, applied = encoding.compress(encoding.encode(payload, encoding.COLUMNAR), encoding.encodings()[-1])
+        self.assertEqual(applied, 'gzip')
+        self.assertLess(len(body) * 10, len(snapshot.stats_body))
+        self.assertEqual(json.loads(gzip.decompress(body))['network_stats']['interface'][0], 'syn0')
+
+    def test_variant_cache(self):
+        """Tester qu'une représentation n'est encodée qu'une fois par version"""
+        cache = encoding.VariantCache(size=2)
+        builds = []
+
+        def build(value):
+            def run():
+                builds.append(value)
+                return value, None
+            return run
+
+        self.assertEqual(cache.get(('v1', 'gzip'), build(b'a')), (b'a', None))
+        self.assertEqual(cache.get(('v1', 'gzip'), build(b'b')), (b'a', None))
+        cache.get(('v2', 'gzip'), build(b'c'))
+        cache.get(('v3', 'gzip'), build(b'd'))
+        cache.get(('v1', 'gzip'), build(b'e'))
+        self.assertEqual(builds, [b'a', b'c', b'd', b'e'])
+
+if __name__ == '__main__':
+    unittest.main()
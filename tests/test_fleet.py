@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor, NetworkStats
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.fleet import (
+    FleetAgent, FleetAggregator, FleetLimitError, FrameError, FrameInterface, decode_frame, encode_frame
+)
+
+START = 1700000000.0
+
+def counters(interface, sent, recv):
+    return NetworkStats(interface, sent, recv, sent // 100, recv // 100, 0, 0)
+
+class TestFleetFrames(unittest.TestCase):
+    def test_frame_roundtrip(self):
+        """Tester l'encodage des deltas : grands compteurs, horloge qui recule, interface sans échantillon"""
+        interfaces = {
+            'eth0': FrameInterface((2 ** 40, 5, 7, 9), [
+                (START, 1.0, (1500, 0, 3, 0)),
+                (START + 1.5, 0.25, (2 ** 33, 10, 0, 1)),
+                (START + 1.2, 1.0, (0, 0, 0, 0)),
+            ]),
+            'wlan0': FrameInterface((1, 2, 3, 4), []),
+        }
+        frame = encode_frame('node-a', 42, interfaces)
+        decoded = decode_frame(frame)
+        self.assertEqual((decoded.node, decoded.sequence), ('node-a', 42))
+        self.assertEqual(decoded.interfaces['wlan0'], interfaces['wlan0'])
+        self.assertEqual(decoded.interfaces['eth0'].counters, interfaces['eth0'].counters)
+        for (timestamp, elapsed, deltas), expected in zip(decoded.interfaces['eth0'].samples,
+                                                          interfaces['eth0'].samples):
+            self.assertAlmostEqual(timestamp, expected[0], places=3)
+            self.assertAlmostEqual(elapsed, expected[1], places=6)
+            self.assertEqual(deltas, expected[2])
+        # Quelques octets par échantillon
+        self.assertLess(len(frame), 90)
+        for invalid in (frame[:-1], frame + b'\x00', b'XXXX' + frame[4:]):
+            with self.assertRaises(FrameError):
+                decode_frame(invalid)
+
+class TestFleetAggregator(unittest.TestCase):
+    def test_agents_push_to_aggregator(self):
+        """Tester plusieurs agents (sources synthétiques) fusionnés par nœud et par interface"""
+        aggregator = FleetAggregator()
+        agents, monitors = [], []
+        for index in range(3):
+            agent = FleetAgent(f'node-{index}', aggregator.ingest, flush_interval=3600)
+            monitors.append(AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(2, prefix='eth'),
+                                                   sinks=[agent]))
+            agents.append(agent)
+        for _ in range(3):
+            for monitor in monitors:
+                monitor._update_network_stats()
+        for agent in agents:
+            agent.flush()
+
+        stats = aggregator.stats()
+        self.assertEqual(len(stats), 6)
+        self.assertEqual({(entry['node'], entry['interface']) for entry in stats},
+                         {(f'node-{i}', f'eth{j}') for i in range(3) for j in range(2)})
+        self.assertTrue(all(entry['bytes_sent'] == 3 * 1024 for entry in stats))
+        self.assertEqual(aggregator.summary()['nodes'], 3)
+        self.assertEqual(aggregator.summary()['stale_nodes'], 0)
+
+        # Trame perdue : détectée grâce à la séquence
+        agents[0].sequence += 1
+        monitors[0]._update_network_stats()
+        agents[0].flush()
+        lost = {node['node']: node['lost_frames'] for node in aggregator.nodes()}
+        self.assertEqual(lost, {'node-0': 1, 'node-1': 0, 'node-2': 0})
+        for agent in agents:
+            agent.stop()
+
+    def test_rates_and_anomalies(self):
+        """Tester les débits recalculés sur l'écart réel et la détection d'anomalies côté collecteur"""
+        aggregator = FleetAggregator()
+        agent = FleetAgent('node-a', aggregator.ingest, flush_interval=3600)
+        sent = 0
+        for second in range(120):
+            sent += 1000
+            agent.submit(START + second, [counters('eth0', sent, sent)])
+        # Échantillon espacé de 4 s : débit rapporté à la durée couverte
+        sent += 8000
+        agent.submit(START + 123, [counters('eth0', sent, sent)])
+        agent.flush()
+        self.assertAlmostEqual(aggregator.stats('node-a')[0]['speed_upload'], 2000)
+
+        for second in range(124, 130):
+            sent += 50000000
+            agent.submit(START + second, [counters('eth0', sent, sent)])
+        agent.flush()
+        agent.stop()
+
+        anomalies = aggregator.anomalies('node-a')
+        self.assertTrue(anomalies)
+        self.assertEqual((anomalies[0]['node'], anomalies[0]['interface']), ('node-a', 'eth0'))
+        self.assertEqual(aggregator.anomalies('node-b'), [])
+        history = aggregator.history('node-a', step=60)
+        self.assertEqual(history[0]['interface'], 'eth0')
+        self.assertEqual(history[0]['resolution'], 60)
+        self.assertEqual(history[0]['timestamp'], [START - START % 60 + 60 * i for i in range(3)])
+
+    def test_state_is_bounded(self):
+        """Tester le plafond de nœuds et d'interfaces, et l'oubli des nœuds muets avec leurs séries"""
+        aggregator = FleetAggregator(max_nodes=2, max_interfaces=2, retention=3600)
+
+        def frame(node, *interfaces):
+            return encode_frame(node, 1, {
+                name: FrameInterface((0, 0, 0, 0), [(START, 1.0, (100, 100, 1, 1))]) for name in interfaces
+            })
+
+        aggregator.ingest(frame('node-a', 'eth0', 'eth1'), received=START)
+        aggregator.ingest(frame('node-b', 'eth0'), received=START + 1800)
+        with self.assertRaises(FleetLimitError):
+            aggregator.ingest(frame('node-a', 'eth2'), received=START + 1800)
+        with self.assertRaises(FleetLimitError):
+            aggregator.ingest(frame('node-c', 'eth0'), received=START + 1800)
+        self.assertEqual(aggregator.stats('node-a')[0]['interface'], 'eth0')
+        self.assertEqual(len(aggregator.stats('node-a')), 2)
+
+        # node-a muet depuis plus d'une heure : oublié pour faire place à node-c
+        self.assertEqual(aggregator.ingest(frame('node-c', 'eth0'), received=START + 3700), 1)
+        self.assertEqual([node['node'] for node in aggregator.nodes(now=START + 3700)], ['node-b', 'node-c'])
+        self.assertEqual(aggregator.rollups.query('node-a/eth0'), [])
+        self.assertEqual(aggregator.evict(now=START + 1800 + 3601), ['node-b'])
+
+if __name__ == '__main__':
+    unittest.main()
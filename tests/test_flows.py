@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.flows import ConntrackSource, InterfaceResolver, PacketSocketSource, SpaceSaving, TopTalkers
+
+LINE = ('ipv4     2 tcp      6 431999 ESTABLISHED src={src} dst={dst} sport={sport} dport=443 '
+        'packets=10 bytes={sent} src={dst} dst={src} sport=443 dport={sport} packets=8 bytes={received} '
+        '[ASSURED] mark=0 zone=0 use=2\n')
+
+class TestConntrackSource(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'nf_conntrack')
+        resolver = InterfaceResolver({'eth0': ['192.168.1.0/24'], 'wg0': ['10.8.0.0/24']})
+        self.source = ConntrackSource(self.path, resolver)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, *flows):
+        with open(self.path, 'w') as fixture:
+            for src, dst, sport, sent, received in flows:
+                fixture.write(LINE.format(src=src, dst=dst, sport=sport, sent=sent, received=received))
+
+    def test_deltas_from_cumulative_counters(self):
+        """Tester les deltas par connexion et l'attribution aux interfaces"""
+        self.write(('192.168.1.10', '1.1.1.1', 5000, 1000, 5000))
+        self.assertEqual(self.source.read(), [])
+
+        self.write(('192.168.1.10', '1.1.1.1', 5000, 1500, 9000),
+                   ('10.8.0.2', '8.8.8.8', 6000, 300, 0))
+        self.assertEqual(sorted(self.source.read()), [
+            ('eth0', '1.1.1.1', '192.168.1.10', 4000),
+            ('eth0', '192.168.1.10', '1.1.1.1', 500),
+            ('wg0', '10.8.0.2', '8.8.8.8', 300),
+        ])
+
+    def test_tracked_connections_are_bounded(self):
+        """Tester que l'état conservé entre deux lectures ne dépasse pas max_connections"""
+        source = ConntrackSource(self.path, InterfaceResolver({'eth0': ['192.168.1.0/24']}), max_connections=2)
+        flows = [('192.168.1.10', '1.1.1.1', 5000 + port, 100, 100) for port in range(5)]
+        self.write(*flows)
+        source.read()
+        self.assertTrue(source.truncated)
+        self.write(*[(src, dst, sport, sent + 10, received) for src, dst, sport, sent, received in flows])
+        self.assertEqual(source.read(), [('eth0', '192.168.1.10', '1.1.1.1', 10)] * 2)
+        self.assertEqual(len(source._previous), 2)
+
+        # Les connexions suivies disparaissent : d'autres, ignorées jusque-là, entrent dans la fenêtre
+        self.write(*[(src, dst, sport, sent + 20, received) for src, dst, sport, sent, received in flows[2:]])
+        self.assertEqual(source.read(), [])
+        self.assertTrue(source.truncated)
+        self.write(*[(src, dst, sport, sent + 30, received) for src, dst, sport, sent, received in flows[2:]])
+        self.assertEqual(source.read(), [('eth0', '192.168.1.10', '1.1.1.1', 10)] * 2)
+
+        # Table revenue sous la limite : une connexion inconnue est de nouveau comptée entièrement
+        self.write(*flows[2:3])
+        source.read()
+        self.assertFalse(source.truncated)
+        self.write(*flows[2:3], ('192.168.1.10', '1.1.1.1', 6000, 700, 0))
+        self.assertEqual(source.read(), [('eth0', '192.168.1.10', '1.1.1.1', 700)])
+
+    def test_lines_without_accounting_are_skipped(self):
+        """Tester qu'une ligne sans compteurs (nf_conntrack_acct=0) est ignorée"""
+        line = 'ipv4 2 udp 17 29 src=10.0.0.1 dst=10.0.0.2 sport=53 dport=53 src=10.0.0.2 dst=10.0.0.1 sport=53 dport=53'
+        self.assertIsNone(ConntrackSource.parse_line(line))
+
+class TestHeavyHitters(unittest.TestCase):
+    def test_space_saving_keeps_heavy_hitters(self):
+        """Tester que les clés lourdes sont retenues en mémoire bornée"""
+        rng = random.Random(5)
+        sketch = SpaceSaving(capacity=50)
+        for _ in range(20000):
+            sketch.add(f'10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)}', 100)
+        for _ in range(200):
+            sketch.add('203.0.113.7', 1000)
+            sketch.add('198.51.100.1', 500)
+
+        self.assertLessEqual(len(sketch), 50)
+        top = sketch.top(2)
+        self.assertEqual([key for key, _, _ in top], ['203.0.113.7', '198.51.100.1'])
+        count, error = top[0][1], top[0][2]
+        self.assertTrue(count - error <= 200000 <= count)
+
+    def test_windows_and_interfaces(self):
+        """Tester les fenêtres glissantes et le filtre par interface"""
+        now = [1000.0]
+        talkers = TopTalkers(capacity=16, slot=10, max_window=120, clock=lambda: now[0])
+        talkers.add([('eth0', '10.0.0.1', '1.1.1.1', 5000), ('wg0', '10.8.0.2', '8.8.8.8', 100)])
+        now[0] += 60
+        talkers.add([('eth0', '10.0.0.2', '1.1.1.1', 700)])
+
+        recent = talkers.top('eth0', window=30)
+        self.assertEqual(recent['sources'], [{'ip': '10.0.0.2', 'bytes': 700, 'error': 0}])
+        hour = talkers.top(window=3600)
+        self.assertEqual(hour['window'], 120)
+        self.assertEqual(hour['destinations'][0], {'ip': '1.1.1.1', 'bytes': 5700, 'error': 0})
+        self.assertEqual(talkers.interfaces(), ['eth0', 'wg0'])
+
+    def test_packet_header_parsing(self):
+        """Tester le décodage des en-têtes Ethernet / IPv4 (avec VLAN)"""
+        ipv4 = bytes(2) + (1500).to_bytes(2, 'big') + bytes(8) + bytes([10, 0, 0, 1, 1, 1, 1, 1])
+        frame = bytes(12) + b'\x81\x00' + bytes(2) + b'\x08\x00' + ipv4
+        pair, length = PacketSocketSource._parse(memoryview(frame), len(frame))
+        self.assertEqual(pair, (bytes([10, 0, 0, 1]), bytes([1, 1, 1, 1])))
+        self.assertEqual(length, 1500)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.history import InterfaceHistory, NetworkHistory
+
+class TestInterfaceHistory(unittest.TestCase):
+    def test_ring_buffer_overwrites_oldest(self):
+        """Tester que le tampon circulaire reste borné"""
+        history = InterfaceHistory(capacity=3)
+        for i in range(5):
+            history.append(float(i), i * 10, i * 20, i, i)
+
+        window = history.window()
+        self.assertEqual(len(history), 3)
+        self.assertEqual(window['timestamp'], [2.0, 3.0, 4.0])
+        self.assertEqual(window['speed_upload'], [20.0, 30.0, 40.0])
+
+    def test_window_since_and_step(self):
+        """Tester le filtrage temporel et le regroupement par pas"""
+        history = InterfaceHistory(capacity=10)
+        for i in range(6):
+            history.append(float(i), i, 0, 0, 0)
+
+        self.assertEqual(history.window(since=3)['timestamp'], [3.0, 4.0, 5.0])
+
+        window = history.window(step=2)
+        self.assertEqual(window['timestamp'], [0.0, 2.0, 4.0])
+        self.assertEqual(window['speed_upload'], [0.5, 2.5, 4.5])
+
+    def test_network_history_query(self):
+        """Tester la requête d'historique par interface"""
+        history = NetworkHistory(capacity=5)
+        history.buffer('eth0').append(1.0, 1, 2, 3, 4)
+        history.buffer('eth1').append(1.0, 5, 6, 7, 8)
+
+        self.assertEqual(len(history.query()), 2)
+        result = history.query('eth1')
+        self.assertEqual(result[0]['interface'], 'eth1')
+        self.assertEqual(result[0]['speed_download'], [6.0])
+        self.assertEqual(history.query('absent'), [])
+
+    def test_removed_interface_is_forgotten(self):
+        """Tester que l'historique d'une interface disparue (veth, tap...) est libéré"""
+        source = SyntheticSource(3)
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=source)
+        for _ in range(2):
+            monitor._update_network_stats()
+        del source._counters['syn2']
+        monitor._update_network_stats()
+        self.assertEqual(sorted(monitor.history.interfaces()), ['syn0', 'syn1'])
+        self.assertEqual(sorted(entry['interface'] for entry in monitor.rollups.query()), ['syn0', 'syn1'])
+
+if __name__ == '__main__':
+    unittest.main()
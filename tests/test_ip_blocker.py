@@ -0,0 +1,273 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.ip_blocker import BatchValidationError, IPBlocker
+from backend.network_manager.firewall import (
+    FirewallUnavailableError, IpsetBackend, MemoryBackend, NftablesBackend, create_backend
+)
+
+class RecordingIpsetBackend(IpsetBackend):
+    """Backend ipset qui enregistre les commandes au lieu de les exécuter"""
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+        self.inputs = []
+
+    def _run(self, args, check=True, input_text=None):
+        self.commands.append(args)
+        self.inputs.append(input_text)
+        return subprocess.CompletedProcess(args, 0, stdout='', stderr='')
+
+class TestIPBlocker(unittest.TestCase):
+    def test_ipset_backend_single_match_rule(self):
+        """Tester qu'un blocage n'ajoute qu'un élément d'ensemble, sans nouvelle règle"""
+        backend = RecordingIpsetBackend()
+        blocker = IPBlocker(backend)
+        setup_commands = len(backend.commands)
+
+        self.assertTrue(blocker.block_ip('10.0.0.1'))
+        self.assertTrue(blocker.block_ip('2001:db8::1'))
+
+        self.assertEqual(backend.commands[setup_commands:], [['ipset', 'restore', '-exist']] * 2)
+        self.assertEqual(backend.inputs[setup_commands:], [
+            'add nbm_blocklist4 10.0.0.1\n',
+            'add nbm_blocklist6 2001:db8::1\n',
+        ])
+        self.assertIn(['iptables', '-C', 'INPUT', '-m', 'set', '--match-set', 'nbm_blocklist4',
+                       'src', '-j', 'DROP'], backend.commands)
+
+    def test_validation_and_normalization(self):
+        """Tester la validation et la normalisation des adresses"""
+        blocker = IPBlocker(MemoryBackend())
+        with self.assertRaises(ValueError):
+            blocker.block_ip('10.0.0.256')
+        with self.assertRaises(ValueError):
+            blocker.block_ip('10.0.0.1', duration=-5)
+
+        blocker.block_ip('2001:DB8:0::1')
+        self.assertEqual(blocker.list_blocked_ips(), ['2001:db8::1'])
+        self.assertFalse(blocker.unblock_ip('10.0.0.9'))
+
+    def test_memory_backend_is_never_detected(self):
+        """Tester le refus de la liste en mémoire (sans effet sur le trafic) si elle n'est pas demandée"""
+        with mock.patch.dict(os.environ, {'NBM_FIREWALL_BACKEND': 'auto'}), \
+                mock.patch('backend.network_manager.firewall.os.geteuid', return_value=1000):
+            with self.assertRaises(FirewallUnavailableError):
+                IPBlocker()
+        self.assertIsInstance(create_backend('memory'), MemoryBackend)
+
+    def test_existing_kernel_entries_are_loaded(self):
+        """Tester la reprise des entrées déjà présentes dans l'ensemble noyau"""
+        backend = MemoryBackend()
+        backend.add('10.1.1.1')
+        self.assertEqual(IPBlocker(backend).list_blocked_ips(), ['10.1.1.1'])
+
+class TestPrefixBlocks(unittest.TestCase):
+    def test_cidr_merging_and_lookup(self):
+        """Tester la fusion des plages dans l'ensemble noyau et la recherche par préfixe"""
+        blocker = IPBlocker(MemoryBackend())
+        blocker.block_ip('10.5.0.0/25')
+        blocker.block_ip('10.5.0.128/25')
+        blocker.block_ip('10.5.0.7')
+        blocker.block_ip('2001:db8::/33')
+        blocker.block_ip('2001:db8:8000::/33')
+
+        self.assertEqual(blocker.backend.list(), {'10.5.0.0/24', '2001:db8::/32'})
+        self.assertTrue(blocker.is_blocked('10.5.0.200'))
+        self.assertTrue(blocker.is_blocked('2001:db8:ffff::1'))
+        self.assertFalse(blocker.is_blocked('10.5.1.1'))
+        self.assertEqual(len(blocker.list_blocked_ips()), 5)
+
+    def test_unblock_splits_covering_range(self):
+        """Tester qu'un déblocage ne retire que l'espace qui n'est plus demandé"""
+        blocker = IPBlocker(MemoryBackend())
+        blocker.block_ip('10.6.0.0/24')
+        blocker.block_ip('10.6.0.0/26')
+        blocker.block_ip('10.6.1.1')
+
+        self.assertTrue(blocker.unblock_ip('10.6.0.0/24'))
+        self.assertEqual(blocker.backend.list(), {'10.6.0.0/26', '10.6.1.1'})
+        self.assertTrue(blocker.is_blocked('10.6.0.63'))
+        self.assertFalse(blocker.is_blocked('10.6.0.64'))
+        self.assertFalse(blocker.unblock_ip('10.6.0.5'))
+
+    def test_existing_kernel_set_is_minimized(self):
+        """Tester la réduction de l'ensemble noyau repris au démarrage"""
+        backend = MemoryBackend()
+        backend.entries.update({'10.7.0.0/24', '10.7.0.9', '10.7.1.0/24'})
+        blocker = IPBlocker(backend)
+        self.assertEqual(backend.list(), {'10.7.0.0/23'})
+        self.assertEqual(len(blocker.list_blocked_ips()), 3)
+
+    def test_cursor_pagination(self):
+        """Tester la pagination par curseur, triée par préfixe"""
+        blocker = IPBlocker(MemoryBackend())
+        for i in range(25):
+            blocker.block_ip(f'10.8.{i}.1')
+        blocker.block_ip('2001:db8::1', duration=60)
+
+        seen, cursor = [], None
+        while True:
+            page = blocker.list_blocked(cursor, limit=10)
+            seen.extend(entry['ip'] for entry in page['entries'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f'10.8.{i}.1' for i in range(25)] + ['2001:db8::1'])
+        self.assertEqual(page['total'], 26)
+        self.assertIsNotNone(page['entries'][-1]['expires_at'])
+        blocker.expiry.stop()
+
+class TestBatchBlocks(unittest.TestCase):
+    def test_batch_is_one_kernel_transaction(self):
+        """Tester qu'un lot n'envoie qu'une transaction ipset restore"""
+        backend = RecordingIpsetBackend()
+        blocker = IPBlocker(backend)
+        setup_commands = len(backend.commands)
+
+        results = blocker.block_many([(f'10.9.0.{i}', None) for i in range(4)] + [('10.9.1.0/24', 60)])
+        self.assertEqual(backend.commands[setup_commands:], [['ipset', 'restore', '-exist']])
+        self.assertEqual(backend.inputs[-1].splitlines(),
+                         ['add nbm_blocklist4 10.9.0.0/30', 'add nbm_blocklist4 10.9.1.0/24'])
+        self.assertEqual([result['status'] for result in results], ['blocked'] * 5)
+        blocker.expiry.stop()
+
+    def test_invalid_entry_rejects_whole_batch(self):
+        """Tester la validation de toutes les entrées avant toute modification"""
+        blocker = IPBlocker(MemoryBackend())
+        with self.assertRaises(BatchValidationError) as context:
+            blocker.block_many([('10.10.0.1', None), ('10.10.0.300', None), ('10.10.0.2', -1)])
+        self.assertEqual([error['index'] for error in context.exception.errors], [1, 2])
+        self.assertEqual(blocker.list_blocked_ips(), [])
+        self.assertEqual(blocker.backend.list(), set())
+
+    def test_batch_unblock_statuses(self):
+        """Tester le déblocage groupé et le statut de chaque entrée"""
+        blocker = IPBlocker(MemoryBackend())
+        blocker.block_many([('10.11.0.1', None), ('10.11.0.2', None)])
+        self.assertEqual(blocker.block_many([('10.11.0.1', None)])[0]['status'], 'updated')
+
+        results = blocker.unblock_many(['10.11.0.1', '10.11.0.3', '10.11.0.2'])
+        self.assertEqual([result['status'] for result in results], ['unblocked', 'not_blocked', 'unblocked'])
+        self.assertEqual(blocker.backend.list(), set())
+
+    def test_lookups_are_not_blocked_by_large_batch(self):
+        """Tester les recherches servies pendant l'indexation par tranches et la transaction noyau d'un lot"""
+        lookups = []
+
+        class SlowBackend(MemoryBackend):
+            def apply(self, additions, removals):
+                if not additions:
+                    return super().apply(additions, removals)
+                # Recherche depuis un autre thread pendant la transaction noyau
+                reader = threading.Thread(target=lambda: lookups.append(blocker.is_blocked('10.12.0.0')))
+                reader.start()
+                reader.join(1)
+                lookups.append(reader.is_alive())
+                super().apply(additions, removals)
+
+        blocker = IPBlocker(SlowBackend())
+        entries = [f'10.12.{i >> 8}.{i & 255}' for i in range(0, 5000, 2)]
+        insert = blocker._requested.insert
+        released = []
+
+        def insert_and_check(prefix):
+            # Verrou de lecture tenu pendant une tranche, relâché entre deux tranches
+            released.append(blocker._lock.locked())
+            return insert(prefix)
+
+        with mock.patch.object(blocker._requested, 'insert', side_effect=insert_and_check):
+            results = blocker.block_many([(entry, None) for entry in entries])
+        self.assertEqual({result['status'] for result in results}, {'blocked'})
+        self.assertTrue(all(released))
+        self.assertEqual(lookups, [True, False])
+        self.assertEqual(len(blocker.backend.list()), len(entries))
+        self.assertEqual(blocker.block_many([(entries[0], 60)])[0]['status'], 'updated')
+        self.assertEqual(len(blocker.backend.list()), len(entries))
+        blocker.expiry.stop()
+
+    def test_nftables_batch_script(self):
+        """Tester le script nft -f d'un lot mixte IPv4 / IPv6"""
+        backend = NftablesBackend()
+        scripts = []
+        backend._run = lambda args, check=True, input_text=None: scripts.append((args, input_text))
+        backend.apply(['10.0.0.1', '10.0.1.0/24', '2001:db8::/32'], ['10.0.2.1'])
+        self.assertEqual(scripts, [(['nft', '-f', '-'], (
+            'add element inet nbm blocklist4 { 10.0.0.1, 10.0.1.0/24 }\n'
+            'add element inet nbm blocklist6 { 2001:db8::/32 }\n'
+            'delete element inet nbm blocklist4 { 10.0.2.1 }\n'
+        ))])
+
+class TestTimedBlocks(unittest.TestCase):
+    def test_expiry_with_single_thread(self):
+        """Tester l'expiration groupée sans un thread par blocage"""
+        blocker = IPBlocker(MemoryBackend(), expiry_tick=0.05)
+        threads_before = threading.active_count()
+        for i in range(500):
+            blocker.block_ip(f'10.2.{i // 256}.{i % 256}', duration=0.2)
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+
+        time.sleep(0.4)
+        self.assertEqual(blocker.list_blocked_ips(), [])
+        self.assertEqual(blocker.backend.list(), set())
+        blocker.expiry.stop()
+
+    def test_extension_and_permanent_block(self):
+        """Tester la prolongation d'un blocage et le passage en blocage permanent"""
+        blocker = IPBlocker(MemoryBackend())
+        blocker.block_ip('10.3.0.1', duration=0.1)
+        blocker.block_ip('10.3.0.1', duration=60)
+        blocker.block_ip('10.3.0.2', duration=0.1)
+        blocker.block_ip('10.3.0.2')
+        time.sleep(0.3)
+
+        self.assertEqual(sorted(blocker.list_blocked_ips()), ['10.3.0.1', '10.3.0.2'])
+        self.assertEqual(list(blocker.expiry.pending()), ['10.3.0.1'])
+        blocker.expiry.stop()
+
+    def test_pending_expiries_survive_restart(self):
+        """Tester la reprise des échéances après un redémarrage"""
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = os.path.join(state_dir, 'expiries.json')
+            blocker = IPBlocker(MemoryBackend(), state_path=state_path)
+            blocker.block_ip('10.4.0.1', duration=60)
+            blocker.block_ip('10.4.0.2', duration=0.3)
+            blocker.expiry.stop()
+
+            # Nouveau processus : le pare-feu noyau a été vidé
+            restarted = IPBlocker(MemoryBackend(), state_path=state_path, expiry_tick=0.05)
+            self.assertEqual(sorted(restarted.list_blocked_ips()), ['10.4.0.1', '10.4.0.2'])
+            time.sleep(0.5)
+            self.assertEqual(restarted.list_blocked_ips(), ['10.4.0.1'])
+            self.assertEqual(restarted.backend.list(), {'10.4.0.1'})
+            restarted.expiry.stop()
+
+    def test_restart_rebuilds_requested_entries(self):
+        """Tester la reconstruction depuis l'état enregistré, l'ensemble noyau n'étant que réaligné"""
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = os.path.join(state_dir, 'blocklist.json')
+            kernel = MemoryBackend()
+            blocker = IPBlocker(kernel, state_path=state_path)
+            blocker.block_many([('10.9.0.0/25', None), ('10.9.0.128/25', None), ('10.9.1.1', 60)])
+            blocker.expiry.stop()
+            self.assertEqual(kernel.list(), {'10.9.0.0/24', '10.9.1.1'})
+
+            # Entrée ajoutée hors de l'application : retirée au redémarrage
+            kernel.apply(['10.9.9.9'], [])
+            restarted = IPBlocker(kernel, state_path=state_path)
+            self.assertEqual(sorted(restarted.list_blocked_ips()), ['10.9.0.0/25', '10.9.0.128/25', '10.9.1.1'])
+            self.assertEqual(list(restarted.expiry.pending()), ['10.9.1.1'])
+            self.assertEqual(kernel.list(), {'10.9.0.0/24', '10.9.1.1'})
+            restarted.expiry.stop()
+
+if __name__ == '__main__':
+    unittest.main()
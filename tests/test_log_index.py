@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager import log_index
+from backend.network_manager.log_index import LogStore
+
+def app_line(second, logger, level, message):
+    return f'2024-03-01 10:{second // 60:02d}:{second % 60:02d},250 - {logger} - {level} - {message}\n'
+
+class TestLogStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app_log = os.path.join(self.directory.name, 'app.log')
+        self.stats_log = os.path.join(self.directory.name, 'network_stats.log')
+        self.store = LogStore(self.app_log, self.stats_log)
+        # Petits blocs : plusieurs blocs par fichier
+        patcher = mock.patch.object(log_index, 'BLOCK_BYTES', 512)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def write_stats(self, path, start, count):
+        with open(path, 'a') as log_file:
+            for timestamp in range(start, start + count):
+                log_file.write(json.dumps({
+                    'timestamp': timestamp, 'interfaces': ['eth0', 'wlan0'],
+                    'speed_upload': [timestamp, 1.0], 'speed_download': [2.0, 3.0]
+                }) + '\n')
+
+    def refresh(self):
+        for source in self.store.sources.values():
+            source.refresh(force=True)
+
+    def test_cursor_pages_cover_log_newest_first(self):
+        """Tester que les pages par curseur parcourent tout le journal, fichiers tournés compris"""
+        self.write_stats(self.stats_log + '.1', 1000, 40)
+        self.write_stats(self.stats_log, 1040, 40)
+
+        seen, cursor = [], None
+        while True:
+            page = self.store.query('network', cursor, limit=7, interface='eth0')
+            seen.extend(record['speed_upload'] for record in page['logs'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(range(1079, 999, -1)))
+
+        # Les curseurs restent valides après une rotation (même inode) et de nouveaux ajouts
+        page = self.store.query('network', limit=3, interface='eth0')
+        os.replace(self.stats_log + '.1', self.stats_log + '.2')
+        os.replace(self.stats_log, self.stats_log + '.1')
+        self.write_stats(self.stats_log, 1080, 5)
+        self.refresh()
+        following = self.store.query('network', page['next_cursor'], limit=2, interface='eth0')
+        self.assertEqual([record['speed_upload'] for record in following['logs']], [1076, 1075])
+        self.assertEqual(self.store.query('network', limit=1, interface='eth0')['logs'][0]['speed_upload'], 1084)
+
+    def test_overlong_line_does_not_stop_indexing(self):
+        """Tester qu'une ligne plus longue qu'un bloc de lecture est sautée, même écrite en plusieurs fois"""
+        patcher = mock.patch.object(log_index, 'READ_CHUNK', 256)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.write_stats(self.stats_log, 1000, 3)
+        with open(self.stats_log, 'a') as log_file:
+            log_file.write('x' * 700)
+        self.refresh()
+        with open(self.stats_log, 'a') as log_file:
+            log_file.write('x' * 300 + '\n')
+        self.write_stats(self.stats_log, 1003, 3)
+        self.refresh()
+
+        page = self.store.query('network', limit=10, interface='eth0')
+        self.assertEqual([record['speed_upload'] for record in page['logs']], [1005, 1004, 1003, 1002, 1001, 1000])
+        index = self.store.sources['stats']._files[-1][0]
+        self.assertEqual(index.indexed, os.path.getsize(self.stats_log))
+        self.assertFalse(index.skipping)
+
+    def test_app_log_filters_and_multiline(self):
+        """Tester les filtres indexés (niveau, utilisateur, plage) et les messages multilignes"""
+        with open(self.app_log, 'w') as log_file:
+            for second in range(120):
+                log_file.write(app_line(second, 'backend.network_manager.ip_blocker', 'INFO',
+                                        f'IP bloquée : 10.0.0.{second}'))
+            log_file.write(app_line(120, 'backend.app', 'ERROR', 'Erreur non gérée'))
+            log_file.write('Traceback (most recent call last):\n  File "app.py", line 1\nValueError\n')
+            log_file.write(app_line(121, 'backend.auth.audit', 'INFO', 'action=login user=admin status=success'))
+            log_file.write(app_line(122, 'backend.auth.audit', 'INFO', 'action=login user=bob status=failure'))
+
+        errors = self.store.query('system', level='error')['logs']
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0]['message'].endswith('ValueError'))
+
+        logins = self.store.query('authentication', user='admin')['logs']
+        self.assertEqual([(log['user'], log['action'], log['status']) for log in logins],
+                         [('admin', 'login', 'success')])
+        self.assertEqual(len(self.store.query('authentication')['logs']), 2)
+
+        window = self.store.query('system', since=log_time(self.store, 118), until=log_time(self.store, 121))
+        self.assertEqual([log['level'] for log in window['logs']], ['ERROR', 'INFO', 'INFO'])
+        self.assertEqual([log['message'][-3:] for log in window['logs']][1:], ['119', '118'])
+
+    def test_audit_username_cannot_forge_records(self):
+        """Tester qu'un nom d'utilisateur contenant un saut de ligne reste un seul enregistrement d'audit"""
+        forged = 'x\n' + app_line(131, 'backend.auth.audit', 'INFO', 'action=login user=admin status=success')
+        with open(self.app_log, 'w') as log_file:
+            for second, user in ((130, forged), (132, "eve' status='success")):
+                message = log_index.AppLogFormat.AUDIT_MESSAGE % ('login', user, 'failure')
+                log_file.write(app_line(second, 'backend.auth.audit', 'INFO', message))
+
+        logins = self.store.query('authentication')['logs']
+        self.assertEqual([(log['user'], log['status']) for log in logins],
+                         [("eve' status='success", 'failure'), (forged, 'failure')])
+        self.assertEqual(self.store.query('authentication', user='admin')['logs'], [])
+
+    def test_export_streams_all_matching_records(self):
+        """Tester l'export complet sans pagination"""
+        self.write_stats(self.stats_log, 0, 300)
+        records = list(self.store.export('network', interface='wlan0'))
+        self.assertEqual(len(records), 300)
+        self.assertEqual(len({record['id'] for record in records}), 300)
+        with self.assertRaises(ValueError):
+            self.store.query('kernel')
+
+def log_time(store, second):
+    """Horodatage epoch d'une ligne app_line"""
+    text = f'2024-03-01 10:{second // 60:02d}:{second % 60:02d}'
+    return store.sources['app'].format._epoch(text.encode()) + 0.25
+
+if __name__ == '__main__':
+    unittest.main()
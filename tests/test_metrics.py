@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager import metrics
+from backend.network_manager.metrics import Counter, Gauge, Histogram, Registry
+from backend.network_manager.profiler import SamplingProfiler
+from backend.network_manager.scheduler import SamplingScheduler
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        """Tester l'export texte : buckets cumulés, labels échappés, jauges calculées à l'export"""
+        registry = Registry()
+        latency = registry.register(Histogram('latency_seconds', 'Durée', ('route',), buckets=(0.1, 1.0)))
+        requests = registry.register(Counter('requests_total', 'Requêtes', ('route', 'status')))
+        depth = {'value': 3}
+        registry.register(Gauge('queue_depth', 'File', lambda: {'log': depth['value'], 'db': None}, ('queue',)))
+        registry.register(Gauge('disabled', 'Absent', lambda: None))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, '/api/"x"')
+        requests.inc('/api/x', '200')
+        requests.inc('/api/x', '200')
+        depth['value'] = 7
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE latency_seconds histogram', lines)
+        self.assertIn('latency_seconds_bucket{route="/api/\\"x\\"",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/api/\\"x\\"",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{route="/api/\\"x\\"",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_count{route="/api/\\"x\\""} 4', lines)
+        self.assertIn('latency_seconds_sum{route="/api/\\"x\\""} 3.65', lines)
+        self.assertIn('requests_total{route="/api/x",status="200"} 2', lines)
+        self.assertIn('queue_depth{queue="log"} 7', lines)
+        self.assertFalse(any(line.startswith(('queue_depth{queue="db"}', 'disabled ')) for line in lines))
+
+    def test_scheduler_records_ticks(self):
+        """Tester la durée des ticks et le retard de réveil mesurés par l'ordonnanceur"""
+        scheduler = SamplingScheduler()
+        ticked = threading.Event()
+
+        def sampling_job():
+            time.sleep(0.01)
+            ticked.set()
+
+        job = scheduler.add_job(sampling_job, 0.1)
+        scheduler.start()
+        ticked.wait(2)
+        scheduler.stop()
+        self.assertGreaterEqual(metrics.TICK_SECONDS.count(job.name), 1)
+        self.assertGreaterEqual(metrics.WAKEUP_DELAY_SECONDS.count(job.name), 1)
+        self.assertIn('sampling_job', job.name)
+
+    def test_sampling_profiler(self):
+        """Tester que le profileur relève la pile d'un thread occupé"""
+        stop = threading.Event()
+
+        def busy_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop, name='busy')
+        worker.start()
+        profiler = SamplingProfiler(interval=0.001)
+        self.assertTrue(profiler.start())
+        self.assertFalse(profiler.start())
+        time.sleep(0.1)
+        stacks = profiler.stop()
+        stop.set()
+        worker.join()
+
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.samples, 0)
+        busy = [line for line in stacks.splitlines() if line.startswith('busy;')]
+        self.assertTrue(busy)
+        self.assertIn('busy_loop', busy[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.persistence import SampleWriter
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        self.connection.statements.append(sql)
+
+    def copy_expert(self, sql, data):
+        if self.connection.failures:
+            self.connection.failures -= 1
+            raise RuntimeError('connexion perdue')
+        self.connection.copied.extend(data.read().splitlines())
+
+class FakeConnection:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.statements = []
+        self.copied = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+class TestSampleWriter(unittest.TestCase):
+    def test_batched_copy_with_retry(self):
+        """Tester l'écriture groupée par COPY et la reprise après échec"""
+        connection = FakeConnection(failures=1)
+        writer = SampleWriter(connect=lambda: connection, batch_size=100, retry_delay=0)
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(5), sinks=[writer])
+        for _ in range(3):
+            monitor._update_network_stats()
+        writer.stop()
+
+        self.assertEqual(writer.written_samples, 15)
+        self.assertEqual(len(connection.copied), 15)
+        self.assertEqual(connection.copied[0].split('\t')[1], 'syn0')
+        self.assertTrue(any('PARTITION OF network_samples' in sql for sql in connection.statements))
+
+    def test_drop_oldest_when_full(self):
+        """Tester l'abandon des échantillons les plus anciens quand la file est pleine"""
+        writer = SampleWriter(connect=FakeConnection, queue_size=8)
+        writer._running = True  # Pas de thread d'écriture : la file se remplit
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(5), sinks=[writer])
+        monitor._update_network_stats()
+        monitor._update_network_stats()
+
+        self.assertEqual(writer.queue_depth(), 8)
+        self.assertEqual(writer.dropped_samples, 2)
+        self.assertEqual(writer._queue[0][1], 'syn2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import ipaddress
+import random
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.prefix_trie import PrefixTrie, format_prefix, parse_prefix
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_exact_trie_queries(self):
+        """Tester les recherches de préfixes couvrants et contenus"""
+        trie = PrefixTrie()
+        for text in ('10.0.0.0/8', '10.1.0.0/16', '10.1.2.3', '192.168.0.0/24', '::1'):
+            trie.insert(parse_prefix(text))
+
+        self.assertEqual([format_prefix(p) for p in trie.supernets(parse_prefix('10.1.2.3'))],
+                         ['10.0.0.0/8', '10.1.0.0/16', '10.1.2.3'])
+        self.assertEqual([format_prefix(p) for p in trie.subnets(parse_prefix('10.0.0.0/8'))],
+                         ['10.1.0.0/16', '10.1.2.3'])
+        self.assertFalse(trie.contains(parse_prefix('11.0.0.1')))
+        self.assertEqual([format_prefix(p) for p in trie.items(after=parse_prefix('10.1.2.3'))],
+                         ['192.168.0.0/24', '::1'])
+
+        self.assertTrue(trie.remove(parse_prefix('10.0.0.0/8')))
+        self.assertFalse(trie.remove(parse_prefix('10.0.0.0/8')))
+        self.assertEqual(len(trie), 4)
+
+    def test_aggregate_matches_collapse_addresses(self):
+        """Tester que l'ensemble agrégé est l'ensemble minimal de ipaddress"""
+        rng = random.Random(7)
+        trie = PrefixTrie(aggregate=True)
+        networks = set()
+        for _ in range(400):
+            length = rng.randint(20, 32)
+            network = ipaddress.ip_network((rng.getrandbits(32) & 0x0A0FFFFF | 0x0A000000, length), strict=False)
+            trie.insert(parse_prefix(str(network)))
+            networks.add(network)
+
+        expected = {str(n) if n.prefixlen < 32 else str(n.network_address)
+                    for n in ipaddress.collapse_addresses(networks)}
+        added, removed = trie.take_changes()
+        self.assertEqual({format_prefix(p) for p in added}, expected)
+        self.assertEqual(removed, [])
+        self.assertEqual({format_prefix(p) for p in trie.items()}, expected)
+
+    def test_aggregate_remove_splits(self):
+        """Tester le découpage d'une plage autour d'un préfixe retiré"""
+        trie = PrefixTrie(aggregate=True)
+        trie.insert(parse_prefix('10.0.0.0/30'))
+        trie.take_changes()
+        trie.remove(parse_prefix('10.0.0.1'))
+
+        added, removed = trie.take_changes()
+        self.assertEqual(sorted(format_prefix(p) for p in added), ['10.0.0.0', '10.0.0.2/31'])
+        self.assertEqual([format_prefix(p) for p in removed], ['10.0.0.0/30'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager import reports
+from backend.tasks.result_cache import ResultCache
+
+class FakeRedis:
+    """Client Redis en mémoire (get / set nx / delete), sans expiration"""
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self.expiry[key] = ex
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+def write_log(path, records):
+    with open(path, 'w', encoding='utf-8') as log_file:
+        for timestamp, uploads, downloads in records:
+            log_file.write(json.dumps({
+                'timestamp': timestamp,
+                'interfaces': ['eth0', 'eth1'][:len(uploads)],
+                'speed_upload': uploads,
+                'speed_download': downloads
+            }) + '\n')
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'network_stats.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_export_reads_rotated_files_in_order(self):
+        """Tester l'export CSV du journal, fichiers tournés compris, filtré par plage"""
+        write_log(self.path + '.2', [(100.0, [1.0, 2.0], [3.0, 4.0])])
+        write_log(self.path + '.1', [(101.0, [5.0], [6.0])])
+        write_log(self.path, [(102.0, [7.0, 8.0], [9.0, 10.0]), (200.0, [0.0], [0.0])])
+        with open(self.path, 'a') as log_file:
+            log_file.write('{"timestamp": 103, "interf')
+
+        destination = io.StringIO()
+        count = reports.export_stats_log(self.path, destination, since=100.5, until=150)
+        self.assertEqual(count, 3)
+        self.assertEqual(destination.getvalue().splitlines(), [
+            'timestamp,interface,speed_upload,speed_download',
+            '101.0,eth0,5.0,6.0',
+            '102.0,eth0,7.0,9.0',
+            '102.0,eth1,8.0,10.0',
+        ])
+
+    def test_backfill_replays_detector(self):
+        """Tester que le rejeu du journal retrouve un pic de trafic"""
+        records = [(float(t), [1000.0 + t % 7], [2000.0]) for t in range(100)]
+        records.append((100.0, [5e7], [2000.0]))
+        records.extend((float(t), [1000.0], [2000.0]) for t in range(101, 110))
+        write_log(self.path, records)
+
+        events = reports.backfill_anomalies(self.path)
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0]['interface'], events[0]['metric'], events[0]['start']),
+                         ('eth0', 'speed_upload', 100.0))
+
+    def test_prepare_blocklist_import(self):
+        """Tester la validation, le dédoublonnage et l'ensemble noyau d'une liste importée"""
+        result = reports.prepare_blocklist_import(
+            '# liste publique\n10.0.0.0/24 ; spam\n10.0.0.7\n10.0.0.7\n'
+            '2001:DB8::1\nnot-an-ip\n\n192.168.1.0/25\n192.168.1.128/25\n'
+        )
+        self.assertEqual(result['entries'], ['10.0.0.0/24', '10.0.0.7', '192.168.1.0/25',
+                                             '192.168.1.128/25', '2001:db8::1'])
+        self.assertEqual((result['lines'], result['duplicates'], result['invalid']), (7, 1, 1))
+        self.assertEqual(result['errors'][0]['line'], 6)
+        # 10.0.0.7 couvert, les deux /25 fusionnés
+        self.assertEqual(result['kernel_entries'], 3)
+
+class TestResultCache(unittest.TestCase):
+    def test_normalized_key_and_running_task(self):
+        """Tester la clé stable, la reprise d'une tâche en cours et le stockage du résultat"""
+        client = FakeRedis()
+        cache = ResultCache(client, ttl=60, claim_ttl=1800)
+        key = cache.key('history', {'since': 0, 'step': 60, 'interface': None})
+        self.assertEqual(key, cache.key('history', {'interface': None, 'step': 60, 'since': 0}))
+        self.assertNotEqual(key, cache.key('history', {'since': 0, 'step': 10, 'interface': None}))
+
+        self.assertIsNone(cache.claim(key, 'task-1'))
+        self.assertEqual(cache.claim(key, 'task-2'), 'task-1')
+        self.assertIsNone(cache.get(key))
+        # L'association survit à une tâche plus longue que la durée de vie des résultats
+        self.assertEqual(client.expiry[f'{key}:task'], 1800)
+
+        cache.put(key, [{'interface': 'eth0'}])
+        cache.release(key)
+        self.assertEqual(cache.get(key), [{'interface': 'eth0'}])
+        self.assertIsNone(cache.claim(key, 'task-3'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.rollups import RollupEngine, DAY
+
+class TestRollupEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RollupEngine(retention_days=2)
+        # 2 heures d'échantillons d'une seconde ; le débit alterne entre 100 et 300 o/s
+        for second in range(2 * 3600):
+            rate = 100 if second % 2 == 0 else 300
+            self.engine.add('eth0', float(second), 1.0, [rate, rate * 2, 1, 2])
+
+    def test_tier_selection(self):
+        """Tester le choix du niveau le plus grossier compatible avec le pas"""
+        self.assertEqual(self.engine.select_level(None), 0)
+        self.assertEqual(self.engine.select_level(5), 0)
+        self.assertEqual(self.engine.select_level(60), 2)
+        self.assertEqual(self.engine.select_level(7 * DAY), 3)
+
+    def test_aggregates_min_max_avg_sum(self):
+        """Tester les agrégats d'un bucket d'une minute"""
+        result = self.engine.query('eth0', step=60)[0]
+        self.assertEqual(result['resolution'], 60)
+        self.assertEqual(result['timestamp'][0], 0.0)
+        self.assertEqual(result['speed_upload'][0], 200.0)
+        self.assertEqual(result['speed_upload_min'][0], 100.0)
+        self.assertEqual(result['speed_upload_max'][0], 300.0)
+        self.assertEqual(result['bytes_sent'][0], 60 * 200)
+        self.assertEqual(result['bytes_recv'][0], 60 * 400)
+        # Rétention du niveau 1 s : 15 minutes, plus le bucket en cours
+        self.assertEqual(len(self.engine.query('eth0', step=1)[0]['timestamp']), 15 * 60 + 1)
+
+    def test_regroup_and_retention(self):
+        """Tester le regroupement au pas demandé et la rétention configurable"""
+        result = self.engine.query('eth0', step=1800)[0]
+        self.assertEqual(result['timestamp'], [0.0, 1800.0, 3600.0, 5400.0])
+        self.assertEqual(result['packets_sent'][0], 1800)
+
+        self.engine.set_retention_days(1)
+        self.assertEqual(self.engine.tiers[-1], (3600, DAY))
+        self.assertEqual(self.engine.query('eth0', step=3600)[0]['timestamp'], [0.0, 3600.0])
+
+if __name__ == '__main__':
+    unittest.main()
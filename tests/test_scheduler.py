@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import time
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.scheduler import SamplingScheduler
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor, COUNTER_32_WRAP
+from backend.network_manager.counter_sources import SyntheticSource
+
+class TestSamplingScheduler(unittest.TestCase):
+    def test_no_drift_with_slow_callback(self):
+        """Tester que la durée du travail ne décale pas les échéances"""
+        scheduler = SamplingScheduler()
+        wakeups = []
+
+        def slow_callback():
+            wakeups.append(time.monotonic())
+            time.sleep(0.04)
+
+        scheduler.add_job(slow_callback, 0.1)
+        scheduler.start()
+        time.sleep(0.55)
+        scheduler.stop()
+
+        self.assertGreaterEqual(len(wakeups), 5)
+        # Les réveils restent alignés sur la grille de 100 ms
+        elapsed = wakeups[-1] - wakeups[0]
+        self.assertAlmostEqual(elapsed, 0.1 * (len(wakeups) - 1), delta=0.03)
+
+    def test_shared_scheduler_drives_several_monitors(self):
+        """Tester qu'un seul ordonnanceur pilote plusieurs monitors"""
+        scheduler = SamplingScheduler()
+        monitors = [
+            AdvancedNetworkMonitor(interval=0.1, counter_source=SyntheticSource(2, prefix=f'm{i}_'),
+                                   scheduler=scheduler)
+            for i in range(3)
+        ]
+        for monitor in monitors:
+            monitor.start_monitoring()
+        time.sleep(0.35)
+        for monitor in monitors:
+            monitor.stop_monitoring()
+        scheduler.stop()
+
+        for monitor in monitors:
+            self.assertEqual(len(monitor.get_current_stats()), 2)
+
+    def test_minimum_interval(self):
+        """Tester le refus des intervalles trop courts"""
+        with self.assertRaises(ValueError):
+            AdvancedNetworkMonitor(interval=0.01, counter_source=SyntheticSource())
+
+class TestCounterDelta(unittest.TestCase):
+    def test_counter_wrap_and_reset(self):
+        """Tester la gestion des débordements et remises à zéro"""
+        delta = AdvancedNetworkMonitor._counter_delta
+        self.assertEqual(delta(150, 100), 50)
+        self.assertEqual(delta(10, COUNTER_32_WRAP - 90), 100)
+        self.assertEqual(delta(500, 10 ** 6), 500)
+
+    def test_speed_uses_real_elapsed_time(self):
+        """Tester que la vitesse utilise le temps réellement écoulé"""
+        source = SyntheticSource(1, bytes_per_read=1000)
+        monitor = AdvancedNetworkMonitor(counter_source=source)
+        monitor._update_network_stats()
+        time.sleep(0.2)
+        monitor._update_network_stats()
+
+        speed = monitor.get_current_stats()[0]['speed_upload']
+        self.assertLess(speed, 1000 / 0.19)
+        self.assertGreater(speed, 1000 / 0.4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.rollups import DAY
+from backend.network_manager.segments import SegmentStore
+
+START = 1699920000.0  # minuit UTC
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.directory.name, flush_interval=3600)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def fill(self, start, count):
+        for second in range(count):
+            self.store.add('eth0', start + second, 1.0, [100.0 + second % 10, 200.0, 1.0, 2.0])
+        self.store.flush()
+
+    def test_restart_maps_persisted_samples(self):
+        """Tester qu'un nouveau store relit l'historique, fichiers journaliers compris"""
+        self.fill(START + DAY - 120, 240)
+
+        store = SegmentStore(self.directory.name)
+        history = store.query('eth0', since=START + DAY - 60, step=60)[0]
+        self.assertEqual(history['timestamp'], [START + DAY - 60, START + DAY, START + DAY + 60])
+        self.assertEqual(history['bytes_recv'], [12000.0, 12000.0, 12000.0])
+        self.assertEqual((history['speed_upload_min'][0], history['speed_upload_max'][0]), (100.0, 109.0))
+        self.assertAlmostEqual(history['speed_upload'][0], 104.5)
+
+        # Les ajouts suivants sont visibles par le lecteur sans le recréer
+        self.fill(START + DAY + 120, 60)
+        self.assertEqual(len(store.query('eth0', since=START + DAY, step=60)[0]['timestamp']), 3)
+
+    def test_compaction_keeps_totals(self):
+        """Tester le compactage des jours anciens dans le niveau d'une minute"""
+        self.fill(START, 600)
+        before = self.store.query('eth0', step=3600)[0]
+
+        self.store.compact(now=START + 8 * DAY)
+        self.assertEqual(os.listdir(os.path.join(self.directory.name, '1s', 'eth0')), [])
+        after = self.store.query('eth0', step=3600)[0]
+        self.assertEqual(after['bytes_sent'], before['bytes_sent'])
+        self.assertEqual(after['speed_upload_max'], [109.0])
+        # Un pas plus fin que le niveau restant est servi à sa résolution
+        self.assertEqual(self.store.query('eth0', step=1)[0]['resolution'], 60)
+
+if __name__ == '__main__':
+    unittest.main()
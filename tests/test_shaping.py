@@ -0,0 +1,220 @@
+import unittest
+import sys
+import os
+import errno
+import struct
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.ip_blocker import BatchValidationError
+from backend.network_manager.prefix_trie import parse_prefix
+from backend.network_manager.shaping import (
+    BandwidthShaper, NetlinkShapingBackend, RecordingShapingBackend, parse_rate, u32_keys
+)
+
+try:
+    from pyroute2 import IPBatch
+except ImportError:
+    IPBatch = None
+
+# Types de messages rtnetlink tc
+RTM_NEWQDISC, RTM_DELQDISC, RTM_NEWTCLASS, RTM_DELTCLASS, RTM_NEWTFILTER, RTM_DELTFILTER = 36, 37, 40, 41, 44, 45
+NLMSG_ERROR, NLM_F_ACK, TCA_KIND = 2, 0x4, 1
+
+def tc_messages(data):
+    """Requêtes tc d'un lot netlink : (type, drapeaux, index, handle, parent, kind, octets bruts)"""
+    messages, offset = [], 0
+    while offset < len(data):
+        length, message_type, flags = struct.unpack_from('=IHH', data, offset)
+        _, index, handle, parent, _ = struct.unpack_from('=BxxxiIII', data, offset + 16)
+        kind, attribute = None, offset + 36
+        while attribute < offset + length:
+            attribute_length, attribute_type = struct.unpack_from('=HH', data, attribute)
+            if attribute_type == TCA_KIND:
+                kind = data[attribute + 4:attribute + attribute_length].rstrip(b'\0').decode()
+            attribute += (attribute_length + 3) & ~3
+        messages.append((message_type, flags, index, handle, parent, kind, data[offset:offset + length]))
+        offset += (length + 3) & ~3
+    return messages
+
+class FakeIPRoute:
+    """Socket netlink simulé : un acquittement par requête reçue, erreur choisie par type de message"""
+    def __init__(self, errors=None):
+        self.marshal = IPBatch().marshal
+        self.errors = errors or {}
+        self.sent = []
+        self._acks = []
+
+    def link_lookup(self, ifname):
+        return [3] if ifname == 'eth0' else []
+
+    def sendto(self, data, address):
+        self.sent.append(bytes(data))
+        for message_type, _, _, _, _, _, raw in tc_messages(bytes(data)):
+            code = self.errors.get(message_type, 0)
+            # En cas d'erreur, le noyau renvoie la requête complète après le code d'erreur
+            echoed = raw if code else raw[:16]
+            self._acks.append(struct.pack('=IHHIIi', 20 + len(echoed), NLMSG_ERROR, 0, 0, 0, -code) + echoed)
+
+    def recv(self, size):
+        # Acquittements livrés en plusieurs lectures
+        chunk, self._acks = self._acks[:3], self._acks[3:]
+        return b''.join(chunk)
+
+    def close(self):
+        pass
+
+class FailingShapingBackend(RecordingShapingBackend):
+    """Backend dont le prochain lot est refusé par le noyau"""
+    def __init__(self):
+        super().__init__()
+        self.fail = False
+
+    def apply(self, operations):
+        if self.fail:
+            self.fail = False
+            raise OSError('requête tc refusée')
+        super().apply(operations)
+
+class TestBandwidthShaper(unittest.TestCase):
+    def setUp(self):
+        self.backend = RecordingShapingBackend(interfaces=['eth0', 'eth1'])
+        self.shaper = BandwidthShaper(self.backend, default_rate='100mbit')
+
+    def test_rates_and_u32_keys(self):
+        """Tester la conversion des débits et des préfixes en clés u32"""
+        self.assertEqual(parse_rate('10mbit'), 10 ** 7)
+        self.assertEqual(parse_rate('2kbps'), 16000)
+        self.assertEqual(parse_rate(512000), 512000)
+        for invalid in ('10 furlongs', '', None, 0, True):
+            with self.assertRaises(ValueError):
+                parse_rate(invalid)
+
+        self.assertEqual(u32_keys(parse_prefix('10.1.0.0/16'), 'dst'), ['0x0a010000/0xffff0000+16'])
+        self.assertEqual(u32_keys(parse_prefix('10.1.2.3'), 'src'), ['0x0a010203/0xffffffff+12'])
+        self.assertEqual(u32_keys(parse_prefix('2001:db8::/40'), 'dst'),
+                         ['0x20010db8/0xffffffff+24', '0x00000000/0xff000000+28'])
+
+    def test_batch_is_one_netlink_transaction(self):
+        """Tester qu'un lot de limites produit un seul lot de requêtes, qdisc comprise"""
+        limits = [{'interface': 'eth0', 'target': f'10.0.{i // 256}.{i % 256}', 'rate': '5mbit'}
+                  for i in range(300)]
+        results = self.shaper.set_limits(limits)
+
+        self.assertEqual(len(self.backend.batches), 1)
+        self.assertTrue(all(result['status'] == 'created' for result in results))
+        batch = self.backend.batches[0]
+        # Qdisc racine remplacée, classes racine et par défaut, puis une classe et un filtre par limite
+        self.assertEqual([op.command for op in batch[:4]], ['del', 'add', 'add-class', 'add-class'])
+        self.assertEqual(len(batch), 4 + 2 * 300)
+        handles = {op.handle for op in batch if op.command == 'add-class'}
+        self.assertEqual(len(handles), 302)
+        self.assertEqual(len(self.shaper.list_limits('eth0')), 300)
+
+        # Une modification ne touche que la classe concernée
+        results = self.shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.1', 'rate': '1mbit',
+                                           'ceil': '2mbit'}])
+        self.assertEqual(results[0]['status'], 'updated')
+        self.assertEqual([(op.command, op.params['rate'], op.params['ceil']) for op in self.backend.batches[1]],
+                         [('change-class', '1000000bit', '2000000bit')])
+
+    def test_validation_rejects_whole_batch(self):
+        """Tester qu'une limite invalide fait rejeter le lot sans requête noyau"""
+        with self.assertRaises(BatchValidationError) as context:
+            self.shaper.set_limits([
+                {'interface': 'eth0', 'target': '10.0.0.1', 'rate': '1mbit'},
+                {'interface': 'wlan9', 'target': '10.0.0.2', 'rate': '1mbit'},
+                {'interface': 'eth0', 'target': '10.0.0.300', 'rate': '1mbit'},
+                {'interface': 'eth0', 'target': '10.0.0.4', 'rate': '2mbit', 'ceil': '1mbit'},
+            ])
+        self.assertEqual([error['index'] for error in context.exception.errors], [1, 2, 3])
+        self.assertEqual(self.backend.batches, [])
+        self.assertEqual(self.shaper.list_limits(), [])
+
+    def test_clear_limits(self):
+        """Tester le retrait ciblé (filtre puis classe) et le retrait complet"""
+        self.shaper.set_limits([
+            {'interface': 'eth1', 'target': '192.168.1.0/24', 'rate': '20mbit', 'match': 'src'},
+            {'interface': 'eth1', 'target': '2001:db8::1', 'rate': '10mbit'},
+        ])
+        results = self.shaper.clear_limits('eth1', ['192.168.1.0/24', '10.9.9.9'])
+        self.assertEqual([result['status'] for result in results], ['cleared', 'not_limited'])
+        self.assertEqual([op.command for op in self.backend.batches[-1]], ['del-filter', 'del-class'])
+        self.assertEqual([limit['target'] for limit in self.shaper.list_limits()], ['2001:db8::1'])
+
+        results = self.shaper.clear_limits('eth1')
+        self.assertEqual([result['status'] for result in results], ['cleared'])
+        self.assertEqual([op.command for op in self.backend.batches[-1]], ['del'])
+        self.assertEqual(self.shaper.list_limits(), [])
+
+    def test_kernel_failure_rebuilds_interface(self):
+        """Tester qu'après un échec noyau la qdisc est reconstruite au lot suivant"""
+        backend = FailingShapingBackend()
+        shaper = BandwidthShaper(backend)
+        shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.1', 'rate': '1mbit'}])
+
+        backend.fail = True
+        results = shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.2', 'rate': '1mbit'}])
+        self.assertEqual(results[0]['status'], 'error')
+        self.assertEqual([limit['target'] for limit in shaper.list_limits()], ['10.0.0.1'])
+
+        shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.3', 'rate': '1mbit'}])
+        batch = backend.batches[-1]
+        self.assertEqual(batch[0].command, 'del')
+        self.assertEqual(sum(op.command == 'add-filter' for op in batch), 2)
+
+@unittest.skipIf(IPBatch is None, 'pyroute2 absent')
+class TestNetlinkShapingBackend(unittest.TestCase):
+    def test_batched_htb_messages(self):
+        """Tester les messages qdisc / classe / filtre u32 encodés par pyroute2 et envoyés en un seul envoi"""
+        ipr = FakeIPRoute(errors={RTM_DELQDISC: errno.ENOENT})
+        shaper = BandwidthShaper(NetlinkShapingBackend(ipr), default_rate='100mbit')
+        results = shaper.set_limits([
+            {'interface': 'eth0', 'target': '10.0.0.1', 'rate': '5mbit'},
+            {'interface': 'eth0', 'target': '10.1.0.0/16', 'rate': '1mbit', 'match': 'src'},
+        ])
+        # Qdisc racine absente : son retrait n'est pas une erreur
+        self.assertEqual([result['status'] for result in results], ['created', 'created'])
+        self.assertEqual(len(ipr.sent), 1)
+
+        messages = tc_messages(ipr.sent[0])
+        self.assertEqual([message[:1] + message[2:6] for message in messages], [
+            (RTM_DELQDISC, 3, 0x10000, 0xffffffff, 'htb'),
+            (RTM_NEWQDISC, 3, 0x10000, 0xffffffff, 'htb'),
+            (RTM_NEWTCLASS, 3, 0x10001, 0x10000, 'htb'),
+            (RTM_NEWTCLASS, 3, 0x1fffe, 0x10001, 'htb'),
+            (RTM_NEWTCLASS, 3, 0x10002, 0x10001, 'htb'),
+            (RTM_NEWTFILTER, 3, 0, 0x10000, 'u32'),
+            (RTM_NEWTCLASS, 3, 0x10003, 0x10001, 'htb'),
+            (RTM_NEWTFILTER, 3, 0, 0x10000, 'u32'),
+        ])
+        self.assertTrue(all(flags & NLM_F_ACK for _, flags, *_ in messages))
+        # Clés u32 (masque, valeur, décalage) : destination 10.0.0.1, puis source 10.1.0.0/16
+        self.assertIn(struct.pack('>II', 0xffffffff, 0x0a000001) + struct.pack('=i', 16), messages[5][6])
+        self.assertIn(struct.pack('>II', 0xffff0000, 0x0a010000) + struct.pack('=i', 12), messages[7][6])
+
+    def test_kernel_errors(self):
+        """Tester qu'un refus du noyau lève OSError, sauf le retrait d'un élément déjà absent"""
+        ipr = FakeIPRoute(errors={RTM_DELTFILTER: errno.ENOENT, RTM_NEWTFILTER: errno.EEXIST})
+        shaper = BandwidthShaper(NetlinkShapingBackend(ipr))
+        results = shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.1', 'rate': '1mbit'}])
+        self.assertEqual(results[0]['status'], 'error')
+        self.assertEqual(shaper.list_limits(), [])
+
+        ipr.errors = {RTM_DELTFILTER: errno.ENOENT}
+        shaper.set_limits([{'interface': 'eth0', 'target': '10.0.0.1', 'rate': '1mbit'}])
+        self.assertEqual([result['status'] for result in shaper.clear_limits('eth0', ['10.0.0.1'])], ['cleared'])
+        # Filtre retiré par priorité et protocole, puis sa classe
+        self.assertEqual([message[:1] + message[3:6] for message in tc_messages(ipr.sent[-1])], [
+            (RTM_DELTFILTER, 0, 0x10000, None), (RTM_DELTCLASS, 0x10002, 0x10001, 'htb')
+        ])
+
+        with self.assertRaises(OSError) as context:
+            ipr.errors = {RTM_NEWTCLASS: errno.EINVAL}
+            shaper.backend.apply(shaper._rebuild_operations('eth0', {}))
+        self.assertIn('add-class htb eth0', str(context.exception))
+        self.assertIn('2 requête(s)', str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import multiprocessing
+import tempfile
+import time
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+from backend.network_manager.shared_snapshot import SEQUENCE, SEQUENCE_OFFSET, SharedSnapshotReader, SharedSnapshotWriter
+from backend.network_manager.snapshot import StatsSnapshot
+
+def _read_in_worker(path, queue):
+    """Worker : lire l'instantané publié par un autre processus"""
+    queue.put(SharedSnapshotReader(path).get_current_stats())
+
+class TestSharedSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'snapshot')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reader_matches_sampler(self):
+        """Tester que les workers servent les mêmes octets et ETags que l'échantillonneur"""
+        writer = SharedSnapshotWriter(self.path)
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=SyntheticSource(3), snapshot_writer=writer)
+        reader = SharedSnapshotReader(self.path)
+        self.assertEqual(reader.get_current_stats(), [])
+
+        monitor._update_network_stats()
+        monitor._update_network_stats()
+        snapshot = reader.snapshot
+        self.assertEqual(snapshot.stats_body, monitor.snapshot.stats_body)
+        self.assertEqual(snapshot.stats_etag, monitor.snapshot.stats_etag)
+        self.assertEqual(snapshot.anomalies_etag, monitor.snapshot.anomalies_etag)
+        # Sans nouvel instantané, la lecture ne copie rien
+        self.assertIs(reader.snapshot, snapshot)
+
+        queue = multiprocessing.get_context('spawn').Queue()
+        worker = multiprocessing.get_context('spawn').Process(target=_read_in_worker, args=(self.path, queue))
+        worker.start()
+        self.assertEqual(queue.get(timeout=30), monitor.get_current_stats())
+        worker.join()
+        writer.close()
+
+    def test_write_in_progress_and_growth(self):
+        """Tester qu'une écriture en cours n'est jamais lue, et l'agrandissement du segment"""
+        writer = SharedSnapshotWriter(self.path, size=256)
+        reader = SharedSnapshotReader(self.path, max_retries=3)
+        first = StatsSnapshot.build(None, time.time(), [{'interface': 'eth0'}], [])
+        writer.write(first)
+        self.assertEqual(reader.snapshot.stats_body, first.stats_body)
+
+        # Séquence impaire : le lecteur garde la version précédente
+        sequence = SEQUENCE.unpack_from(writer._map, SEQUENCE_OFFSET)[0]
+        SEQUENCE.pack_into(writer._map, SEQUENCE_OFFSET, sequence + 1)
+        self.assertEqual(reader.snapshot.stats_body, first.stats_body)
+        SEQUENCE.pack_into(writer._map, SEQUENCE_OFFSET, sequence)
+
+        stats = [{'interface': f'eth{i}', 'speed_upload': float(i)} for i in range(100)]
+        second = StatsSnapshot.build(first, time.time(), stats, [])
+        writer.write(second)
+        self.assertEqual(reader.get_current_stats(), stats)
+        writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
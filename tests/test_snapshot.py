@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import json
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+
+class TestStatsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.source = SyntheticSource(2)
+        self.monitor = AdvancedNetworkMonitor(log_path=None, counter_source=self.source)
+
+    def test_snapshot_body_matches_stats(self):
+        """Tester que le corps pré-sérialisé correspond aux statistiques"""
+        self.monitor._update_network_stats()
+        snapshot = self.monitor.snapshot
+
+        body = json.loads(snapshot.stats_body)
+        self.assertEqual(body['status'], 'success')
+        self.assertEqual(body['network_stats'], self.monitor.get_current_stats())
+        self.assertEqual(json.loads(snapshot.anomalies_body)['anomalies'], [])
+
+    def test_versions_follow_changes(self):
+        """Tester que l'ETag ne change que si les données changent"""
+        self.monitor._update_network_stats()
+        self.monitor._update_network_stats()
+        first = self.monitor.snapshot
+
+        # Plus de trafic : compteurs et vitesses identiques d'un tick à l'autre
+        for interface in self.source.interfaces:
+            self.source.set_rate(interface, 0, 0, 0, 0)
+        self.monitor._update_network_stats()
+        second = self.monitor.snapshot
+        self.monitor._update_network_stats()
+        third = self.monitor.snapshot
+
+        self.assertNotEqual(first.stats_etag, second.stats_etag)
+        self.assertEqual(second.stats_etag, third.stats_etag)
+        self.assertIs(second.stats_body, third.stats_body)
+        self.assertEqual(second.anomalies_etag, third.anomalies_etag)
+
+if __name__ == '__main__':
+    unittest.main()
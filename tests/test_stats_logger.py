@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.stats_logger import BatchedStatsLogger
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+
+class TestBatchedStatsLogger(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.log_dir.name, 'network_stats.log')
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def test_one_record_per_tick(self):
+        """Tester qu'un tick produit une seule ligne JSON colonnaire"""
+        monitor = AdvancedNetworkMonitor(log_path=self.log_path, counter_source=SyntheticSource(3))
+        monitor._update_network_stats()
+        monitor._update_network_stats()
+        monitor.stats_logger.stop()
+
+        with open(self.log_path) as log_file:
+            records = [json.loads(line) for line in log_file]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['interfaces'], ['syn0', 'syn1', 'syn2'])
+        self.assertEqual(len(records[1]['speed_upload']), 3)
+
+    def test_rotation_by_size(self):
+        """Tester la rotation du fichier par taille"""
+        stats_logger = BatchedStatsLogger(self.log_path, flush_bytes=1, max_bytes=200, backup_count=2)
+        source = SyntheticSource(5)
+        monitor = AdvancedNetworkMonitor(log_path=None, counter_source=source)
+        for i in range(10):
+            monitor._update_network_stats()
+            stats_logger.submit(float(i), list(monitor.network_stats.values()))
+        stats_logger.stop()
+
+        self.assertTrue(os.path.exists(self.log_path + '.1'))
+        self.assertTrue(os.path.exists(self.log_path + '.2'))
+        self.assertFalse(os.path.exists(self.log_path + '.3'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import json
+
+# Ajouter le chemin du projet pour l'import
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.network_manager.advanced_monitor import AdvancedNetworkMonitor
+from backend.network_manager.counter_sources import SyntheticSource
+
+def parse_event(message):
+    lines = message.decode().strip().split('\n')
+    return lines[0].split(': ', 1)[1], json.loads(lines[1].split(': ', 1)[1])
+
+class TestStatsBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.source = SyntheticSource(3)
+        self.monitor = AdvancedNetworkMonitor(log_path=None, counter_source=self.source)
+
+    def test_snapshot_then_changed_interfaces_only(self):
+        """Tester le snapshot initial puis l'envoi des seules interfaces modifiées"""
+        self.monitor._update_network_stats()
+        events = self.monitor.broadcaster.stream(keepalive=0.01)
+
+        event, payload = parse_event(next(events))
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual(len(payload['network_stats']), 3)
+
+        # Seule syn1 évolue
+        self.source.set_rate('syn0', 0, 0, 0, 0)
+        self.source.set_rate('syn2', 0, 0, 0, 0)
+        self.monitor._update_network_stats()
+        self.monitor._update_network_stats()
+
+        event, payload = parse_event(next(events))
+        self.assertEqual(event, 'delta')
+        event, payload = parse_event(next(events))
+        self.assertEqual([stat['interface'] for stat in payload['network_stats']], ['syn1'])
+
+        events.close()
+        self.assertEqual(self.monitor.broadcaster.subscriber_count, 0)
+
+    def test_single_serialization_shared_by_subscribers(self):
+        """Tester que tous les abonnés reçoivent le même message sérialisé"""
+        streams = [self.monitor.broadcaster.stream() for _ in range(3)]
+        for stream in streams:
+            next(stream)
+        self.monitor._update_network_stats()
+
+        messages = [next(stream) for stream in streams]
+        self.assertTrue(all(message is messages[0] for message in messages))
+        for stream in streams:
+            stream.close()
+
+if __name__ == '__main__':
+    unittest.main()